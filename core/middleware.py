@@ -0,0 +1,118 @@
+import json
+import logging
+import re
+import time
+from collections import Counter, deque
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger('core.instrumentation')
+
+DEFAULTS = {
+    'ENABLED': False,
+    'SLOWEST_QUERIES': 5,       # statements kept per request, slowest first
+    'DUPLICATE_THRESHOLD': 3,   # same normalised SQL this often = likely N+1
+    'BUFFER_SIZE': 200,         # recent requests kept in memory for staff
+}
+
+_recent_requests = None
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'QUERY_INSTRUMENTATION', {})}
+
+
+def get_recent_requests():
+    """Ring buffer of the latest request reports, newest last."""
+    global _recent_requests
+    if _recent_requests is None:
+        _recent_requests = deque(maxlen=get_config()['BUFFER_SIZE'])
+    return _recent_requests
+
+
+def normalize_sql(sql):
+    """Reduce a statement to its shape so repeats with different values match."""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _IN_LIST.sub('(...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+class QueryRecorder:
+    """execute_wrapper that times every statement run on a connection."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, (time.perf_counter() - started) * 1000))
+
+
+class QueryInstrumentationMiddleware:
+    """Per-request wall time, SQL count/time, slowest statements and N+1 hints.
+
+    Opt-in: does nothing unless QUERY_INSTRUMENTATION['ENABLED'] is true.
+    Reports go to the 'core.instrumentation' logger as JSON, to the
+    X-Query-Count and Server-Timing response headers and to an in-process
+    ring buffer that staff can read at /admin/instrumentation/.
+    """
+
+    def __init__(self, get_response):
+        self.config = get_config()
+        if not self.config['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        duration = (time.perf_counter() - started) * 1000
+
+        report = self.build_report(request, response, duration, recorder.queries)
+        response['X-Query-Count'] = str(report['queries'])
+        response['Server-Timing'] = (
+            f'app;dur={duration:.1f}, '
+            f'db;dur={report["sql_ms"]:.1f};desc="{report["queries"]} queries"'
+        )
+        get_recent_requests().append(report)
+        level = logging.WARNING if report['duplicates'] else logging.INFO
+        logger.log(level, json.dumps(report), extra={'instrumentation': report})
+        return response
+
+    def build_report(self, request, response, duration, queries):
+        shapes = Counter(normalize_sql(sql) for sql, _ in queries)
+        slowest = sorted(queries, key=lambda query: query[1], reverse=True)
+        return {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'user_id': getattr(getattr(request, 'user', None), 'pk', None),
+            'duration_ms': round(duration, 2),
+            'queries': len(queries),
+            'sql_ms': round(sum(ms for _, ms in queries), 2),
+            'slowest': [
+                {'sql': sql, 'ms': round(ms, 2)}
+                for sql, ms in slowest[:self.config['SLOWEST_QUERIES']]
+            ],
+            'duplicates': [
+                {'sql': sql, 'count': count}
+                for sql, count in shapes.most_common()
+                if count >= self.config['DUPLICATE_THRESHOLD']
+            ],
+        }
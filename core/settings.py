@@ -32,6 +32,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Inert unless QUERY_INSTRUMENTATION['ENABLED'] is set (see below)
+    'core.middleware.QueryInstrumentationMiddleware',
 ]
 
 ROOT_URLCONF = 'core.urls'
@@ -61,6 +63,32 @@ DATABASES = {
     }
 }
 
+# Use a local PostgreSQL instead of SQLite when POSTGRES_DB is set
+if os.environ.get('POSTGRES_DB'):
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ['POSTGRES_DB'],
+        'USER': os.environ.get('POSTGRES_USER', ''),
+        'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+        'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+        'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+    }
+
+# Process-local by default; point 'default' at Redis or Memcached when running
+# several workers so cache invalidations reach all of them
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'project-manager',
+    }
+}
+
+# Cache alias for per-user {project_id: role} maps used for access checks
+# (projects.access). None, or a process-local backend, loads them once per
+# request instead: stale roles would outlive membership changes in other workers.
+PROJECT_ACCESS_CACHE = os.environ.get('PROJECT_ACCESS_CACHE') or None
+PROJECT_ACCESS_CACHE_TIMEOUT = 300
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -146,4 +174,31 @@ JIRA_LIKE_SETTINGS = {
         'high': '#f59e0b',
         'highest': '#e11d48',
     }
-}
\ No newline at end of file
+}
+
+# Cards rendered per kanban column; the rest load on demand
+KANBAN_COLUMN_SIZE = 25
+
+# Tasks shown on the project page and per "load more" request
+PROJECT_TASKS_PAGE_SIZE = 25
+
+# Comments shown on the task page and per "older comments" request
+COMMENTS_PAGE_SIZE = 20
+
+# Tasks read (and M2M relations prefetched) per chunk by streaming exports
+EXPORT_CHUNK_SIZE = 2000
+
+# Rows validated and written per transaction by task imports
+IMPORT_BATCH_SIZE = 1000
+
+# rebalance_task_ranks respaces kanban columns with card ranks longer than this
+TASK_RANK_REBALANCE_LENGTH = 16
+
+# Per-request SQL and timing instrumentation (core.middleware); staff can
+# browse the most recent reports at /admin/instrumentation/
+QUERY_INSTRUMENTATION = {
+    'ENABLED': os.environ.get('QUERY_INSTRUMENTATION') == '1',
+    'SLOWEST_QUERIES': 5,
+    'DUPLICATE_THRESHOLD': 3,
+    'BUFFER_SIZE': 200,
+}
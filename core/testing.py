@@ -0,0 +1,83 @@
+"""Shared helpers for the query-count regression tests."""
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+
+def seed_workspace(projects=4, members=6, tasks_per_project=30, comments_per_task=3):
+    """Create a small but realistic workspace and return its main objects.
+
+    Every project gets members, epics, sprints, components and versions, and
+    every task gets labels, components, versions and comments, so views that
+    forget to prefetch something show up as extra queries.
+    """
+    from projects.models import Project, Epic, Sprint
+    from tasks.models import Task, Comment, Label, Component, Version
+
+    User = get_user_model()
+    password = make_password('testpass123')  # hash once, not per user
+    owner = User.objects.create(username='owner', password=password, is_staff=True, is_superuser=True)
+    users = [
+        User.objects.create(username=f'member{i}', password=password)
+        for i in range(members)
+    ]
+    labels = [Label.objects.create(name=name) for name in ('backend', 'frontend', 'ux', 'infra')]
+    statuses = Task.Status.values
+    priorities = Task.Priority.values
+    today = timezone.now()
+
+    created_projects = []
+    for p in range(projects):
+        project = Project.objects.create(name=f'Project {p}', owner=owner)
+        project.members.add(owner, *users)
+        epics = [Epic.objects.create(name=f'Epic {i}', project=project) for i in range(2)]
+        sprints = [
+            Sprint.objects.create(
+                name=f'Sprint {i}', project=project,
+                start_date=(today + timedelta(days=14 * i)).date(),
+                end_date=(today + timedelta(days=14 * i + 13)).date(),
+            )
+            for i in range(2)
+        ]
+        components = [Component.objects.create(name=f'Component {i}', project=project) for i in range(2)]
+        versions = [Version.objects.create(name=f'1.{i}', project=project) for i in range(2)]
+        for t in range(tasks_per_project):
+            task = Task.objects.create(
+                title=f'Task {t} of project {p}',
+                project=project,
+                assignee=users[t % len(users)] if t % 5 else None,
+                status=statuses[t % len(statuses)],
+                priority=priorities[t % len(priorities)],
+                epic=epics[t % 2],
+                sprint=sprints[t % 2],
+                story_points=t % 8 or None,
+                due_date=today + timedelta(days=t) if t % 3 else None,
+            )
+            task.labels.add(labels[t % len(labels)], labels[(t + 1) % len(labels)])
+            task.components.add(components[t % 2])
+            task.fix_versions.add(versions[t % 2])
+            task.affects_versions.add(versions[(t + 1) % 2])
+            for c in range(comments_per_task):
+                Comment.objects.create(task=task, author=users[c % len(users)], content=f'Comment {c}')
+        created_projects.append(project)
+
+    return {'owner': owner, 'users': users, 'projects': created_projects, 'labels': labels}
+
+
+class QueryCountMixin:
+    @contextmanager
+    def assertMaxQueries(self, limit):
+        """Fail if the block runs more than ``limit`` SQL queries."""
+        with CaptureQueriesContext(connection) as context:
+            yield context
+        executed = len(context.captured_queries)
+        if executed > limit:
+            queries = '\n'.join(
+                f'{i}. {query["sql"]}' for i, query in enumerate(context.captured_queries, start=1)
+            )
+            self.fail(f'{executed} queries executed, at most {limit} expected\n{queries}')
@@ -0,0 +1,81 @@
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from tasks.models import Task
+from . import middleware
+from .middleware import normalize_sql
+from .testing import seed_workspace
+
+
+INSTRUMENTATION = {'ENABLED': True, 'DUPLICATE_THRESHOLD': 3, 'BUFFER_SIZE': 10}
+
+
+class NormalizeSqlTest(TestCase):
+    def test_literals_and_in_lists_collapse(self):
+        self.assertEqual(
+            normalize_sql("SELECT * FROM t WHERE id = 12 AND name = 'it''s'\n AND x IN (%s, %s, %s)"),
+            'SELECT * FROM t WHERE id = ? AND name = ? AND x IN (...)',
+        )
+        self.assertEqual(
+            normalize_sql('SELECT * FROM t WHERE id IN (%s)'),
+            normalize_sql('SELECT * FROM t WHERE id IN (%s, %s)'),
+        )
+
+
+class QueryInstrumentationMiddlewareTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.workspace = seed_workspace(projects=1, tasks_per_project=5, comments_per_task=0)
+        cls.owner = cls.workspace['owner']
+
+    def setUp(self):
+        middleware.get_recent_requests().clear()
+        self.client.force_login(self.owner)
+
+    def test_disabled_by_default(self):
+        response = self.client.get(reverse('tasks:task_list'))
+        self.assertNotIn('X-Query-Count', response)
+        self.assertFalse(middleware.get_recent_requests())
+
+    @override_settings(QUERY_INSTRUMENTATION=INSTRUMENTATION)
+    def test_headers_and_report(self):
+        response = self.client.get(reverse('tasks:task_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(int(response['X-Query-Count']), 0)
+        self.assertIn('db;dur=', response['Server-Timing'])
+
+        report = middleware.get_recent_requests()[-1]
+        self.assertEqual(report['path'], reverse('tasks:task_list'))
+        self.assertEqual(report['user_id'], self.owner.pk)
+        self.assertEqual(report['queries'], int(response['X-Query-Count']))
+        self.assertLessEqual(len(report['slowest']), middleware.DEFAULTS['SLOWEST_QUERIES'])
+        self.assertEqual(report['duplicates'], [])
+
+    @override_settings(QUERY_INSTRUMENTATION=INSTRUMENTATION)
+    def test_repeated_queries_are_flagged(self):
+        def n_plus_one(request):
+            titles = [Task.objects.get(pk=pk).title for pk in Task.objects.values_list('pk', flat=True)]
+            return HttpResponse(', '.join(titles))
+
+        recorder = middleware.QueryInstrumentationMiddleware(n_plus_one)
+        request = self.client.get(reverse('tasks:task_list')).wsgi_request
+        with self.assertLogs('core.instrumentation', 'WARNING'):
+            recorder(request)
+
+        report = middleware.get_recent_requests()[-1]
+        self.assertEqual(len(report['duplicates']), 1)
+        self.assertEqual(report['duplicates'][0]['count'], Task.objects.count())
+
+    @override_settings(QUERY_INSTRUMENTATION=INSTRUMENTATION)
+    def test_report_view_is_staff_only(self):
+        self.client.get(reverse('tasks:task_list'))
+        response = self.client.get(reverse('instrumentation'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['requests'])
+
+        member = get_user_model().objects.get(username='member0')
+        self.client.force_login(member)
+        response = self.client.get(reverse('instrumentation'))
+        self.assertEqual(response.status_code, 302)
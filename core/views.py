@@ -0,0 +1,11 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+
+from .middleware import get_recent_requests
+
+
+@staff_member_required
+def instrumentation(request):
+    """Recent per-request SQL/timing reports, slowest first."""
+    reports = sorted(get_recent_requests(), key=lambda report: report['duration_ms'], reverse=True)
+    return JsonResponse({'requests': reports})
@@ -0,0 +1,111 @@
+"""Which projects a user may see, and in what role.
+
+The visibility rule (owner or member) used to be spelled out in every view as
+``Q(owner=user) | Q(members=user)`` plus ``.distinct()``, joining the members
+table and de-duplicating wide rows on each query. Instead each user's
+memberships are resolved into a ``{project_id: role}`` map with one UNION
+query, remembered on the user object for the rest of the request and, when
+PROJECT_ACCESS_CACHE names a shared cache, kept there across requests. Views
+filter with ``project_id IN (...)``.
+
+projects.signals drops a user's entry whenever a project's owner or members
+change, so the cache never has to expire on its own to stay correct; the
+timeout only bounds memory use. That only holds if every worker sees the
+deletion, so a process-local cache (LocMemCache) is never used: removed
+members would keep their access in the other workers until it expired.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.db.models import Value, CharField
+
+from .models import Project
+
+OWNER = 'owner'
+MEMBER = 'member'
+
+_CACHE_ATTRIBUTE = '_project_roles'
+
+
+def get_cache():
+    """The shared cache for role maps, or None to load them once per request."""
+    alias = getattr(settings, 'PROJECT_ACCESS_CACHE', None)
+    if alias is None:
+        return None
+    cache = caches[alias]
+    return None if isinstance(cache, LocMemCache) else cache
+
+
+def cache_key(user_id):
+    return f'projects:access:{user_id}'
+
+
+def _load_roles(user):
+    role = lambda name: Value(name, output_field=CharField())
+    owned = Project.objects.filter(owner=user).order_by().values_list('pk', role(OWNER))
+    user_field = Project.members.field.m2m_reverse_field_name()
+    joined = (
+        Project.members.through.objects.filter(**{user_field: user})
+        .order_by().values_list('project_id', role(MEMBER))
+    )
+    roles = {}
+    for project_id, name in owned.union(joined, all=True):
+        # Owners are often members too; ownership wins
+        if roles.get(project_id) != OWNER:
+            roles[project_id] = name
+    return roles
+
+
+def project_roles(user):
+    """``{project_id: OWNER | MEMBER}`` for every project ``user`` can access."""
+    if not user.is_authenticated:
+        return {}
+    roles = getattr(user, _CACHE_ATTRIBUTE, None)
+    if roles is None:
+        cache = get_cache()
+        if cache is not None:
+            roles = cache.get(cache_key(user.pk))
+        if roles is None:
+            roles = _load_roles(user)
+            if cache is not None:
+                cache.set(
+                    cache_key(user.pk), roles,
+                    getattr(settings, 'PROJECT_ACCESS_CACHE_TIMEOUT', 300),
+                )
+        setattr(user, _CACHE_ATTRIBUTE, roles)
+    return roles
+
+
+def project_role(user, project_id):
+    """OWNER, MEMBER or None."""
+    return project_roles(user).get(project_id)
+
+
+def accessible_project_ids(user):
+    """Ids of the projects ``user`` owns or is a member of."""
+    return project_roles(user).keys()
+
+
+def owned_project_ids(user):
+    return [project_id for project_id, role in project_roles(user).items() if role == OWNER]
+
+
+def invalidate_access(user_ids):
+    """Forget the cached roles of ``user_ids``.
+
+    Deleted straight away and again on commit, so a request that read the old
+    memberships while the change was still uncommitted can't leave them behind.
+    """
+    cache = get_cache()
+    keys = [cache_key(user_id) for user_id in set(user_ids) if user_id is not None]
+    if cache is None or not keys:
+        return
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def clear_access_cache(user):
+    """Forget everything cached for ``user``, including on the object itself."""
+    user.__dict__.pop(_CACHE_ATTRIBUTE, None)
+    invalidate_access([user.pk])
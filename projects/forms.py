@@ -1,5 +1,6 @@
 from django import forms
 from .models import Project
+from .access import project_role, OWNER
 from django.contrib.auth import get_user_model
 
 class ProjectForm(forms.ModelForm):
@@ -16,4 +17,11 @@ class ProjectForm(forms.ModelForm):
         self.user = kwargs.pop('user', None)
         super().__init__(*args, **kwargs)
         if self.user:
-            self.fields['members'].queryset = get_user_model().objects.exclude(id=self.user.id)
\ No newline at end of file
+            self.fields['members'].queryset = get_user_model().objects.exclude(id=self.user.id)
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        # Only the owner may change an existing project or its members
+        if self.instance.pk and self.user and project_role(self.user, self.instance.pk) != OWNER:
+            raise forms.ValidationError('Only the project owner can change this project.')
+        return cleaned_data
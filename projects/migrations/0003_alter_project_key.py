@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 01:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='project',
+            name='key',
+            field=models.CharField(max_length=10, unique=True),
+        ),
+    ]
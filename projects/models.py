@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.db.models.functions import Coalesce
 from django.urls import reverse
 from django.conf import settings
 from django.utils import timezone
@@ -6,6 +7,41 @@ from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+def count_subquery(queryset, field):
+    """COUNT(*) of ``queryset`` grouped by ``field``, usable as a correlated annotation."""
+    counts = queryset.order_by().values(field).annotate(count=models.Count('*')).values('count')
+    return Coalesce(models.Subquery(counts, output_field=models.IntegerField()), 0)
+
+
+class ProjectQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        """Projects ``user`` owns or is a member of, without joining members."""
+        from .access import accessible_project_ids
+        return self.filter(pk__in=accessible_project_ids(user))
+    
+    def owned_by(self, user):
+        """Projects ``user`` owns, from the same cached membership map."""
+        from .access import owned_project_ids
+        return self.filter(pk__in=owned_project_ids(user))
+    
+    def with_counts(self):
+        """Annotate member_count and task_count.
+        
+        Correlated subqueries instead of Count() over joins, which would
+        multiply rows and skew each other's counts.
+        """
+        Task = self.model._meta.get_field('tasks').related_model
+        Membership = self.model.members.through
+        return self.annotate(
+            member_count=count_subquery(
+                Membership.objects.filter(project=models.OuterRef('pk')), 'project'
+            ),
+            task_count=count_subquery(
+                Task.objects.filter(project=models.OuterRef('pk')), 'project'
+            ),
+        )
+
+
 class Project(models.Model):
     name = models.CharField(max_length=200)
     description = models.TextField(blank=True)
@@ -24,34 +60,71 @@ class Project(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)    
     
+    objects = ProjectQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-created_at']
     
     def __str__(self):
         return self.name
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_owner()
+        return instance
+    
+    def remember_owner(self):
+        # Lets projects.signals invalidate the previous owner's access on transfer
+        self._loaded_owner_id = self.__dict__.get('owner_id')
+    
+    # Attempts at claiming a generated key before giving up on IntegrityError
+    KEY_ATTEMPTS = 5
+    
     def save(self, *args, **kwargs):
-        # Only generate key if it doesn't exist
-        if not self.key:
-            # Generate base key from name
-            if self.name:
-                # Clean the name - take only letters, make uppercase, max 3 chars
-                base_key = ''.join([c.upper() for c in self.name if c.isalpha()])[:3]
-                if not base_key:  # If no letters found
-                    base_key = 'PROJ'
-            else:
-                base_key = 'PROJ'
-            
-            # Find a unique key
-            key = base_key
-            counter = 1
-            # Keep trying until we find a unique key
-            while Project.objects.filter(key=key).exclude(pk=self.pk).exists():
-                key = f"{base_key}{counter}"
-                counter += 1
-            self.key = key
+        if self.key:
+            return super().save(*args, **kwargs)
         
-        super().save(*args, **kwargs)
+        base_key = self.get_base_key()
+        for attempt in range(self.KEY_ATTEMPTS):
+            self.key = self.get_free_key(base_key)
+            try:
+                # Savepoint so a lost race doesn't poison an outer transaction
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                # Another project claimed the same key between our read and insert
+                key_taken = Project.objects.filter(key=self.key).exclude(pk=self.pk).exists()
+                self.key = ''
+                if not key_taken or attempt == self.KEY_ATTEMPTS - 1:
+                    raise
+    
+    def get_base_key(self):
+        # Clean the name - take only letters, make uppercase, max 3 chars
+        base_key = ''.join([c.upper() for c in self.name or '' if c.isalpha()])[:3]
+        return base_key or 'PROJ'
+    
+    def get_free_key(self, base_key):
+        """Return the first free key of BASE, BASE1, BASE2, ... using one prefix query."""
+        # A range rather than startswith: LIKE is case-insensitive on SQLite
+        # and can't use the unique index on PostgreSQL without pattern ops.
+        # Candidates are BASE plus digits, which sort after BASE and no later
+        # than BASE999... under any collation.
+        max_length = Project._meta.get_field('key').max_length
+        upper_bound = base_key + '9' * (max_length - len(base_key))
+        keys = Project.objects.filter(key__gte=base_key, key__lte=upper_bound).order_by()
+        if self.pk:
+            keys = keys.exclude(pk=self.pk)
+        taken = {key for key in keys.values_list('key', flat=True) if key.startswith(base_key)}
+        if base_key not in taken:
+            return base_key
+        suffixes = {
+            int(key[len(base_key):]) for key in taken if key[len(base_key):].isdigit()
+        }
+        counter = 1
+        while counter in suffixes:
+            counter += 1
+        return f"{base_key}{counter}"
     
     def get_absolute_url(self):
         return reverse('projects:project_detail', kwargs={'pk': self.pk})
@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.db.models.signals import post_save, pre_delete, m2m_changed
+from django.dispatch import receiver
+
+from .access import invalidate_access
+from .models import Project
+
+
+@receiver(post_save, sender=Project)
+def invalidate_owner_access(sender, instance, created, **kwargs):
+    # Both the new owner and, after a transfer, the previous one
+    invalidate_access([instance.owner_id, getattr(instance, '_loaded_owner_id', None)])
+    instance.remember_owner()
+
+
+@receiver(pre_delete, sender=Project)
+def invalidate_project_access(sender, instance, **kwargs):
+    user_field = Project.members.field.m2m_reverse_field_name()
+    member_ids = Project.members.through.objects.filter(project=instance).values_list(
+        f'{user_field}_id', flat=True
+    )
+    invalidate_access([instance.owner_id, *member_ids])
+
+
+@receiver(m2m_changed, sender=Project.members.through)
+def invalidate_member_access(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        # user.projects.add(...) and friends: the user is the instance
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            invalidate_access([instance.pk])
+    elif action in ('post_add', 'post_remove'):
+        invalidate_access(pk_set)
+    elif action == 'pre_clear':
+        invalidate_access(instance.members.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_new_user_access(sender, instance, created, raw=False, **kwargs):
+    # A new row may reuse the id of a deleted user whose roles are still cached
+    if created and not raw:
+        invalidate_access([instance.pk])
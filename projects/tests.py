@@ -1,6 +1,13 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from unittest import mock
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
+from django.urls import reverse
+from tasks.models import Task
+from core.testing import QueryCountMixin, seed_workspace
 from .models import Project
+from .access import get_cache, project_roles, OWNER, MEMBER
 
 class ProjectModelTest(TestCase):
     def setUp(self):
@@ -16,4 +23,231 @@ class ProjectModelTest(TestCase):
         )
         self.assertEqual(project.name, 'Test Project')
         self.assertEqual(project.owner, self.user)
-        
\ No newline at end of file
+    
+    def test_generated_keys_are_unique(self):
+        keys = [Project.objects.create(name='Apollo', owner=self.user).key for _ in range(3)]
+        self.assertEqual(keys, ['APO', 'APO1', 'APO2'])
+        
+        # One prefix query plus the savepoint-wrapped insert, no probing
+        with self.assertNumQueries(4):
+            project = Project.objects.create(name='Apollo', owner=self.user)
+        self.assertEqual(project.key, 'APO3')
+    
+    def test_key_prefix_is_case_sensitive(self):
+        Project.objects.create(name='Apollo', owner=self.user)
+        # A lowercase key sharing the prefix must not count as taken
+        Project.objects.create(name='Other', key='apo1', owner=self.user)
+        self.assertEqual(Project.objects.create(name='Apollo', owner=self.user).key, 'APO1')
+    
+    def test_base_key_ending_in_z(self):
+        keys = [Project.objects.create(name='Jazz', owner=self.user).key for _ in range(3)]
+        self.assertEqual(keys, ['JAZ', 'JAZ1', 'JAZ2'])
+    
+    def test_lost_key_race_is_retried(self):
+        project = Project(name='Zeus', owner=self.user)
+        original = Project.get_free_key
+        
+        def stale_free_key(instance, base_key):
+            # Simulate another writer taking the key after we read it
+            key = original(instance, base_key)
+            if key == 'ZEU':
+                Project.objects.create(name='Other', key='ZEU', owner=self.user)
+            return key
+        
+        with mock.patch.object(Project, 'get_free_key', stale_free_key):
+            project.save()
+        self.assertEqual(project.key, 'ZEU1')
+
+
+# Shared by every worker on the host, unlike LocMemCache
+SHARED_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'access': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': tempfile.mkdtemp(prefix='project-access-'),
+    },
+}
+
+
+@override_settings(CACHES=SHARED_CACHES, PROJECT_ACCESS_CACHE='access')
+class ProjectAccessCacheTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(SHARED_CACHES['access']['LOCATION'], ignore_errors=True)
+    
+    def setUp(self):
+        get_cache().clear()
+        User = get_user_model()
+        self.owner = User.objects.create_user(username='owner', password='testpass123')
+        self.member = User.objects.create_user(username='member', password='testpass123')
+        self.project = Project.objects.create(name='Cached', owner=self.owner)
+        self.project.members.add(self.owner, self.member)
+    
+    def roles(self, user):
+        # A fresh user object each time, as every request gets
+        return project_roles(get_user_model().objects.get(pk=user.pk))
+    
+    def test_roles_are_cached(self):
+        self.assertEqual(self.roles(self.owner), {self.project.pk: OWNER})
+        self.assertEqual(self.roles(self.member), {self.project.pk: MEMBER})
+        member = get_user_model().objects.get(pk=self.member.pk)
+        with self.assertNumQueries(0):
+            project_roles(member)
+    
+    @override_settings(PROJECT_ACCESS_CACHE='default')
+    def test_process_local_cache_is_not_used(self):
+        # Invalidations wouldn't reach other workers, so load once per request
+        self.assertIsNone(get_cache())
+        self.roles(self.member)
+        # The user, then the roles again
+        with self.assertNumQueries(2):
+            self.roles(self.member)
+    
+    def test_member_changes_invalidate(self):
+        other = Project.objects.create(name='Other', owner=self.owner)
+        self.assertNotIn(other.pk, self.roles(self.member))
+        other.members.add(self.member)
+        self.assertEqual(self.roles(self.member)[other.pk], MEMBER)
+        other.members.remove(self.member)
+        self.assertNotIn(other.pk, self.roles(self.member))
+        self.member.projects.add(other)
+        self.assertIn(other.pk, self.roles(self.member))
+        other.members.clear()
+        self.assertNotIn(other.pk, self.roles(self.member))
+    
+    def test_owner_transfer_and_delete_invalidate(self):
+        self.assertIn(self.project.pk, self.roles(self.owner))
+        project = Project.objects.get(pk=self.project.pk)
+        project.owner = self.member
+        project.save()
+        self.assertEqual(self.roles(self.member), {self.project.pk: OWNER})
+        self.assertEqual(self.roles(self.owner), {self.project.pk: MEMBER})
+        
+        project.delete()
+        self.assertEqual(self.roles(self.owner), {})
+        self.assertEqual(self.roles(self.member), {})
+    
+    def test_only_owner_can_edit(self):
+        self.client.force_login(self.member)
+        response = self.client.get(reverse('projects:project_update', args=[self.project.pk]))
+        self.assertEqual(response.status_code, 404)
+        self.client.force_login(self.owner)
+        response = self.client.get(reverse('projects:project_update', args=[self.project.pk]))
+        self.assertEqual(response.status_code, 200)
+
+
+class ProjectListViewTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='testuser', password='testpass123'
+        )
+        self.members = [
+            get_user_model().objects.create_user(username=f'member{i}', password='testpass123')
+            for i in range(3)
+        ]
+        for name in ['Alpha', 'Beta', 'Gamma']:
+            project = Project.objects.create(name=name, owner=self.user)
+            project.members.add(self.user, *self.members)
+            for i in range(4):
+                Task.objects.create(title=f'{name} {i}', project=project)
+        self.client.force_login(self.user)
+    
+    def test_counts_are_annotated(self):
+        # session, user, accessible project ids, projects; independent of the number of projects
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('projects:project_list'))
+        projects = list(response.context['projects'])
+        self.assertEqual(len(projects), 3)
+        for project in projects:
+            # Members must not inflate each other's counts
+            self.assertEqual(project.member_count, 4)
+            self.assertEqual(project.task_count, 4)
+
+
+class ProjectViewQueryCountTest(QueryCountMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.workspace = seed_workspace()
+        cls.project = cls.workspace['projects'][0]
+    
+    def setUp(self):
+        self.client.force_login(self.workspace['owner'])
+    
+    def test_project_list(self):
+        with self.assertMaxQueries(4):
+            self.client.get(reverse('projects:project_list'))
+    
+    def test_project_detail(self):
+        # One page of tasks, its labels and the grouped type/assignee counts
+        with self.assertMaxQueries(7):
+            response = self.client.get(reverse('projects:project_detail', args=[self.project.pk]))
+        self.assertEqual(len(response.context['tasks']), 25)
+        self.assertIn('next_page_url', response.context)
+    
+    def test_project_tasks_json(self):
+        url = reverse('projects:project_tasks', args=[self.project.pk])
+        with self.assertMaxQueries(7):
+            first = self.client.get(url).json()
+        with self.assertMaxQueries(6):
+            second = self.client.get(url, {'cursor': first['next_cursor']}).json()
+        self.assertNotIn('summary', second)
+        self.assertFalse(second['has_next'])
+        keys = [task['key'] for task in first['results'] + second['results']]
+        self.assertCountEqual(keys, self.project.tasks.values_list('key', flat=True))
+    
+    def test_admin_changelist(self):
+        with self.assertMaxQueries(5):
+            response = self.client.get(reverse('admin:projects_project_changelist'))
+        self.assertEqual(response.status_code, 200)
+
+
+class ProjectDetailSummaryTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.workspace = seed_workspace(projects=1, members=2, tasks_per_project=10, comments_per_task=0)
+        cls.project = cls.workspace['projects'][0]
+    
+    def setUp(self):
+        self.client.force_login(self.workspace['owner'])
+    
+    def test_summary_counts(self):
+        response = self.client.get(reverse('projects:project_tasks', args=[self.project.pk]))
+        summary = response.json()['summary']
+        tasks = self.project.tasks.all()
+        self.assertEqual(summary['total'], tasks.count())
+        self.assertEqual(
+            {row['value']: row['count'] for row in summary['status']},
+            {status: tasks.filter(status=status).count() for status in Task.Status.values},
+        )
+        self.assertEqual(sum(row['count'] for row in summary['issue_type']), tasks.count())
+        assignees = {row['username']: row['count'] for row in summary['assignee']}
+        self.assertEqual(assignees[None], tasks.filter(assignee=None).count())
+        self.assertEqual(assignees['member0'], tasks.filter(assignee__username='member0').count())
+        # Unassigned is listed last
+        self.assertIsNone(summary['assignee'][-1]['username'])
+    
+    def test_status_filter(self):
+        response = self.client.get(
+            reverse('projects:project_tasks', args=[self.project.pk]), {'status': Task.Status.DONE}
+        )
+        statuses = {task['status'] for task in response.json()['results']}
+        self.assertEqual(statuses, {Task.Status.DONE})
+        # Unknown statuses are ignored rather than matching nothing
+        response = self.client.get(
+            reverse('projects:project_detail', args=[self.project.pk]), {'status': 'bogus'}
+        )
+        self.assertEqual(len(response.context['tasks']), 10)
+        self.assertIsNone(response.context['status_filter'])
+    
+    def test_invalid_cursor(self):
+        response = self.client.get(
+            reverse('projects:project_tasks', args=[self.project.pk]), {'cursor': 'garbage'}
+        )
+        self.assertEqual(response.status_code, 404)
+    
+    def test_other_users_project(self):
+        outsider = get_user_model().objects.create_user(username='outsider', password='testpass123')
+        self.client.force_login(outsider)
+        response = self.client.get(reverse('projects:project_tasks', args=[self.project.pk]))
+        self.assertEqual(response.status_code, 404)
@@ -7,5 +7,6 @@ urlpatterns = [
     path('', views.ProjectListView.as_view(), name='project_list'),
     path('create/', views.ProjectCreateView.as_view(), name='project_create'),
     path('<int:pk>/', views.ProjectDetailView.as_view(), name='project_detail'),
+    path('<int:pk>/tasks/', views.ProjectTasksJsonView.as_view(), name='project_tasks'),
     path('<int:pk>/update/', views.ProjectUpdateView.as_view(), name='project_update'),
 ]
\ No newline at end of file
@@ -2,11 +2,17 @@ from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import ListView, DetailView, CreateView, UpdateView
 from django.urls import reverse_lazy
-from django.db import models
+from django.conf import settings
+from django.core.paginator import InvalidPage
+from django.db.models import Prefetch
+from django.http import Http404, JsonResponse
 from .models import Project, Epic, Sprint
 from .forms import ProjectForm
 # Import Task from tasks app, not projects app
-from tasks.models import Task
+from tasks.models import Task, Label
+from tasks.pagination import KeysetPaginator
+from tasks.serializers import serialize_task
+from tasks.stats import get_project_stats
 
 class ProjectListView(LoginRequiredMixin, ListView):
     model = Project
@@ -14,9 +20,7 @@ class ProjectListView(LoginRequiredMixin, ListView):
     template_name = 'projects/project_list.html'
     
     def get_queryset(self):
-        return Project.objects.filter(
-            models.Q(owner=self.request.user) | models.Q(members=self.request.user)
-        ).distinct()
+        return Project.objects.visible_to(self.request.user).select_related('owner').with_counts()
 
 class ProjectDetailView(LoginRequiredMixin, DetailView):
     model = Project
@@ -24,9 +28,92 @@ class ProjectDetailView(LoginRequiredMixin, DetailView):
     template_name = 'projects/project_detail.html'
     
     def get_queryset(self):
-        return Project.objects.filter(
-            models.Q(owner=self.request.user) | models.Q(members=self.request.user)
-        ).distinct()
+        return Project.objects.visible_to(self.request.user).select_related(
+            'owner', 'stats'
+        ).with_counts()
+    
+    def get_tasks_page_size(self):
+        return getattr(settings, 'PROJECT_TASKS_PAGE_SIZE', 25)
+    
+    def get_status_filter(self):
+        status = self.request.GET.get('status')
+        return status if status in Task.Status.values else None
+    
+    def get_tasks_page(self):
+        """One keyset page of the project's tasks in Meta.ordering, optionally of one status."""
+        tasks = self.object.tasks.select_related('project', 'assignee', 'epic', 'sprint').prefetch_related(
+            Prefetch('labels', queryset=Label.objects.order_by('name'))
+        )
+        status = self.get_status_filter()
+        if status:
+            tasks = tasks.filter(status=status)
+        paginator = KeysetPaginator(tasks, self.get_tasks_page_size())
+        try:
+            return paginator.page(self.request.GET.get('cursor'))
+        except InvalidPage as e:
+            raise Http404(str(e))
+    
+    def get_summary(self, stats):
+        """Task counts by status, issue type and assignee.
+        
+        Status counts come from the precomputed ProjectStats row; type and
+        assignee counts from one grouped query over the project's tasks.
+        """
+        counts = self.object.tasks.count_by('issue_type', 'assignee__username')
+        by_type = counts['issue_type']
+        by_assignee = counts['assignee__username']
+        return {
+            'total': stats.task_count,
+            'status': [
+                {'value': value, 'label': label, 'count': getattr(stats, f'{value}_count')}
+                for value, label in Task.Status.choices
+            ],
+            'issue_type': [
+                {'value': value, 'label': label, 'count': by_type[value]}
+                for value, label in Task.IssueType.choices if by_type.get(value)
+            ],
+            # Busiest first, unassigned last
+            'assignee': sorted(
+                ({'username': username, 'count': count} for username, count in by_assignee.items()),
+                key=lambda row: (row['username'] is None, -row['count'], row['username'] or ''),
+            ),
+        }
+    
+    def get_page_url(self, cursor):
+        params = self.request.GET.copy()
+        params['cursor'] = cursor
+        return f'?{params.urlencode()}'
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        stats = get_project_stats(self.object)
+        page = self.get_tasks_page()
+        context['stats'] = stats
+        context['summary'] = self.get_summary(stats)
+        context['tasks'] = page
+        context['status_filter'] = self.get_status_filter()
+        if page.has_next:
+            context['next_page_url'] = self.get_page_url(page.next_cursor)
+        return context
+
+class ProjectTasksJsonView(ProjectDetailView):
+    """The project page's task list one keyset page at a time as JSON.
+    
+    The summary is only included with the first page; later pages are for
+    incremental loading and leave it out.
+    """
+    
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        page = self.get_tasks_page()
+        data = {
+            'results': [serialize_task(task) for task in page],
+            'next_cursor': page.next_cursor,
+            'has_next': page.has_next,
+        }
+        if not page.has_previous:
+            data['summary'] = self.get_summary(get_project_stats(self.object))
+        return JsonResponse(data)
 
 class ProjectCreateView(LoginRequiredMixin, CreateView):
     model = Project
@@ -49,7 +136,7 @@ class ProjectUpdateView(LoginRequiredMixin, UpdateView):
     template_name = 'projects/project_form.html'
     
     def get_queryset(self):
-        return Project.objects.filter(owner=self.request.user)
+        return Project.objects.owned_by(self.request.user)
     
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
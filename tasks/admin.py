@@ -1,5 +1,11 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.template.response import TemplateResponse
+from django.db.models import OuterRef
 from django.utils.html import format_html
+from projects.models import count_subquery
+from .bulk import bulk_update_tasks, BulkUpdateError
+from .forms import BulkUpdateForm
 from .models import Task, Comment, Attachment, Label, Component, Version
 
 class CommentInline(admin.TabularInline):
@@ -32,6 +38,9 @@ class TaskAdmin(admin.ModelAdmin):
     readonly_fields = ['key', 'created_at', 'updated_at']
     inlines = [CommentInline, AttachmentInline]
     list_per_page = 25
+    # assignee is nullable, so the admin's automatic select_related() skips it
+    list_select_related = ['project', 'assignee']
+    actions = ['bulk_update']
     
     fieldsets = (
         ('Basic Information', {
@@ -110,6 +119,28 @@ class TaskAdmin(admin.ModelAdmin):
         )
     action_buttons.short_description = 'Actions'
     
+    @admin.action(description='Bulk edit selected tasks', permissions=['change'])
+    def bulk_update(self, request, queryset):
+        form = BulkUpdateForm(request.POST if 'apply' in request.POST else None)
+        if form.is_bound and form.is_valid():
+            try:
+                result = bulk_update_tasks(form.get_changes(), queryset=queryset)
+            except BulkUpdateError as e:
+                self.message_user(request, str(e), messages.ERROR)
+                return None
+            self.message_user(request, f"Updated {len(result['updated'])} task(s).", messages.SUCCESS)
+            for failure in result['failed']:
+                self.message_user(request, f"Task {failure['id']}: {failure['error']}", messages.WARNING)
+            return None
+        return TemplateResponse(request, 'admin/tasks/task/bulk_update.html', {
+            **self.admin_site.each_context(request),
+            'title': 'Bulk edit tasks',
+            'opts': self.model._meta,
+            'form': form,
+            'tasks': queryset,
+            'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+        })
+    
     class Media:
         css = {
             'all': (
@@ -134,9 +165,15 @@ class LabelAdmin(admin.ModelAdmin):
         )
     color_display.short_description = 'Color Preview'
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            num_tasks=count_subquery(Task.labels.through.objects.filter(label=OuterRef('pk')), 'label')
+        )
+    
     def task_count(self, obj):
-        return obj.task_set.count()
+        return obj.num_tasks
     task_count.short_description = 'Tasks'
+    task_count.admin_order_field = 'num_tasks'
 
 @admin.register(Component)
 class ComponentAdmin(admin.ModelAdmin):
@@ -144,9 +181,15 @@ class ComponentAdmin(admin.ModelAdmin):
     list_filter = ['project']
     search_fields = ['name', 'project__name']
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            num_tasks=count_subquery(Task.components.through.objects.filter(component=OuterRef('pk')), 'component')
+        )
+    
     def task_count(self, obj):
-        return obj.task_set.count()
+        return obj.num_tasks
     task_count.short_description = 'Tasks'
+    task_count.admin_order_field = 'num_tasks'
 
 @admin.register(Version)
 class VersionAdmin(admin.ModelAdmin):
@@ -155,9 +198,18 @@ class VersionAdmin(admin.ModelAdmin):
     list_editable = ['is_released']
     search_fields = ['name', 'project__name']
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            num_tasks=(
+                count_subquery(Task.fix_versions.through.objects.filter(version=OuterRef('pk')), 'version')
+                + count_subquery(Task.affects_versions.through.objects.filter(version=OuterRef('pk')), 'version')
+            )
+        )
+    
     def task_count(self, obj):
-        return obj.fix_tasks.count() + obj.affects_tasks.count()
+        return obj.num_tasks
     task_count.short_description = 'Tasks'
+    task_count.admin_order_field = 'num_tasks'
 
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
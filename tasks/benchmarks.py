@@ -0,0 +1,158 @@
+"""Repeatable HTTP benchmarks for the hot views.
+
+Runs against a throwaway test database on whatever backend DATABASES points
+at (SQLite by default, PostgreSQL when POSTGRES_DB is set), seeds it with
+tasks.datagen at each requested scale and drives the views through the Django
+test client, recording latency percentiles, queries per request and
+throughput.
+"""
+import json
+import platform
+import statistics
+import time
+from datetime import datetime, timezone as dt_timezone
+
+import django
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from projects.models import Project
+from .datagen import DataGenerator, GeneratorConfig
+from .models import Task
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Endpoint:
+    def __init__(self, name, method, url, data=None):
+        self.name = name
+        self.method = method
+        self.url = url
+        self.data = data
+
+    def call(self, client, iteration):
+        data = self.data(iteration) if callable(self.data) else self.data
+        if self.method == 'post':
+            return client.post(self.url, data)
+        return client.get(self.url, data)
+
+
+class BenchmarkRunner:
+    def __init__(self, scales, requests=20, warmup=2, log=None, generator_options=None):
+        self.scales = scales
+        self.requests = requests
+        self.warmup = warmup
+        self.log = log or (lambda message: None)
+        self.generator_options = generator_options or {}
+
+    def run(self):
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            results = []
+            for scale in self.scales:
+                call_command('flush', interactive=False, verbosity=0)
+                self.seed(scale)
+                results.extend(self.run_scale(scale))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+        return {
+            'meta': {
+                'timestamp': datetime.now(dt_timezone.utc).isoformat(),
+                'database': connection.vendor,
+                'django': django.get_version(),
+                'python': platform.python_version(),
+                'requests_per_endpoint': self.requests,
+            },
+            'results': results,
+        }
+
+    def seed(self, scale):
+        started = time.perf_counter()
+        options = {'tasks': scale, 'projects': max(1, scale // 2000), 'users': max(10, scale // 500)}
+        options.update(self.generator_options)
+        DataGenerator(GeneratorConfig(**options)).run()
+        self.log(f'Seeded {scale} tasks in {time.perf_counter() - started:.1f}s')
+
+    def get_endpoints(self):
+        project = Project.objects.annotate(num_tasks=Count('tasks')).order_by('-num_tasks').first()
+        task = Task.objects.filter(project=project).order_by('id').first()
+        label = task.labels.first()
+        statuses = Task.Status.values
+        list_url = reverse('tasks:task_list')
+        return project.owner, [
+            Endpoint('task_list', 'get', list_url),
+            Endpoint('task_list_filtered', 'get', list_url, {'status': 'todo', 'priority': 'high'}),
+            Endpoint('task_list_label', 'get', list_url, {'labels': [label.pk] if label else []}),
+            Endpoint('task_list_json', 'get', reverse('tasks:task_list_json')),
+            Endpoint('kanban', 'get', reverse('tasks:task_kanban', args=[project.pk])),
+            Endpoint('search', 'get', reverse('tasks:task_search_json'), {'q': 'login'}),
+            Endpoint('task_detail', 'get', reverse('tasks:task_detail', args=[task.pk])),
+            Endpoint('update_status', 'post', reverse('tasks:update_task_status', args=[task.pk]),
+                     lambda i: {'status': statuses[i % len(statuses)]}),
+            Endpoint('log_time', 'post', reverse('tasks:log_time', args=[task.pk]), {'hours': '0.5'}),
+            Endpoint('project_list', 'get', reverse('projects:project_list')),
+            Endpoint('project_detail', 'get', reverse('projects:project_detail', args=[project.pk])),
+            Endpoint('dashboard', 'get', reverse('users:dashboard')),
+        ]
+
+    def run_scale(self, scale):
+        user, endpoints = self.get_endpoints()
+        client = Client()
+        client.force_login(user)
+        results = []
+        for endpoint in endpoints:
+            for i in range(self.warmup):
+                endpoint.call(client, i)
+            timings, queries = [], []
+            started = time.perf_counter()
+            for i in range(self.requests):
+                with CaptureQueriesContext(connection) as captured:
+                    request_started = time.perf_counter()
+                    response = endpoint.call(client, i)
+                    timings.append((time.perf_counter() - request_started) * 1000)
+                queries.append(len(captured))
+                if response.status_code >= 400:
+                    raise RuntimeError(f'{endpoint.name} returned {response.status_code}')
+            elapsed = time.perf_counter() - started
+            result = {
+                'scale': scale,
+                'endpoint': endpoint.name,
+                'p50_ms': round(percentile(timings, 0.5), 2),
+                'p95_ms': round(percentile(timings, 0.95), 2),
+                'mean_ms': round(statistics.mean(timings), 2),
+                'queries': max(queries),
+                'throughput_rps': round(self.requests / elapsed, 1),
+            }
+            results.append(result)
+            self.log(
+                f"{scale:>9} {endpoint.name:<20} p50 {result['p50_ms']:>8.1f}ms  "
+                f"p95 {result['p95_ms']:>8.1f}ms  {result['queries']:>3} queries  "
+                f"{result['throughput_rps']:>7.1f} req/s"
+            )
+        return results
+
+
+def compare(current, baseline):
+    """Yield (scale, endpoint, baseline p50, current p50, change %) rows."""
+    previous = {(row['scale'], row['endpoint']): row for row in baseline['results']}
+    for row in current['results']:
+        old = previous.get((row['scale'], row['endpoint']))
+        if old and old['p50_ms']:
+            change = (row['p50_ms'] - old['p50_ms']) / old['p50_ms'] * 100
+            yield row['scale'], row['endpoint'], old['p50_ms'], row['p50_ms'], change
+
+
+def save_results(results, path):
+    with open(path, 'w') as output:
+        json.dump(results, output, indent=2)
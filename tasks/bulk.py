@@ -0,0 +1,116 @@
+"""Bulk edits of many tasks at once.
+
+``bulk_update_tasks`` locks the tasks, checks every one individually
+(access, and that the new sprint, epic or assignee belongs to the task's
+project) and then applies the changes to all tasks that passed in a fixed
+number of statements in the same transaction: one UPDATE for the fields
+(which also bumps updated_at),
+one bulk_create for added labels and one DELETE for removed ones. The
+number of queries doesn't depend on the number of tasks.
+
+Task.save() and its signals are bypassed, so ProjectStats are rebuilt for
+the affected projects when the status changes, and status and sprint changes
+are passed to tasks.history.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from projects.access import accessible_project_ids, project_roles
+from .history import TaskState, Transition, record_transitions
+from .models import Task
+from .stats import rebuild_project_stats
+
+FIELDS = ('status', 'priority', 'assignee', 'sprint', 'epic')
+
+
+class BulkUpdateError(Exception):
+    pass
+
+
+def get_max_tasks():
+    return getattr(settings, 'BULK_UPDATE_MAX_TASKS', 1000)
+
+
+def bulk_update_tasks(changes, task_ids=None, queryset=None, user=None):
+    """Apply ``changes`` to the given tasks; returns {'updated': [...], 'failed': [...]}.
+
+    ``changes`` maps any of FIELDS to a new value (a model instance or None
+    for the relations) and may hold ``add_labels``/``remove_labels`` lists.
+    Targets are either ``task_ids`` or a ``queryset``. With a ``user`` each
+    task must be in one of their projects; without one (the admin) access is
+    assumed to be checked by the caller.
+    """
+    max_tasks = get_max_tasks()
+    if queryset is None:
+        task_ids = list(dict.fromkeys(task_ids or []))
+        if len(task_ids) > max_tasks:
+            raise BulkUpdateError(f'At most {max_tasks} tasks can be changed at once')
+        queryset = Task.objects.filter(pk__in=task_ids)
+    with transaction.atomic():
+        # Locked so the before-state behind the transitions and rollup deltas
+        # can't change before the UPDATE; in pk order so batches can't deadlock.
+        # Filtering on pks keeps DISTINCT or joins in ``queryset`` out of FOR UPDATE.
+        rows = list(
+            Task.objects.filter(pk__in=queryset.values('pk')).select_for_update().order_by('pk')
+            .values_list('pk', 'project_id', 'sprint_id', 'status', 'story_points')[:max_tasks + 1]
+        )
+        if len(rows) > max_tasks:
+            raise BulkUpdateError(f'At most {max_tasks} tasks can be changed at once')
+
+        failed = []
+        if task_ids is not None:
+            found = {row[0] for row in rows}
+            failed.extend({'id': pk, 'error': 'Task not found'} for pk in task_ids if pk not in found)
+
+        allowed_projects = accessible_project_ids(user) if user is not None else None
+        assignee = changes.get('assignee')
+        assignee_projects = project_roles(assignee) if assignee else None
+        updated, project_ids, transitions = [], set(), []
+        for pk, project_id, *state in rows:
+            error = None
+            if allowed_projects is not None and project_id not in allowed_projects:
+                error = 'Task not found'  # don't reveal tasks the user can't see
+            elif assignee_projects is not None and project_id not in assignee_projects:
+                error = f'{assignee.username} is not a member of this project'
+            else:
+                for name in ('sprint', 'epic'):
+                    value = changes.get(name)
+                    if value is not None and value.project_id != project_id:
+                        error = f'{value} belongs to another project'
+            if error:
+                failed.append({'id': pk, 'error': error})
+            else:
+                updated.append(pk)
+                project_ids.add(project_id)
+                before = after = TaskState(*state)
+                if 'sprint' in changes:
+                    after = after._replace(sprint_id=changes['sprint'].pk if changes['sprint'] else None)
+                if 'status' in changes:
+                    after = after._replace(status=changes['status'])
+                if after != before:
+                    transitions.append(Transition(pk, project_id, before, after))
+
+        if updated:
+            apply_changes(updated, changes)
+            if 'status' in changes:
+                rebuild_project_stats(project_ids)
+            if transitions:
+                record_transitions(transitions)
+    return {'updated': updated, 'failed': failed}
+
+
+def apply_changes(task_ids, changes):
+    values = {name: changes[name] for name in FIELDS if name in changes}
+    add_labels = changes.get('add_labels') or []
+    remove_labels = changes.get('remove_labels') or []
+    Labels = Task.labels.through
+    # Also for label-only changes, so updated_at reflects them
+    Task.objects.filter(pk__in=task_ids).update(updated_at=timezone.now(), **values)
+    if remove_labels:
+        Labels.objects.filter(task_id__in=task_ids, label__in=remove_labels).delete()
+    if add_labels:
+        Labels.objects.bulk_create(
+            [Labels(task_id=task_id, label=label) for task_id in task_ids for label in add_labels],
+            ignore_conflicts=True,
+        )
@@ -0,0 +1,266 @@
+"""Bulk synthetic data for load and scale testing.
+
+Everything is written with bulk_create in batches, bypassing model save()
+and signals, so a million tasks take minutes. Task keys are taken from
+TaskKeySequence in contiguous blocks per project, every batch is added to the
+search index and gets the creation entries tasks.history would have logged,
+and ProjectStats and today's sprint rollups are rebuilt at the end. Only
+today's rollup is written, so burndowns start on the day of the run.
+"""
+import math
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from projects.models import Project, Epic, Sprint
+from .history import rebuild_sprint_rollups
+from .models import Task, Comment, Label, Component, Version, TaskKeySequence, TaskStatusChange
+from .ranking import spread
+from .search import index_tasks
+from .stats import rebuild_project_stats
+
+
+WORDS = (
+    'login', 'signup', 'dashboard', 'report', 'export', 'import', 'search', 'filter',
+    'billing', 'invoice', 'payment', 'profile', 'settings', 'cache', 'api', 'webhook',
+    'email', 'notification', 'upload', 'download', 'timeout', 'crash', 'layout', 'mobile',
+    'permissions', 'audit', 'backup', 'migration', 'index', 'latency', 'sprint', 'release',
+)
+VERBS = ('Fix', 'Add', 'Improve', 'Refactor', 'Remove', 'Investigate', 'Document', 'Test')
+
+
+@dataclass
+class GeneratorConfig:
+    users: int = 50
+    projects: int = 10
+    tasks: int = 10000
+    members_per_project: int = 8
+    epics_per_project: int = 5
+    sprints_per_project: int = 6
+    components_per_project: int = 4
+    versions_per_project: int = 3
+    labels: int = 20
+    labels_per_task: float = 1.5
+    comments_per_task: float = 2.0
+    seed: int = 42
+    prefix: str = 'gen'
+    batch_size: int = 5000
+    start_date: datetime = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+
+class DataGenerator:
+    def __init__(self, config, log=None):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.log = log or (lambda message: None)
+
+    def run(self):
+        started = time.monotonic()
+        users = self.create_users()
+        projects = self.create_projects(users)
+        labels = self.create_labels()
+        task_counts = self.split_tasks(len(projects))
+        for project, count in zip(projects, task_counts):
+            self.create_project_tasks(project, count, labels)
+        rebuild_project_stats([project.pk for project in projects])
+        rebuild_sprint_rollups(sprint_id for project in projects for sprint_id in project.sprint_ids)
+        self.log(f'Done in {time.monotonic() - started:.1f}s')
+        return {'users': len(users), 'projects': len(projects), 'tasks': sum(task_counts)}
+
+    def usernames(self):
+        return [f'{self.config.prefix}user{i}' for i in range(self.config.users)]
+
+    def project_keys(self):
+        key_prefix = self.config.prefix.upper()[:4]
+        return [f'{key_prefix}{i}' for i in range(self.config.projects)]
+
+    def existing_conflicts(self):
+        """Generated usernames and project keys that are already taken."""
+        User = get_user_model()
+        return (
+            list(User.objects.filter(username__in=self.usernames()).values_list('username', flat=True))
+            + list(Project.objects.filter(key__in=self.project_keys()).values_list('key', flat=True))
+        )
+
+    def create_users(self):
+        User = get_user_model()
+        password = make_password('password')  # hashing is slow; share one hash
+        users = User.objects.bulk_create(
+            [
+                User(username=username, email=f'{username}@example.com', password=password)
+                for username in self.usernames()
+            ],
+            batch_size=self.config.batch_size,
+        )
+        self.log(f'Created {len(users)} users')
+        return users
+
+    def create_projects(self, users):
+        config = self.config
+        projects = Project.objects.bulk_create([
+            Project(
+                name=f'{config.prefix.title()} project {i}',
+                description=self.sentence(12),
+                owner=self.rng.choice(users),
+                key=key,
+            )
+            for i, key in enumerate(self.project_keys())
+        ])
+
+        Membership = Project.members.through
+        user_column = f'{Project.members.field.m2m_reverse_field_name()}_id'
+        memberships = []
+        for project in projects:
+            members = self.rng.sample(users, min(config.members_per_project, len(users)))
+            if project.owner not in members:
+                members.append(project.owner)
+            memberships.extend(Membership(project_id=project.pk, **{user_column: user.pk}) for user in members)
+            project.member_ids = [user.pk for user in members]
+        Membership.objects.bulk_create(memberships, batch_size=config.batch_size)
+
+        for project in projects:
+            project.epic_ids = []
+            project.sprint_ids = []
+            project.component_ids = []
+            project.version_ids = []
+        epics = Epic.objects.bulk_create([
+            Epic(name=f'Epic {i}', project=project, description=self.sentence(8))
+            for project in projects for i in range(config.epics_per_project)
+        ], batch_size=config.batch_size)
+        sprints = Sprint.objects.bulk_create([
+            Sprint(
+                name=f'Sprint {i}', project=project,
+                start_date=(config.start_date + timedelta(days=14 * i)).date(),
+                end_date=(config.start_date + timedelta(days=14 * i + 13)).date(),
+            )
+            for project in projects for i in range(config.sprints_per_project)
+        ], batch_size=config.batch_size)
+        components = Component.objects.bulk_create([
+            Component(name=f'Component {i}', project=project)
+            for project in projects for i in range(config.components_per_project)
+        ], batch_size=config.batch_size)
+        versions = Version.objects.bulk_create([
+            Version(name=f'{i + 1}.0', project=project)
+            for project in projects for i in range(config.versions_per_project)
+        ], batch_size=config.batch_size)
+        by_pk = {project.pk: project for project in projects}
+        for attribute, objects in (('epic_ids', epics), ('sprint_ids', sprints),
+                                   ('component_ids', components), ('version_ids', versions)):
+            for obj in objects:
+                getattr(by_pk[obj.project_id], attribute).append(obj.pk)
+
+        self.log(f'Created {len(projects)} projects with members, epics, sprints, components and versions')
+        return projects
+
+    def create_labels(self):
+        labels = Label.objects.bulk_create([
+            Label(name=f'{self.config.prefix}-{word}'[:50])
+            for word in self.rng.sample(WORDS, min(self.config.labels, len(WORDS)))
+        ])
+        return [label.pk for label in labels]
+
+    def split_tasks(self, project_count):
+        # Skewed like real trackers: a few large projects and a long tail
+        weights = [1 / (rank + 1) for rank in range(project_count)]
+        total = sum(weights)
+        counts = [int(self.config.tasks * weight / total) for weight in weights]
+        counts[0] += self.config.tasks - sum(counts)
+        return counts
+
+    def create_project_tasks(self, project, count, labels):
+        config = self.config
+        if not count:
+            return
+        first_number = TaskKeySequence.allocate(project, count)
+        # Project-wide ranks in key order; every column is then in key order too
+        ranks = spread(count)
+        statuses = Task.Status.values
+        priorities = Task.Priority.values
+        issue_types = Task.IssueType.values
+        for start in range(0, count, config.batch_size):
+            size = min(config.batch_size, count - start)
+            with transaction.atomic():
+                tasks = Task.objects.bulk_create([
+                    Task(
+                        title=f'{self.rng.choice(VERBS)} {self.sentence(4)}',
+                        description=self.sentence(30),
+                        project_id=project.pk,
+                        key=f'{project.key}-{first_number + start + i}',
+                        rank=ranks[start + i],
+                        assignee_id=self.rng.choice(project.member_ids) if self.rng.random() < 0.85 else None,
+                        epic_id=self.rng.choice(project.epic_ids) if project.epic_ids and self.rng.random() < 0.6 else None,
+                        sprint_id=self.rng.choice(project.sprint_ids) if project.sprint_ids and self.rng.random() < 0.7 else None,
+                        status=self.rng.choice(statuses),
+                        priority=self.rng.choice(priorities),
+                        issue_type=self.rng.choice(issue_types),
+                        story_points=self.rng.choice((None, 1, 2, 3, 5, 8, 13)),
+                        time_logged=timedelta(minutes=30 * self.rng.randint(0, 16)),
+                        due_date=config.start_date + timedelta(days=self.rng.randint(0, 365))
+                        if self.rng.random() < 0.7 else None,
+                    )
+                    for i in range(size)
+                ])
+                self.create_task_relations(project, tasks, labels)
+                self.create_task_history(tasks)
+                index_tasks([task.pk for task in tasks])
+            self.log(f'{project.key}: {start + size}/{count} tasks')
+
+    def create_task_relations(self, project, tasks, labels):
+        config = self.config
+        through = {
+            'labels': (Task.labels.through, 'label_id', labels),
+            'components': (Task.components.through, 'component_id', project.component_ids),
+            'fix_versions': (Task.fix_versions.through, 'version_id', project.version_ids),
+            'affects_versions': (Task.affects_versions.through, 'version_id', project.version_ids),
+        }
+        for name, (model, column, choices) in through.items():
+            if not choices:
+                continue
+            average = config.labels_per_task if name == 'labels' else 0.5
+            rows = []
+            for task in tasks:
+                picks = self.rng.sample(choices, min(self.poisson(average), len(choices)))
+                rows.extend(model(task_id=task.pk, **{column: pk}) for pk in picks)
+            model.objects.bulk_create(rows, batch_size=config.batch_size)
+
+        comments = []
+        for task in tasks:
+            for _ in range(self.poisson(config.comments_per_task)):
+                comments.append(Comment(
+                    task_id=task.pk,
+                    author_id=self.rng.choice(project.member_ids),
+                    content=self.sentence(20),
+                ))
+        Comment.objects.bulk_create(comments, batch_size=config.batch_size)
+
+    def create_task_history(self, tasks):
+        # The entry record_transitions logs for a created task; the rollup
+        # deltas are skipped since the rollups are rebuilt at the end
+        TaskStatusChange.objects.bulk_create([
+            TaskStatusChange(
+                task_id=task.pk,
+                project_id=task.project_id,
+                sprint_id=task.sprint_id,
+                from_status='',
+                to_status=task.status,
+                story_points=task.story_points,
+                changed_at=task.created_at,
+            )
+            for task in tasks
+        ], batch_size=self.config.batch_size)
+
+    def sentence(self, words):
+        return ' '.join(self.rng.choice(WORDS) for _ in range(words))
+
+    def poisson(self, average):
+        # Knuth's method; averages here are small
+        limit, count, product = math.exp(-average), 0, self.rng.random()
+        while product > limit:
+            count += 1
+            product *= self.rng.random()
+        return count
@@ -0,0 +1,105 @@
+"""Streaming task exports as CSV or JSON Lines.
+
+Tasks are read with ``iterator(chunk_size=...)``: one chunk of rows is in
+memory at a time, the many-to-many relations are prefetched per chunk (one
+query per relation) and every row is turned into a line as soon as it is
+read, so memory stays flat however many tasks are exported. On PostgreSQL
+the iterator uses a server-side cursor.
+"""
+import csv
+import json
+
+from django.conf import settings
+
+COLUMNS = (
+    'id', 'key', 'title', 'project', 'status', 'priority', 'issue_type',
+    'assignee', 'epic', 'sprint', 'story_points', 'labels', 'components',
+    'fix_versions', 'affects_versions', 'time_estimate_hours',
+    'time_logged_hours', 'due_date', 'created_at', 'updated_at',
+)
+
+FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'jsonl': ('application/x-ndjson', 'jsonl'),
+}
+
+# Separator for many-to-many names in a CSV cell
+CSV_LIST_SEPARATOR = '; '
+
+
+def get_chunk_size():
+    return getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+
+
+def export_queryset(queryset, ordering=None):
+    return (
+        queryset
+        .select_related('project', 'assignee', 'epic', 'sprint')
+        .prefetch_related('labels', 'components', 'fix_versions', 'affects_versions')
+        .order_by(*(ordering or ['pk']))
+    )
+
+
+def _hours(duration):
+    return round(duration.total_seconds() / 3600, 2) if duration is not None else None
+
+
+def _names(related):
+    # Prefetched: .all() reads the cache, sorting in SQL would query again
+    return sorted(str(obj.name) for obj in related.all())
+
+
+def export_row(task):
+    return {
+        'id': task.pk,
+        'key': task.key,
+        'title': task.title,
+        'project': task.project.key,
+        'status': task.status,
+        'priority': task.priority,
+        'issue_type': task.issue_type,
+        'assignee': task.assignee.username if task.assignee else None,
+        'epic': task.epic.name if task.epic else None,
+        'sprint': task.sprint.name if task.sprint else None,
+        'story_points': task.story_points,
+        'labels': _names(task.labels),
+        'components': _names(task.components),
+        'fix_versions': _names(task.fix_versions),
+        'affects_versions': _names(task.affects_versions),
+        'time_estimate_hours': _hours(task.time_estimate),
+        'time_logged_hours': _hours(task.time_logged),
+        'due_date': task.due_date.isoformat() if task.due_date else None,
+        'created_at': task.created_at.isoformat(),
+        'updated_at': task.updated_at.isoformat(),
+    }
+
+
+class _Line:
+    """File-like object whose write() hands back what csv.writer wrote."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    writer = csv.writer(_Line())
+    yield writer.writerow(COLUMNS)
+    for row in rows:
+        yield writer.writerow([
+            CSV_LIST_SEPARATOR.join(value) if isinstance(value, list) else ('' if value is None else value)
+            for value in (row[column] for column in COLUMNS)
+        ])
+
+
+def jsonl_lines(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+def export_tasks(queryset, format='csv', chunk_size=None, ordering=None):
+    """Yield the export of ``queryset`` line by line in ``format``."""
+    if format not in FORMATS:
+        raise ValueError(f'Unknown export format: {format}')
+    tasks = export_queryset(queryset, ordering).iterator(chunk_size=chunk_size or get_chunk_size())
+    rows = (export_row(task) for task in tasks)
+    return csv_lines(rows) if format == 'csv' else jsonl_lines(rows)
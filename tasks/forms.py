@@ -1,7 +1,23 @@
 from django import forms
+from . import jql
 from .models import Task, Comment, Label, Component, Version
 from projects.models import Project, Epic, Sprint  # Add this import
+from projects.access import accessible_project_ids
 from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import models
+def shared_users(user):
+    """Everyone who owns or is a member of one of the user's projects."""
+    project_ids = accessible_project_ids(user)
+    Membership = Project.members.through
+    member_ids = Membership.objects.filter(project_id__in=project_ids).values(
+        Project.members.field.m2m_reverse_field_name()
+    )
+    owner_ids = Project.objects.filter(pk__in=project_ids).order_by().values('owner')
+    return get_user_model().objects.filter(
+        models.Q(pk__in=member_ids) | models.Q(pk__in=owner_ids)
+    )
+
 class TaskForm(forms.ModelForm):
     class Meta:
         model = Task
@@ -29,6 +45,7 @@ class TaskForm(forms.ModelForm):
     
     def __init__(self, *args, **kwargs):
         self.project = kwargs.pop('project', None)
+        self.user = kwargs.pop('user', None)
         super().__init__(*args, **kwargs)
         if self.project:
             self.fields['assignee'].queryset = self.project.members.all()
@@ -37,6 +54,14 @@ class TaskForm(forms.ModelForm):
             self.fields['components'].queryset = Component.objects.filter(project=self.project)
             self.fields['fix_versions'].queryset = Version.objects.filter(project=self.project)
             self.fields['affects_versions'].queryset = Version.objects.filter(project=self.project)
+        elif self.user:
+            # No project yet: offer only what belongs to the user's projects
+            project_ids = accessible_project_ids(self.user)
+            self.fields['epic'].queryset = Epic.objects.filter(project_id__in=project_ids)
+            self.fields['sprint'].queryset = Sprint.objects.filter(project_id__in=project_ids)
+            self.fields['components'].queryset = Component.objects.filter(project_id__in=project_ids)
+            self.fields['fix_versions'].queryset = Version.objects.filter(project_id__in=project_ids)
+            self.fields['affects_versions'].queryset = Version.objects.filter(project_id__in=project_ids)
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -71,9 +96,75 @@ class TaskFilterForm(forms.Form):
     issue_type = forms.ChoiceField(choices=ISSUE_TYPE_CHOICES, required=False, widget=forms.Select(attrs={'class': 'form-control'}))
     assignee = forms.ModelChoiceField(queryset=None, required=False, widget=forms.Select(attrs={'class': 'form-control'}))
     labels = forms.ModelMultipleChoiceField(queryset=Label.objects.all(), required=False, widget=forms.SelectMultiple(attrs={'class': 'form-control'}))
+    jql = forms.CharField(required=False, max_length=jql.MAX_QUERY_LENGTH, widget=forms.TextInput(attrs={
+        'class': 'form-control',
+        'placeholder': 'project = MP AND status IN (todo, in_progress) ORDER BY priority DESC',
+    }))
+    
+    def clean_jql(self):
+        query = self.cleaned_data['jql'].strip()
+        if not query:
+            return None
+        try:
+            return jql.parse(query)
+        except jql.JQLError as e:
+            raise forms.ValidationError(str(e))
     
     def __init__(self, *args, **kwargs):
         project = kwargs.pop('project', None)
+        user = kwargs.pop('user', None)
         super().__init__(*args, **kwargs)
         if project:
-            self.fields['assignee'].queryset = project.members.all()
\ No newline at end of file
+            self.fields['assignee'].queryset = project.members.all()
+        elif user:
+            self.fields['assignee'].queryset = shared_users(user)
+        else:
+            self.fields['assignee'].queryset = get_user_model().objects.none()
+
+class BulkUpdateForm(forms.Form):
+    """Changes to apply to many tasks at once; empty fields stay unchanged."""
+    status = forms.ChoiceField(choices=[('', 'No change'), *Task.Status.choices], required=False, widget=forms.Select(attrs={'class': 'form-control'}))
+    priority = forms.ChoiceField(choices=[('', 'No change'), *Task.Priority.choices], required=False, widget=forms.Select(attrs={'class': 'form-control'}))
+    assignee = forms.ModelChoiceField(queryset=get_user_model().objects.all(), required=False, widget=forms.Select(attrs={'class': 'form-control'}))
+    unassign = forms.BooleanField(required=False)
+    sprint = forms.ModelChoiceField(queryset=Sprint.objects.select_related('project'), required=False, widget=forms.Select(attrs={'class': 'form-control'}))
+    clear_sprint = forms.BooleanField(required=False)
+    epic = forms.ModelChoiceField(queryset=Epic.objects.select_related('project'), required=False, widget=forms.Select(attrs={'class': 'form-control'}))
+    clear_epic = forms.BooleanField(required=False)
+    add_labels = forms.ModelMultipleChoiceField(queryset=Label.objects.all(), required=False, widget=forms.SelectMultiple(attrs={'class': 'form-control'}))
+    remove_labels = forms.ModelMultipleChoiceField(queryset=Label.objects.all(), required=False, widget=forms.SelectMultiple(attrs={'class': 'form-control'}))
+    
+    # (value field, "set to empty" flag) pairs for the nullable relations
+    CLEARABLE = (('assignee', 'unassign'), ('sprint', 'clear_sprint'), ('epic', 'clear_epic'))
+    
+    def __init__(self, *args, **kwargs):
+        user = kwargs.pop('user', None)
+        super().__init__(*args, **kwargs)
+        if user:
+            project_ids = accessible_project_ids(user)
+            self.fields['assignee'].queryset = shared_users(user)
+            self.fields['sprint'].queryset = Sprint.objects.filter(project_id__in=project_ids)
+            self.fields['epic'].queryset = Epic.objects.filter(project_id__in=project_ids)
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        for field, flag in self.CLEARABLE:
+            if cleaned_data.get(field) and cleaned_data.get(flag):
+                raise forms.ValidationError(f'Choose either a {field} or {flag.replace("_", " ")}, not both.')
+        if not self.get_changes():
+            raise forms.ValidationError('Nothing to change.')
+        return cleaned_data
+    
+    def get_changes(self):
+        """The requested changes in the form bulk.bulk_update_tasks expects."""
+        data = self.cleaned_data
+        changes = {name: data[name] for name in ('status', 'priority') if data.get(name)}
+        for field, flag in self.CLEARABLE:
+            if data.get(field):
+                changes[field] = data[field]
+            elif data.get(flag):
+                changes[field] = None
+        for name in ('add_labels', 'remove_labels'):
+            if data.get(name):
+                changes[name] = list(data[name])
+        return changes
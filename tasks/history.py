@@ -0,0 +1,241 @@
+"""Status-transition log and per-sprint daily rollups.
+
+Every status transition appends a TaskStatusChange row. Each change of a
+sprint's scope or remaining work (status, story points or sprint membership)
+is applied as a delta to the sprint's SprintDailyRollup row for today, in
+the same way tasks.stats maintains ProjectStats. Burndown and velocity
+reports then read at most one row per sprint day instead of the task history.
+
+Task saves and deletes are recorded by tasks.signals. Paths that bypass model
+signals (queryset.update(), bulk_update) must call ``record_transitions`` with
+the before and after state of the tasks they changed.
+
+Deletes never write rollup rows inside the deleting transaction: when a
+sprint (or its project) is deleted, the cascade may remove its rollups before
+its tasks, and a row recreated for the sprint fails its foreign key at
+commit. Deletes update today's row if there is one; otherwise the rollups of
+the sprints that still exist are rebuilt once the delete has committed.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from typing import NamedTuple, Optional
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from projects.models import Sprint
+from .models import Task, TaskStatusChange, SprintDailyRollup
+
+REPORTED_FIELDS = ('total_points', 'remaining_points', 'completed_points', 'total_tasks', 'remaining_tasks')
+
+
+class TaskState(NamedTuple):
+    sprint_id: Optional[int]
+    status: str
+    story_points: Optional[int]
+
+
+class Transition(NamedTuple):
+    task_id: int
+    project_id: int
+    before: Optional[TaskState]  # None: created
+    after: Optional[TaskState]   # None: deleted
+
+
+def task_state(task):
+    return TaskState(task.sprint_id, task.status, task.story_points)
+
+
+def sprint_contribution(state):
+    """What a task in ``state`` adds to its sprint's rollup."""
+    points = state.story_points or 0
+    remaining = state.status != Task.Status.DONE
+    return {
+        'total_points': points,
+        'remaining_points': points if remaining else 0,
+        'total_tasks': 1,
+        'remaining_tasks': 1 if remaining else 0,
+    }
+
+
+def record_transitions(transitions, create=True):
+    """Log the status changes among ``transitions`` and update today's rollups.
+    
+    With ``create=False`` missing rollup rows are left to ``rebuild_after_commit``.
+    """
+    now = timezone.now()
+    TaskStatusChange.objects.bulk_create([
+        TaskStatusChange(
+            task_id=change.task_id,
+            project_id=change.project_id,
+            sprint_id=change.after.sprint_id,
+            from_status=change.before.status if change.before else '',
+            to_status=change.after.status,
+            story_points=change.after.story_points,
+            changed_at=now,
+        )
+        for change in transitions
+        if change.after and (change.before is None or change.before.status != change.after.status)
+    ])
+
+    deltas = defaultdict(lambda: defaultdict(int))
+    for change in transitions:
+        for state, sign in ((change.before, -1), (change.after, 1)):
+            if state is not None and state.sprint_id:
+                for field, value in sprint_contribution(state).items():
+                    deltas[state.sprint_id][field] += sign * value
+    today = timezone.localdate(now)
+    for sprint_id, delta in deltas.items():
+        apply_delta(sprint_id, today, delta, create)
+
+
+def apply_delta(sprint_id, date, delta, create=True):
+    delta = {field: value for field, value in delta.items() if value}
+    if not delta:
+        return
+    updated = SprintDailyRollup.objects.filter(sprint_id=sprint_id, date=date).update(
+        updated_at=timezone.now(),
+        **{field: F(field) + value for field, value in delta.items()}
+    )
+    if not updated:
+        # First change of the day: take today's row from the tasks table,
+        # which already reflects this change
+        if create:
+            rebuild_sprint_rollups([sprint_id], date)
+        else:
+            rebuild_after_commit([sprint_id], date)
+
+
+def rebuild_after_commit(sprint_ids, date=None):
+    """Rebuild the rollups of those of ``sprint_ids`` that still exist after commit."""
+    sprint_ids = [sprint_id for sprint_id in sprint_ids if sprint_id]
+    if not sprint_ids:
+        return
+    date = date or timezone.localdate()
+    transaction.on_commit(lambda: rebuild_sprint_rollups(
+        Sprint.objects.filter(pk__in=sprint_ids).values_list('pk', flat=True), date
+    ))
+
+
+def record_task_saved(task, created):
+    previous = getattr(task, '_loaded_values', None)
+    if created:
+        before = None
+    elif previous is None or set(previous) != set(Task.TRACKED_FIELDS):
+        # Unknown prior state (e.g. deferred fields): nothing to log, recount
+        rebuild_sprint_rollups([task.sprint_id] if task.sprint_id else [])
+        return
+    else:
+        before = TaskState(previous['sprint_id'], previous['status'], previous['story_points'])
+    after = task_state(task)
+    if before != after:
+        record_transitions([Transition(task.pk, task.project_id, before, after)])
+
+
+def record_task_deleted(task):
+    previous = getattr(task, '_loaded_values', None)
+    if previous is None or set(previous) != set(Task.TRACKED_FIELDS):
+        rebuild_after_commit([task.sprint_id])
+        return
+    before = TaskState(previous['sprint_id'], previous['status'], previous['story_points'])
+    record_transitions([Transition(task.pk, task.project_id, before, None)], create=False)
+
+
+def rebuild_sprint_rollups(sprint_ids, date=None, batch_size=500):
+    """Write the given sprints' rollups for ``date`` (today) from the tasks table."""
+    date = date or timezone.localdate()
+    sprint_ids = list(sprint_ids)
+    not_done = ~Q(status=Task.Status.DONE)
+    aggregates = {
+        'total_points': Sum('story_points'),
+        'remaining_points': Sum('story_points', filter=not_done),
+        'total_tasks': Count('pk'),
+        'remaining_tasks': Count('pk', filter=not_done),
+    }
+    for start in range(0, len(sprint_ids), batch_size):
+        batch = sprint_ids[start:start + batch_size]
+        rows = {
+            row.pop('sprint_id'): row
+            for row in Task.objects.filter(sprint_id__in=batch).order_by()
+            .values('sprint_id').annotate(**aggregates)
+        }
+        SprintDailyRollup.objects.bulk_create(
+            [
+                SprintDailyRollup(
+                    sprint_id=sprint_id, date=date,
+                    **{field: rows.get(sprint_id, {}).get(field) or 0 for field in aggregates},
+                )
+                for sprint_id in batch
+            ],
+            update_conflicts=True,
+            unique_fields=['sprint', 'date'],
+            update_fields=list(aggregates) + ['updated_at'],
+        )
+
+
+def sprint_days(sprint, rollups, today=None):
+    """One entry per sprint day up to today, carrying values across days without a row."""
+    today = today or timezone.localdate()
+    last_day = min(sprint.end_date, today)
+    rollups = iter(rollups)
+    rollup, current = next(rollups, None), None
+    days = []
+    day = sprint.start_date
+    while day <= last_day:
+        # Rows before the sprint started describe its scope on day one
+        while rollup is not None and rollup.date <= day:
+            current, rollup = rollup, next(rollups, None)
+        days.append((day, current))
+        day += timedelta(days=1)
+    return days
+
+
+def burndown(sprint, today=None):
+    """Daily remaining points and tasks of ``sprint`` with an ideal line."""
+    rollups = SprintDailyRollup.objects.filter(sprint=sprint, date__lte=sprint.end_date).order_by('date')
+    days = sprint_days(sprint, rollups, today)
+    scope = next((rollup.total_points for _, rollup in days if rollup is not None), 0)
+    duration = max(sprint.duration_days - 1, 1)
+    return {
+        'sprint': {
+            'id': sprint.pk,
+            'name': sprint.name,
+            'start_date': sprint.start_date,
+            'end_date': sprint.end_date,
+        },
+        'days': [
+            {
+                'date': day,
+                'ideal_points': round(scope * (1 - index / duration), 2),
+                **{field: getattr(rollup, field) if rollup else None for field in REPORTED_FIELDS},
+            }
+            for index, (day, rollup) in enumerate(days)
+        ],
+    }
+
+
+def velocity(sprints, today=None):
+    """Committed and completed points of each sprint, from its first and last rollup."""
+    sprints = list(sprints)
+    by_sprint = defaultdict(list)
+    rollups = SprintDailyRollup.objects.filter(sprint__in=sprints).order_by('sprint', 'date')
+    for rollup in rollups:
+        by_sprint[rollup.sprint_id].append(rollup)
+    results = []
+    for sprint in sprints:
+        days = [rollup for _, rollup in sprint_days(sprint, by_sprint[sprint.pk], today) if rollup is not None]
+        results.append({
+            'id': sprint.pk,
+            'name': sprint.name,
+            'start_date': sprint.start_date,
+            'end_date': sprint.end_date,
+            'is_completed': sprint.is_completed,
+            'committed_points': days[0].total_points if days else None,
+            'completed_points': days[-1].completed_points if days else None,
+        })
+    completed = [row['completed_points'] for row in results if row['is_completed'] and row['completed_points'] is not None]
+    return {
+        'sprints': results,
+        'average_velocity': round(sum(completed) / len(completed), 2) if completed else None,
+    }
@@ -0,0 +1,344 @@
+"""Bulk task import from CSV or JSON Lines.
+
+Reads the columns written by tasks.export (``id``, ``key`` and the
+timestamps are ignored; every imported task gets a new key). Only ``title``
+and ``project`` (a project key) are required. Assignees are usernames; the
+epic, sprint, components and versions are names within the task's project.
+Missing labels are created.
+
+The input is streamed and handled ``batch_size`` rows at a time. Each batch
+is validated against in-memory lookup maps, loaded once per project, and
+then written in one transaction:
+
+* a contiguous block of task keys per project from TaskKeySequence,
+* one bulk_create for the tasks and one per many-to-many through table,
+* search index rows, status log and sprint rollups, and ProjectStats deltas.
+
+A checkpoint (the last input line of the last committed batch) is reported
+after every batch, so a failed import can resume where it stopped without
+creating any task twice.
+"""
+import csv
+import json
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from projects.access import project_role
+from projects.models import Project, Epic, Sprint
+from .export import CSV_LIST_SEPARATOR
+from .history import Transition, record_transitions, task_state
+from .models import Task, Label, Component, Version, TaskKeySequence
+from .ranking import between
+from .search import index_tasks
+from .stats import record_tasks_created
+
+FORMATS = ('csv', 'jsonl')
+
+# Many-to-many columns: (Task field, model, looked up per project)
+RELATIONS = {
+    'labels': (Label, False),
+    'components': (Component, True),
+    'fix_versions': (Version, True),
+    'affects_versions': (Version, True),
+}
+
+# Errors kept in the result; the count covers all of them
+MAX_REPORTED_ERRORS = 100
+
+# Upper bound for time estimates and time logged (about 11 years)
+MAX_HOURS = 100000
+
+
+class TaskImportError(ValueError):
+    pass
+
+
+def get_batch_size():
+    return getattr(settings, 'IMPORT_BATCH_SIZE', 1000)
+
+
+def read_rows(lines, format):
+    """Yield (line number, row dict) from an iterable of text lines."""
+    if format == 'csv':
+        reader = csv.DictReader(lines)
+        for row in reader:
+            yield reader.line_num, row
+    elif format == 'jsonl':
+        for line_number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield line_number, row if isinstance(row, dict) else {'__invalid__': True}
+    else:
+        raise TaskImportError(f'Unknown import format: {format}')
+
+
+def _names(value):
+    if value in (None, ''):
+        return []
+    if isinstance(value, list):
+        return [str(name).strip() for name in value if str(name).strip()]
+    return [name.strip() for name in str(value).split(CSV_LIST_SEPARATOR.strip()) if name.strip()]
+
+
+def _text(row, column):
+    value = row.get(column)
+    return '' if value is None else str(value).strip()
+
+
+def _hours(value):
+    if value in (None, ''):
+        return None
+    try:
+        hours = Decimal(str(value))
+        # NaN and infinities fail the comparison or the float conversion
+        if hours.is_finite() and 0 <= hours <= MAX_HOURS:
+            return timedelta(seconds=round(float(hours) * 3600))
+    except (ArithmeticError, ValueError):
+        pass
+    raise TaskImportError(f'Invalid number of hours: {value}')
+
+
+def _due_date(value):
+    if value in (None, ''):
+        return None
+    value = str(value)
+    try:
+        # Both return None for malformed input but raise on impossible dates
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            if day is None:
+                raise TaskImportError(f'Invalid due date: {value}')
+            moment = datetime.combine(day, time())
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+    except (ValueError, OverflowError):
+        raise TaskImportError(f'Invalid due date: {value}')
+    return moment
+
+
+def _choice(row, column, choices, default):
+    value = _text(row, column) or default
+    if value not in choices.values:
+        raise TaskImportError(f'Invalid {column.replace("_", " ")}: {value}')
+    return value
+
+
+class ProjectLookups:
+    """Name -> id maps for one project, loaded with one query each."""
+
+    def __init__(self, project):
+        self.project = project
+        members = Project.members.through.objects.filter(project=project)
+        user_field = Project.members.field.m2m_reverse_field_name()
+        self.users = dict(members.values_list(f'{user_field}__username', f'{user_field}_id'))
+        self.users[project.owner.username] = project.owner_id
+        # Lowest id wins where names repeat
+        self.epics = self.by_name(Epic.objects.filter(project=project))
+        self.sprints = self.by_name(Sprint.objects.filter(project=project))
+        self.components = self.by_name(Component.objects.filter(project=project))
+        self.versions = self.by_name(Version.objects.filter(project=project))
+
+    @staticmethod
+    def by_name(queryset):
+        names = {}
+        for pk, name in queryset.order_by('-pk').values_list('pk', 'name'):
+            names[name] = pk
+        return names
+
+    def related(self, model):
+        return self.components if model is Component else self.versions
+
+
+class TaskImporter:
+    """Import tasks from rows; see the module docstring.
+
+    With a ``user`` every project must be one they can access; without one
+    (the management command) access is not checked. ``start_after`` skips
+    input lines up to and including that line number, to resume from a
+    checkpoint. ``on_checkpoint(line)`` is called after every committed
+    batch.
+    """
+
+    def __init__(self, user=None, dry_run=False, batch_size=None, start_after=0,
+                 default_project=None, on_checkpoint=None):
+        self.user = user
+        self.dry_run = dry_run
+        self.batch_size = batch_size or get_batch_size()
+        self.start_after = start_after
+        self.default_project = default_project
+        self.on_checkpoint = on_checkpoint
+        self.projects = {}       # key -> ProjectLookups, or None if unusable
+        self.labels = {}         # name -> id
+        self.last_ranks = {}     # (project id, status) -> rank of the column's last card
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+        self.last_line = start_after
+
+    def run(self, rows):
+        batch = []
+        for line_number, row in rows:
+            if line_number <= self.start_after:
+                continue
+            batch.append((line_number, row))
+            if len(batch) >= self.batch_size:
+                self.import_batch(batch)
+                batch = []
+        if batch:
+            self.import_batch(batch)
+        return self.result()
+
+    def result(self):
+        return {
+            'created': self.created,
+            'failed': self.failed,
+            'errors': self.errors,
+            'last_line': self.last_line,
+            'dry_run': self.dry_run,
+        }
+
+    def error(self, line_number, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line_number, 'error': message})
+
+    def import_batch(self, batch):
+        self.load_projects(row.get('project') or self.default_project for _, row in batch)
+        self.load_labels(name for _, row in batch for name in _names(row.get('labels')))
+        tasks, relations = [], []
+        for line_number, row in batch:
+            try:
+                task, related = self.build_task(row)
+            except TaskImportError as e:
+                self.error(line_number, str(e))
+                continue
+            tasks.append(task)
+            relations.append(related)
+        if tasks and not self.dry_run:
+            self.write(tasks, relations)
+        self.created += len(tasks)
+        self.last_line = batch[-1][0]
+        if self.on_checkpoint and not self.dry_run:
+            self.on_checkpoint(self.last_line)
+
+    def load_projects(self, keys):
+        missing = {str(key).strip() for key in keys if key} - set(self.projects)
+        if not missing:
+            return
+        projects = Project.objects.filter(key__in=missing).select_related('owner')
+        for project in projects:
+            if self.user is not None and project_role(self.user, project.pk) is None:
+                self.projects[project.key] = None
+            else:
+                self.projects[project.key] = ProjectLookups(project)
+        for key in missing - set(self.projects):
+            self.projects[key] = None
+
+    def load_labels(self, names):
+        missing = set(names) - set(self.labels)
+        if not missing:
+            return
+        self.labels.update(Label.objects.filter(name__in=missing).values_list('name', 'pk'))
+        max_length = Label._meta.get_field('name').max_length
+        new = {name for name in missing - set(self.labels) if len(name) <= max_length}
+        if new and not self.dry_run:
+            Label.objects.bulk_create([Label(name=name) for name in new], ignore_conflicts=True)
+            self.labels.update(Label.objects.filter(name__in=new).values_list('name', 'pk'))
+        for name in new - set(self.labels):
+            self.labels[name] = None  # created on a real run
+
+    def build_task(self, row):
+        if row.get('__invalid__'):
+            raise TaskImportError('Not a JSON object')
+        title = _text(row, 'title')
+        if not title:
+            raise TaskImportError('Title is required')
+        if len(title) > Task._meta.get_field('title').max_length:
+            raise TaskImportError('Title is too long')
+        project_key = _text(row, 'project') or self.default_project
+        lookups = self.projects.get(project_key) if project_key else None
+        if lookups is None:
+            raise TaskImportError(f'Unknown project: {project_key}' if project_key else 'Project is required')
+
+        task = Task(
+            project=lookups.project,
+            title=title,
+            description=_text(row, 'description'),
+            status=_choice(row, 'status', Task.Status, Task.Status.BACKLOG),
+            priority=_choice(row, 'priority', Task.Priority, Task.Priority.MEDIUM),
+            issue_type=_choice(row, 'issue_type', Task.IssueType, Task.IssueType.TASK),
+            time_estimate=_hours(row.get('time_estimate_hours')),
+            time_logged=_hours(row.get('time_logged_hours')) or timedelta(),
+            due_date=_due_date(row.get('due_date')),
+        )
+        story_points = row.get('story_points')
+        if story_points not in (None, ''):
+            try:
+                task.story_points = int(story_points)
+            except (TypeError, ValueError, OverflowError):
+                raise TaskImportError(f'Invalid story points: {story_points}')
+            if not 0 <= task.story_points <= 32767:
+                raise TaskImportError(f'Invalid story points: {story_points}')
+        for column, names in (('assignee', lookups.users), ('epic', lookups.epics), ('sprint', lookups.sprints)):
+            value = _text(row, column)
+            if value:
+                if value not in names:
+                    raise TaskImportError(f'Unknown {column} in {project_key}: {value}')
+                setattr(task, f'{column}_id', names[value])
+
+        related = {}
+        for field, (model, per_project) in RELATIONS.items():
+            names = _names(row.get(field))
+            if not names:
+                continue
+            ids = lookups.related(model) if per_project else self.labels
+            unknown = [name for name in names if name not in ids]
+            if unknown:
+                raise TaskImportError(f'Unknown {field.replace("_", " ")}: {", ".join(unknown)}')
+            related[field] = {ids[name] for name in names}
+        return task, related
+
+    def write(self, tasks, relations):
+        by_project = defaultdict(list)
+        for task in tasks:
+            by_project[task.project].append(task)
+        with transaction.atomic():
+            for project, project_tasks in by_project.items():
+                first_number = TaskKeySequence.allocate(project, len(project_tasks))
+                for offset, task in enumerate(project_tasks):
+                    task.key = f'{project.key}-{first_number + offset}'
+                    task.rank = self.next_rank(project.pk, task.status)
+            # Assigning keys and ranks up front keeps save() out of bulk_create
+            Task.objects.bulk_create(tasks, batch_size=self.batch_size)
+            for field in RELATIONS:
+                through = getattr(Task, field).through
+                source = getattr(Task, field).field.m2m_field_name()
+                target = getattr(Task, field).field.m2m_reverse_field_name()
+                through.objects.bulk_create([
+                    through(**{f'{source}_id': task.pk, f'{target}_id': related_id})
+                    for task, related in zip(tasks, relations)
+                    for related_id in related.get(field, ())
+                ], batch_size=self.batch_size)
+            index_tasks([task.pk for task in tasks])
+            record_transitions([Transition(task.pk, task.project_id, None, task_state(task)) for task in tasks])
+            record_tasks_created(tasks)
+
+    def next_rank(self, project_id, status):
+        column = (project_id, status)
+        if column not in self.last_ranks:
+            self.last_ranks[column] = Task.objects.filter(
+                project_id=project_id, status=status
+            ).order_by('-rank').values_list('rank', flat=True).first()
+        self.last_ranks[column] = between(self.last_ranks[column], None)
+        return self.last_ranks[column]
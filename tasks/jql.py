@@ -0,0 +1,518 @@
+"""A small JQL-style query language for tasks.
+
+    project = MP AND status IN (todo, in_progress) AND labels = backend
+    ORDER BY priority DESC
+
+``parse`` turns a query string into an immutable plan and caches it by
+string. ``compile_plan`` turns a plan into one filter expression plus an
+ordering for a given user: foreign keys become joins, many-to-many clauses
+become EXISTS subqueries (so no DISTINCT is needed) and nothing is filtered
+in Python.
+
+Queries that could match the whole table are rejected: every query needs a
+positive condition (``=``, ``IN`` or a range) that isn't negated or merely
+one side of an OR with an unbounded branch. Size limits keep the SQL small.
+"""
+import re
+from datetime import datetime, time, timedelta
+from functools import lru_cache
+from typing import NamedTuple
+
+from django.db.models import Case, Exists, IntegerField, OuterRef, Q, Value, When
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Task
+
+MAX_QUERY_LENGTH = 2000
+MAX_CLAUSES = 30
+MAX_VALUES = 100
+MAX_DEPTH = 8
+
+
+class JQLError(ValueError):
+    def __init__(self, message, position=None):
+        if position is not None:
+            message = f'{message} (at character {position + 1})'
+        super().__init__(message)
+
+
+class Operand(NamedTuple):
+    kind: str  # 'word', 'string', 'function' or 'empty'
+    text: str
+
+
+class Clause(NamedTuple):
+    field: str
+    operator: str
+    operands: tuple
+
+
+class And(NamedTuple):
+    items: tuple
+
+
+class Or(NamedTuple):
+    items: tuple
+
+
+class Not(NamedTuple):
+    item: object
+
+
+class Plan(NamedTuple):
+    where: object
+    order_by: tuple  # ((field, descending), ...)
+
+
+class FieldSpec(NamedTuple):
+    kind: str            # 'choice', 'text', 'number', 'date', 'relation', 'many', 'key'
+    lookup: str          # model field (or relation path) the clause filters on
+    choices: type = None
+    sort_field: str = None
+
+
+FIELDS = {
+    'project': FieldSpec('key', 'project__key'),
+    'key': FieldSpec('key', 'key', sort_field='key'),
+    'status': FieldSpec('choice', 'status', Task.Status, sort_field='status'),
+    'priority': FieldSpec('choice', 'priority', Task.Priority, sort_field='priority'),
+    'type': FieldSpec('choice', 'issue_type', Task.IssueType, sort_field='issue_type'),
+    'assignee': FieldSpec('relation', 'assignee__username'),
+    'epic': FieldSpec('relation', 'epic__name'),
+    'sprint': FieldSpec('relation', 'sprint__name'),
+    'labels': FieldSpec('many', 'labels'),
+    'component': FieldSpec('many', 'components'),
+    'fixversion': FieldSpec('many', 'fix_versions'),
+    'affectedversion': FieldSpec('many', 'affects_versions'),
+    'summary': FieldSpec('text', 'title', sort_field='title'),
+    'description': FieldSpec('text', 'description'),
+    'storypoints': FieldSpec('number', 'story_points', sort_field='story_points'),
+    'due': FieldSpec('date', 'due_date', sort_field='due_date'),
+    'created': FieldSpec('date', 'created_at', sort_field='created_at'),
+    'updated': FieldSpec('date', 'updated_at', sort_field='updated_at'),
+}
+ALIASES = {
+    'issuetype': 'type', 'label': 'labels', 'components': 'component',
+    'title': 'summary', 'text': 'summary', 'points': 'storypoints', 'duedate': 'due',
+}
+
+OPERATORS = {
+    'choice': {'=', '!=', 'IN', 'NOT IN', '<', '<=', '>', '>='},
+    'key': {'=', '!=', 'IN', 'NOT IN'},
+    'relation': {'=', '!=', 'IN', 'NOT IN', 'IS', 'IS NOT'},
+    'many': {'=', '!=', 'IN', 'NOT IN', 'IS', 'IS NOT'},
+    'text': {'~', '!~', '=', '!='},
+    'number': {'=', '!=', 'IN', 'NOT IN', '<', '<=', '>', '>=', 'IS', 'IS NOT'},
+    'date': {'=', '<', '<=', '>', '>=', 'IS', 'IS NOT'},
+}
+# Operators that pin results to a subset of rows; see is_bounded()
+BOUNDING_OPERATORS = {'=', 'IN', '<', '<=', '>', '>='}
+
+
+def get_field(name, position=None):
+    name = name.lower()
+    name = ALIASES.get(name, name)
+    if name not in FIELDS:
+        raise JQLError(f'Unknown field "{name}"', position)
+    return name, FIELDS[name]
+
+
+TOKEN = re.compile(r'''
+    (?P<space>\s+)
+  | (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+  | (?P<operator>!=|>=|<=|!~|=|>|<|~)
+  | (?P<lparen>\()
+  | (?P<rparen>\))
+  | (?P<comma>,)
+  | (?P<function>[A-Za-z_]\w*\(\))
+  | (?P<word>[\w.:+\-]+)
+''', re.VERBOSE)
+KEYWORDS = {'AND', 'OR', 'NOT', 'IN', 'IS', 'EMPTY', 'NULL', 'ORDER', 'BY', 'ASC', 'DESC'}
+
+
+class Token(NamedTuple):
+    kind: str
+    text: str
+    position: int
+
+
+def tokenize(query):
+    tokens = []
+    position = 0
+    while position < len(query):
+        match = TOKEN.match(query, position)
+        if not match:
+            raise JQLError(f'Unexpected character "{query[position]}"', position)
+        kind, text = match.lastgroup, match.group()
+        if kind == 'string':
+            text = re.sub(r'\\(.)', r'\1', text[1:-1])
+        elif kind == 'word' and text.upper() in KEYWORDS:
+            kind, text = 'keyword', text.upper()
+        if kind != 'space':
+            tokens.append(Token(kind, text, position))
+        position = match.end()
+    return tokens
+
+
+class Parser:
+    """Recursive descent over the token list.
+
+        query   := [expr] [ORDER BY order ("," order)*]
+        expr    := term (OR term)*
+        term    := factor (AND factor)*
+        factor  := NOT factor | "(" expr ")" | clause
+        clause  := field operator operand | field [NOT] IN "(" operand ("," operand)* ")"
+                 | field IS [NOT] (EMPTY | NULL)
+    """
+
+    def __init__(self, query):
+        self.query = query
+        self.tokens = tokenize(query)
+        self.index = 0
+        self.clauses = 0
+
+    def peek(self, kind=None, text=None):
+        if self.index >= len(self.tokens):
+            return None
+        token = self.tokens[self.index]
+        if (kind and token.kind != kind) or (text and token.text != text):
+            return None
+        return token
+
+    def take(self, kind=None, text=None):
+        token = self.peek(kind, text)
+        if token is None:
+            position = self.tokens[self.index].position if self.index < len(self.tokens) else len(self.query)
+            raise JQLError(f'Expected {text or kind}', position)
+        self.index += 1
+        return token
+
+    def parse(self):
+        where = None
+        if self.tokens and not self.peek('keyword', 'ORDER'):
+            where = self.expression(depth=0)
+        order_by = self.order_by() if self.peek('keyword', 'ORDER') else ()
+        if self.index < len(self.tokens):
+            token = self.tokens[self.index]
+            raise JQLError(f'Unexpected "{token.text}"', token.position)
+        return Plan(where, order_by)
+
+    def expression(self, depth):
+        items = [self.term(depth)]
+        while self.peek('keyword', 'OR'):
+            self.take()
+            items.append(self.term(depth))
+        return items[0] if len(items) == 1 else Or(tuple(items))
+
+    def term(self, depth):
+        items = [self.factor(depth)]
+        while self.peek('keyword', 'AND'):
+            self.take()
+            items.append(self.factor(depth))
+        return items[0] if len(items) == 1 else And(tuple(items))
+
+    def factor(self, depth):
+        if depth > MAX_DEPTH:
+            raise JQLError('Query is nested too deeply')
+        if self.peek('keyword', 'NOT'):
+            self.take()
+            return Not(self.factor(depth + 1))
+        if self.peek('lparen'):
+            self.take()
+            expression = self.expression(depth + 1)
+            self.take('rparen')
+            return expression
+        return self.clause()
+
+    def clause(self):
+        token = self.take('word')
+        name, spec = get_field(token.text, token.position)
+        self.clauses += 1
+        if self.clauses > MAX_CLAUSES:
+            raise JQLError(f'Queries are limited to {MAX_CLAUSES} conditions')
+
+        if self.peek('keyword', 'IS'):
+            self.take()
+            operator = 'IS'
+            if self.peek('keyword', 'NOT'):
+                self.take()
+                operator = 'IS NOT'
+            if self.peek('keyword', 'NULL'):
+                self.take()
+            else:
+                self.take('keyword', 'EMPTY')
+            operands = (Operand('empty', ''),)
+        elif self.peek('keyword', 'IN') or self.peek('keyword', 'NOT'):
+            operator = 'NOT IN' if self.take().text == 'NOT' else 'IN'
+            if operator == 'NOT IN':
+                self.take('keyword', 'IN')
+            operands = self.operand_list()
+        else:
+            operator = self.take('operator').text
+            operands = (self.operand(),)
+
+        if operator not in OPERATORS[spec.kind]:
+            raise JQLError(f'"{operator}" is not supported for {name}', token.position)
+        for operand in operands:
+            validate_operand(name, spec, operand)
+        return Clause(name, operator, operands)
+
+    def operand_list(self):
+        self.take('lparen')
+        operands = [self.operand()]
+        while self.peek('comma'):
+            self.take()
+            operands.append(self.operand())
+        self.take('rparen')
+        if len(operands) > MAX_VALUES:
+            raise JQLError(f'IN lists are limited to {MAX_VALUES} values')
+        return tuple(operands)
+
+    def operand(self):
+        for kind in ('string', 'word', 'function'):
+            if self.peek(kind):
+                return Operand(kind, self.take().text)
+        if self.peek('keyword', 'EMPTY') or self.peek('keyword', 'NULL'):
+            self.take()
+            return Operand('empty', '')
+        self.take('value')
+
+    def order_by(self):
+        self.take('keyword', 'ORDER')
+        self.take('keyword', 'BY')
+        order_by = []
+        while True:
+            token = self.take('word')
+            name, spec = get_field(token.text, token.position)
+            if not spec.sort_field:
+                raise JQLError(f'Cannot order by {name}', token.position)
+            descending = False
+            if self.peek('keyword', 'ASC') or self.peek('keyword', 'DESC'):
+                descending = self.take().text == 'DESC'
+            order_by.append((name, descending))
+            if not self.peek('comma'):
+                return tuple(order_by)
+            self.take()
+
+
+def validate_operand(name, spec, operand):
+    """Reject values that can never be valid for the field, at parse time."""
+    if operand.kind == 'empty':
+        return
+    if operand.kind == 'function':
+        if not (spec.kind == 'relation' and name == 'assignee' and operand.text.lower() == 'currentuser()') \
+                and not (spec.kind == 'date' and operand.text.lower() == 'now()'):
+            raise JQLError(f'{operand.text} cannot be used with {name}')
+    elif spec.kind == 'choice':
+        choice_value(spec.choices, operand.text)
+    elif spec.kind == 'number':
+        try:
+            int(operand.text)
+        except ValueError:
+            raise JQLError(f'{name} expects a number, not "{operand.text}"')
+    elif spec.kind == 'date':
+        date_value(operand)
+
+
+def choice_value(choices, text):
+    """Match a choice by value or label, ignoring case and spaces/underscores."""
+    wanted = text.lower().replace(' ', '_')
+    for value, label in choices.choices:
+        if wanted in (value, label.lower().replace(' ', '_')):
+            return value
+    raise JQLError(f'"{text}" is not one of {", ".join(choices.values)}')
+
+
+RELATIVE_DATE = re.compile(r'^([+-]?\d+)([dwh])$')
+
+
+def date_value(operand, now=None):
+    """Aware datetime for ``2025-01-31``, ``2025-01-31T12:00``, ``-7d``, ``2w`` or now()."""
+    now = now or timezone.now()
+    text = operand.text
+    if operand.kind == 'function':
+        return now
+    match = RELATIVE_DATE.match(text)
+    if match:
+        amount, unit = int(match.group(1)), match.group(2)
+        return now + {'d': timedelta(days=amount), 'w': timedelta(weeks=amount), 'h': timedelta(hours=amount)}[unit]
+    value = parse_datetime(text)
+    if value is None:
+        day = parse_date(text)
+        if day is None:
+            raise JQLError(f'"{text}" is not a date')
+        value = datetime.combine(day, time.min)
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+@lru_cache(maxsize=512)
+def parse(query):
+    """Parse and validate ``query`` into a Plan. Cached by query string."""
+    if len(query) > MAX_QUERY_LENGTH:
+        raise JQLError(f'Queries are limited to {MAX_QUERY_LENGTH} characters')
+    plan = Parser(query).parse()
+    if plan.where is None or not is_bounded(plan.where):
+        raise JQLError(
+            'Query could match every task; add a condition such as '
+            '"project = KEY" or "status IN (...)" that is not negated'
+        )
+    return plan
+
+
+def is_bounded(node):
+    """True if ``node`` only matches rows pinned down by a positive condition."""
+    if isinstance(node, Clause):
+        spec = FIELDS[node.field]
+        return (
+            node.operator in BOUNDING_OPERATORS
+            and spec.kind != 'text'
+            and all(operand.kind != 'empty' for operand in node.operands)
+        )
+    if isinstance(node, And):
+        return any(is_bounded(item) for item in node.items)
+    if isinstance(node, Or):
+        return all(is_bounded(item) for item in node.items)
+    return False
+
+
+def ordinal(choices, field):
+    """Rank of a choices field in declaration order, e.g. lowest=0 .. highest=4."""
+    return Case(
+        *[When(**{field: value}, then=Value(rank)) for rank, value in enumerate(choices.values)],
+        default=Value(len(choices.values)),
+        output_field=IntegerField(),
+    )
+
+
+class Compiler:
+    def __init__(self, user, now=None):
+        self.user = user
+        self.now = now or timezone.now()
+
+    def compile(self, node):
+        if isinstance(node, And):
+            condition = Q()
+            for item in node.items:
+                condition &= self.compile(item)
+            return condition
+        if isinstance(node, Or):
+            condition = Q()
+            for item in node.items:
+                condition |= self.compile(item)
+            return condition
+        if isinstance(node, Not):
+            return ~self.compile(node.item)
+        return getattr(self, f'compile_{FIELDS[node.field].kind}')(node, FIELDS[node.field])
+
+    @staticmethod
+    def negate_if(condition, operator):
+        return ~condition if operator in ('!=', 'NOT IN', 'IS NOT', '!~') else condition
+
+    def compile_key(self, clause, spec):
+        values = [operand.text.upper() for operand in clause.operands]
+        return self.negate_if(Q(**{f'{spec.lookup}__in': values}), clause.operator)
+
+    def compile_choice(self, clause, spec):
+        values = [choice_value(spec.choices, operand.text) for operand in clause.operands]
+        if clause.operator in ('<', '<=', '>', '>='):
+            # Ranges follow declaration order: priority > medium means high or highest
+            ranks = {value: rank for rank, value in enumerate(spec.choices.values)}
+            pivot = ranks[values[0]]
+            compare = {
+                '<': lambda rank: rank < pivot, '<=': lambda rank: rank <= pivot,
+                '>': lambda rank: rank > pivot, '>=': lambda rank: rank >= pivot,
+            }[clause.operator]
+            values = [value for value, rank in ranks.items() if compare(rank)]
+        return self.negate_if(Q(**{f'{spec.lookup}__in': values}), clause.operator)
+
+    def compile_relation(self, clause, spec):
+        relation = spec.lookup.split('__')[0]
+        if clause.operator in ('IS', 'IS NOT'):
+            return self.negate_if(Q(**{f'{relation}__isnull': True}), clause.operator)
+        condition = Q()
+        names = []
+        for operand in clause.operands:
+            if operand.kind == 'function':
+                condition |= Q(**{relation: self.user.pk})
+            elif operand.kind == 'empty':
+                condition |= Q(**{f'{relation}__isnull': True})
+            else:
+                names.append(operand.text)
+        if names:
+            condition |= Q(**{f'{spec.lookup}__in': names})
+        return self.negate_if(condition, clause.operator)
+
+    def compile_many(self, clause, spec):
+        field = Task._meta.get_field(spec.lookup)
+        related = field.remote_field.through.objects.filter(**{field.m2m_field_name(): OuterRef('pk')})
+        if clause.operator not in ('IS', 'IS NOT'):
+            names = [operand.text for operand in clause.operands]
+            related = related.filter(**{f'{field.m2m_reverse_field_name()}__name__in': names})
+            return self.negate_if(Q(Exists(related)), clause.operator)
+        # IS EMPTY: no related rows at all
+        return Q(Exists(related)) if clause.operator == 'IS NOT' else ~Q(Exists(related))
+
+    def compile_text(self, clause, spec):
+        text = clause.operands[0].text
+        lookup = 'icontains' if clause.operator in ('~', '!~') else 'iexact'
+        return self.negate_if(Q(**{f'{spec.lookup}__{lookup}': text}), clause.operator)
+
+    def compile_number(self, clause, spec):
+        return self.compile_range(clause, spec, [
+            None if operand.kind == 'empty' else int(operand.text) for operand in clause.operands
+        ])
+
+    def compile_date(self, clause, spec):
+        values = [
+            None if operand.kind == 'empty' else date_value(operand, self.now)
+            for operand in clause.operands
+        ]
+        if clause.operator == '=' and values[0] is not None and clause.operands[0].kind == 'word' \
+                and parse_date(clause.operands[0].text):
+            # A bare day means the whole day
+            start = values[0]
+            return Q(**{f'{spec.lookup}__gte': start, f'{spec.lookup}__lt': start + timedelta(days=1)})
+        return self.compile_range(clause, spec, values)
+
+    def compile_range(self, clause, spec, values):
+        lookup = spec.lookup
+        if clause.operator in ('IS', 'IS NOT'):
+            return self.negate_if(Q(**{f'{lookup}__isnull': True}), clause.operator)
+        suffix = {'<': 'lt', '<=': 'lte', '>': 'gt', '>=': 'gte'}.get(clause.operator)
+        if suffix:
+            return Q(**{f'{lookup}__{suffix}': values[0]})
+        return self.negate_if(Q(**{f'{lookup}__in': values}), clause.operator)
+
+    def ordering(self, order_by):
+        """(annotations, ordering) for KeysetPaginator; choices sort by rank."""
+        annotations, ordering = {}, []
+        for name, descending in order_by:
+            spec = FIELDS[name]
+            sort_field = spec.sort_field
+            if spec.kind == 'choice':
+                sort_field = f'{spec.lookup}_rank'
+                annotations[sort_field] = ordinal(spec.choices, spec.lookup)
+            ordering.append(f'-{sort_field}' if descending else sort_field)
+        return annotations, ordering
+
+
+def compile_plan(plan, user, now=None):
+    """(condition, annotations, ordering) for ``plan`` as seen by ``user``."""
+    compiler = Compiler(user, now)
+    annotations, ordering = compiler.ordering(plan.order_by)
+    return compiler.compile(plan.where), annotations, ordering
+
+
+def apply(queryset, plan, user):
+    """Filter and annotate ``queryset`` by ``plan``; returns it with its ordering.
+
+    The ordering (possibly empty, meaning "the default") is returned rather
+    than applied so keyset pagination can add its tie-breaker and cursor.
+    """
+    condition, annotations, ordering = compile_plan(plan, user)
+    if annotations:
+        queryset = queryset.annotate(**annotations)
+    return queryset.filter(condition), ordering
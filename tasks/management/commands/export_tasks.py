@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from projects.models import Project
+from tasks.export import FORMATS, export_tasks
+from tasks.models import Task
+
+
+class Command(BaseCommand):
+    help = 'Stream all tasks, or those of the given projects, as CSV or JSON Lines.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'project_keys', nargs='*',
+            help='Keys of the projects to export (default: all projects).'
+        )
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--output', '-o', help='File to write to (default: stdout).')
+        parser.add_argument('--chunk-size', type=int, default=None,
+                            help='Tasks read per query (default: EXPORT_CHUNK_SIZE).')
+
+    def handle(self, *args, **options):
+        tasks = Task.objects.all()
+        if options['project_keys']:
+            projects = Project.objects.filter(key__in=options['project_keys'])
+            missing = set(options['project_keys']) - set(projects.values_list('key', flat=True))
+            if missing:
+                raise CommandError(f'Unknown project key(s): {", ".join(sorted(missing))}')
+            tasks = tasks.filter(project__in=projects)
+        lines = export_tasks(tasks, options['format'], chunk_size=options['chunk_size'])
+        if options['output']:
+            count = -1 if options['format'] == 'csv' else 0  # CSV starts with a header
+            with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+                for line in lines:
+                    output.write(line)
+                    count += 1
+            self.stderr.write(self.style.SUCCESS(f'Exported {count} task(s) to {options["output"]}.'))
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
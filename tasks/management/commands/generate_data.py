@@ -0,0 +1,38 @@
+from dataclasses import fields
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.datagen import DataGenerator, GeneratorConfig
+
+
+class Command(BaseCommand):
+    help = 'Bulk-create synthetic users, projects and tasks for load and scale testing.'
+
+    def add_arguments(self, parser):
+        defaults = GeneratorConfig()
+        for field in fields(GeneratorConfig):
+            if field.name == 'start_date':
+                continue
+            parser.add_argument(
+                f"--{field.name.replace('_', '-')}",
+                type=type(getattr(defaults, field.name)),
+                default=getattr(defaults, field.name),
+            )
+
+    def handle(self, *args, **options):
+        config = GeneratorConfig(**{
+            field.name: options[field.name] for field in fields(GeneratorConfig) if field.name in options
+        })
+        if config.users < 1 or config.projects < 1:
+            raise CommandError('--users and --projects must be at least 1.')
+        verbosity = options['verbosity']
+        generator = DataGenerator(config, log=self.stdout.write if verbosity > 1 else None)
+        taken = generator.existing_conflicts()
+        if taken:
+            raise CommandError(
+                f"{', '.join(taken[:5])} already exist{'s' if len(taken) == 1 else ''}; pick another --prefix."
+            )
+        result = generator.run()
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {result['users']} users, {result['projects']} projects and {result['tasks']} tasks."
+        ))
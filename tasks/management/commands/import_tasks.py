@@ -0,0 +1,68 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.importer import FORMATS, TaskImporter, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Import tasks from a CSV or JSON Lines file (the format written by export_tasks).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import.')
+        parser.add_argument('--format', choices=FORMATS,
+                            help='Input format (default: from the file extension).')
+        parser.add_argument('--project', help='Project key for rows without a project column.')
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Rows validated and written per transaction (default: IMPORT_BATCH_SIZE).')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Validate every row and report errors without writing anything.')
+        parser.add_argument(
+            '--checkpoint',
+            help='Progress file updated after every batch. If it exists, the import '
+                 'resumes after the last line it records.'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        format = options['format'] or os.path.splitext(path)[1].lstrip('.').lower()
+        if format not in FORMATS:
+            raise CommandError(f'Cannot tell the format of {path}; pass --format.')
+        checkpoint = options['checkpoint']
+        start_after = self.read_checkpoint(checkpoint) if checkpoint else 0
+        if start_after:
+            self.stderr.write(f'Resuming after line {start_after}.')
+
+        def save_checkpoint(line):
+            with open(checkpoint, 'w') as output:
+                json.dump({'path': path, 'last_line': line}, output)
+            self.stderr.write(f'Imported up to line {line}.')
+
+        importer = TaskImporter(
+            dry_run=options['dry_run'],
+            batch_size=options['batch_size'],
+            start_after=start_after,
+            default_project=options['project'],
+            on_checkpoint=save_checkpoint if checkpoint else None,
+        )
+        with open(path, newline='', encoding='utf-8-sig') as lines:
+            result = importer.run(read_rows(lines, format))
+
+        for error in result['errors']:
+            self.stderr.write(f"Line {error['line']}: {error['error']}")
+        if result['failed'] > len(result['errors']):
+            self.stderr.write(f"... and {result['failed'] - len(result['errors'])} more error(s).")
+        verb = 'Would import' if options['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {result['created']} task(s); {result['failed']} row(s) failed."
+        ))
+
+    def read_checkpoint(self, checkpoint):
+        if not os.path.exists(checkpoint):
+            return 0
+        try:
+            with open(checkpoint) as source:
+                return int(json.load(source)['last_line'])
+        except (ValueError, KeyError, TypeError):
+            raise CommandError(f'Unreadable checkpoint file: {checkpoint}')
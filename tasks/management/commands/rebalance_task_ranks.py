@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Max, Q
+from django.db.models.functions import Length
+
+from projects.models import Project
+from tasks.models import Task
+from tasks.ranking import get_rebalance_length, rebalance
+
+
+class Command(BaseCommand):
+    help = 'Respace kanban card ranks in columns whose ranks have grown too long.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'project_keys', nargs='*',
+            help='Keys of the projects to check (default: all projects).'
+        )
+        parser.add_argument(
+            '--max-length', type=int, default=None,
+            help='Rebalance columns with a rank longer than this (default: TASK_RANK_REBALANCE_LENGTH).'
+        )
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Rebalance every column regardless of rank length.'
+        )
+
+    def handle(self, *args, **options):
+        max_length = options['max_length'] or get_rebalance_length()
+        tasks = Task.objects.order_by()
+        if options['project_keys']:
+            tasks = tasks.filter(project__in=Project.objects.filter(key__in=options['project_keys']))
+        columns = tasks.values('project_id', 'status')
+        if not options['all']:
+            # Unranked cards (rank '') also need a place in their column
+            columns = columns.annotate(
+                longest=Max(Length('rank')), unranked=Count('pk', filter=Q(rank='')),
+            ).filter(Q(longest__gt=max_length) | Q(unranked__gt=0))
+        count = 0
+        for column in columns.distinct():
+            count += 1
+            rebalance(Task.objects.filter(project_id=column['project_id'], status=column['status']))
+        self.stdout.write(self.style.SUCCESS(f'Rebalanced {count} column(s).'))
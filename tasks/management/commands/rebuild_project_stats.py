@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from projects.models import Project
+from tasks.stats import rebuild_project_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute ProjectStats rows from the tasks table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'project_keys', nargs='*',
+            help='Keys of the projects to rebuild (default: all projects).'
+        )
+
+    def handle(self, *args, **options):
+        project_ids = None
+        if options['project_keys']:
+            project_ids = list(
+                Project.objects.filter(key__in=options['project_keys']).values_list('pk', flat=True)
+            )
+        rebuild_project_stats(project_ids)
+        count = len(project_ids) if project_ids is not None else Project.objects.count()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt stats for {count} project(s).'))
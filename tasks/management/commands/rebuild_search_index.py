@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from tasks.models import Task
+from tasks.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Recreate the full-text search index from the tasks and comments tables.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        rebuild_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {Task.objects.count()} task(s).'))
@@ -0,0 +1,39 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from tasks.benchmarks import BenchmarkRunner, compare, save_results
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the main views at several data scales and store the results as JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scales', default='1000,10000',
+            help='Comma-separated task counts to seed and benchmark at.'
+        )
+        parser.add_argument('--requests', type=int, default=20, help='Timed requests per endpoint.')
+        parser.add_argument('--warmup', type=int, default=2, help='Untimed requests per endpoint.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', default='bench_output.json', help='Where to write the JSON results.')
+        parser.add_argument('--baseline', help='Earlier results file to compare p50 latencies against.')
+
+    def handle(self, *args, **options):
+        scales = [int(scale) for scale in options['scales'].split(',') if scale]
+        runner = BenchmarkRunner(
+            scales,
+            requests=options['requests'],
+            warmup=options['warmup'],
+            log=self.stdout.write,
+            generator_options={'seed': options['seed']},
+        )
+        results = runner.run()
+        save_results(results, options['output'])
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+        if options['baseline']:
+            with open(options['baseline']) as baseline_file:
+                baseline = json.load(baseline_file)
+            for scale, endpoint, old, new, change in compare(results, baseline):
+                self.stdout.write(f'{scale:>9} {endpoint:<20} {old:>8.1f}ms -> {new:>8.1f}ms ({change:+.0f}%)')
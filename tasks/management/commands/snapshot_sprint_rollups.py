@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from projects.models import Sprint
+from tasks.history import rebuild_sprint_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Write today's burndown rollup for every sprint in progress. Run daily so "
+        "sprints have a row even on days without changes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Also snapshot sprints that are not in progress today.'
+        )
+
+    def handle(self, *args, **options):
+        sprints = Sprint.objects.all()
+        if not options['all']:
+            today = timezone.localdate()
+            sprints = sprints.filter(start_date__lte=today, end_date__gte=today)
+        sprint_ids = list(sprints.values_list('pk', flat=True))
+        rebuild_sprint_rollups(sprint_ids)
+        self.stdout.write(self.style.SUCCESS(f'Snapshotted {len(sprint_ids)} sprint(s).'))
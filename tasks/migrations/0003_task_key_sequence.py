@@ -0,0 +1,44 @@
+# Generated by Django 5.2.5 on 2026-10-18 01:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def seed_sequences(apps, schema_editor):
+    # Continue numbering after the highest existing key suffix of each project
+    Task = apps.get_model('tasks', 'Task')
+    TaskKeySequence = apps.get_model('tasks', 'TaskKeySequence')
+    last_numbers = {}
+    for project_id, key in Task.objects.values_list('project_id', 'key').iterator():
+        try:
+            number = int(key.rsplit('-', 1)[1])
+        except (IndexError, ValueError):
+            continue
+        last_numbers[project_id] = max(number, last_numbers.get(project_id, 0))
+    TaskKeySequence.objects.bulk_create([
+        TaskKeySequence(project_id=project_id, last_number=number)
+        for project_id, number in last_numbers.items()
+    ])
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0003_alter_project_key'),
+        ('tasks', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskKeySequence',
+            fields=[
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='task_key_sequence', serialize=False, to='projects.project')),
+                ('last_number', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='key',
+            field=models.CharField(blank=True, max_length=20, unique=True),
+        ),
+        migrations.RunPython(seed_sequences, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-18 01:49
+
+import datetime
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0003_alter_project_key'),
+        ('tasks', '0003_task_key_sequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectStats',
+            fields=[
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='projects.project')),
+                ('task_count', models.IntegerField(default=0)),
+                ('backlog_count', models.IntegerField(default=0)),
+                ('todo_count', models.IntegerField(default=0)),
+                ('in_progress_count', models.IntegerField(default=0)),
+                ('in_review_count', models.IntegerField(default=0)),
+                ('done_count', models.IntegerField(default=0)),
+                ('story_points_total', models.IntegerField(default=0)),
+                ('story_points_done', models.IntegerField(default=0)),
+                ('time_logged_total', models.DurationField(default=datetime.timedelta(0))),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'project stats',
+            },
+        ),
+    ]
@@ -0,0 +1,65 @@
+from django.conf import settings
+from django.db import migrations
+
+# The table as this migration creates it; tasks.search maintains it from here
+# on. Kept self-contained so later changes to tasks.search don't change what
+# this migration does.
+TABLE = 'tasks_search'
+
+
+def create_search_table(apps, schema_editor):
+    connection = schema_editor.connection
+    tasks = apps.get_model('tasks', 'Task')._meta.db_table
+    comments = apps.get_model('tasks', 'Comment')._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} '
+                f"USING fts5(key, title, description, comments, tokenize='unicode61')"
+            )
+            # Index what is already there
+            cursor.execute(f'DELETE FROM {TABLE}')
+            cursor.execute(
+                f'INSERT INTO {TABLE} (rowid, key, title, description, comments) '
+                f'SELECT t.id, t.key, t.title, t.description, '
+                f"(SELECT group_concat(c.content, ' ') FROM {comments} c WHERE c.task_id = t.id) "
+                f'FROM {tasks} t'
+            )
+        elif connection.vendor == 'postgresql':
+            config = getattr(settings, 'SEARCH_CONFIG', 'english')
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {TABLE} ('
+                f'task_id bigint PRIMARY KEY, '
+                f'document tsvector NOT NULL)'
+            )
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS {TABLE}_document_gin ON {TABLE} USING gin (document)')
+            cursor.execute(
+                f'INSERT INTO {TABLE} (task_id, document) '
+                f'SELECT t.id, '
+                f"setweight(to_tsvector(%s::regconfig, coalesce(t.key, '')), 'A') || "
+                f"setweight(to_tsvector(%s::regconfig, coalesce(t.title, '')), 'B') || "
+                f"setweight(to_tsvector(%s::regconfig, coalesce(t.description, '')), 'C') || "
+                f"setweight(to_tsvector(%s::regconfig, coalesce(("
+                f"SELECT string_agg(c.content, ' ') FROM {comments} c WHERE c.task_id = t.id"
+                f"), '')), 'D') "
+                f'FROM {tasks} t '
+                f'ON CONFLICT (task_id) DO UPDATE SET document = EXCLUDED.document',
+                [config, config, config, config],
+            )
+
+
+def drop_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0005_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
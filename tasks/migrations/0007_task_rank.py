@@ -0,0 +1,72 @@
+# Generated by Django 5.2.5 on 2026-10-18 02:16
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Rank spacing as in tasks.ranking when ranks were introduced, copied so this
+# migration doesn't change along with that module
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+BASE = len(DIGITS)
+WIDTH = 6
+
+
+def _from_int(value, width):
+    digits = []
+    for _ in range(width):
+        value, digit = divmod(value, BASE)
+        digits.append(DIGITS[digit])
+    return ''.join(reversed(digits)).rstrip('0')
+
+
+def spread(count):
+    """``count`` ascending ranks spaced evenly over the middle third of the range."""
+    width = WIDTH
+    while BASE ** width // 3 < (count + 1) * 2:
+        width += 1
+    third = BASE ** width // 3
+    step = third // (count + 1)
+    return [_from_int(third + (i + 1) * step, width) for i in range(count)]
+
+
+def rank_existing_tasks(apps, schema_editor):
+    # Each column keeps the order it had before ranks existed
+    Task = apps.get_model('tasks', 'Task')
+    columns = Task.objects.order_by().values_list('project_id', 'status').distinct()
+    for project_id, status in columns:
+        task_ids = list(
+            Task.objects.filter(project_id=project_id, status=status)
+            .order_by(models.F('due_date').asc(nulls_last=True), 'priority', 'pk')
+            .values_list('pk', flat=True)
+        )
+        Task.objects.bulk_update(
+            [Task(pk=task_id, rank=rank) for task_id, rank in zip(task_ids, spread(len(task_ids)))],
+            ['rank'], batch_size=500,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0003_alter_project_key'),
+        ('tasks', '0006_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='rank',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+        migrations.RunPython(rank_existing_tasks, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['project', 'status', 'rank'], name='task_column_rank_idx'),
+        ),
+        # Covered by the leading columns of task_column_rank_idx
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_project_status_idx',
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.5 on 2026-10-18 02:20
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0003_alter_project_key'),
+        ('tasks', '0007_task_rank'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SprintDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('total_points', models.IntegerField(default=0)),
+                ('remaining_points', models.IntegerField(default=0)),
+                ('total_tasks', models.IntegerField(default=0)),
+                ('remaining_tasks', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('sprint', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='projects.sprint')),
+            ],
+            options={
+                'ordering': ['sprint', 'date'],
+                'constraints': [models.UniqueConstraint(fields=('sprint', 'date'), name='unique_sprint_rollup_date')],
+            },
+        ),
+        migrations.CreateModel(
+            name='TaskStatusChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(blank=True, choices=[('backlog', 'Backlog'), ('todo', 'To Do'), ('in_progress', 'In Progress'), ('in_review', 'In Review'), ('done', 'Done')], max_length=20)),
+                ('to_status', models.CharField(choices=[('backlog', 'Backlog'), ('todo', 'To Do'), ('in_progress', 'In Progress'), ('in_review', 'In Review'), ('done', 'Done')], max_length=20)),
+                ('story_points', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_changes', to='projects.project')),
+                ('sprint', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='status_changes', to='projects.sprint')),
+                ('task', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='status_changes', to='tasks.task')),
+            ],
+            options={
+                'ordering': ['changed_at', 'id'],
+                'indexes': [models.Index(fields=['task', 'changed_at'], name='statuschange_task_idx'), models.Index(fields=['sprint', 'changed_at'], name='statuschange_sprint_idx')],
+            },
+        ),
+    ]
@@ -1,8 +1,11 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.db.models import F
 from django.urls import reverse
+from django.utils import timezone
 from django.conf import settings
 from datetime import timedelta
 from projects.models import Project, Epic, Sprint
+from .ranking import between
 
 class Label(models.Model):
     name = models.CharField(max_length=50, unique=True)
@@ -34,6 +37,83 @@ class Version(models.Model):
     def __str__(self):
         return f"{self.project.key}: {self.name}"
 
+class TaskKeySequence(models.Model):
+    """Last task number handed out for a project, e.g. 17 once MP-17 exists."""
+    project = models.OneToOneField(
+        Project,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='task_key_sequence'
+    )
+    last_number = models.PositiveIntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.project.key}: {self.last_number}"
+    
+    @classmethod
+    def allocate(cls, project, count=1):
+        """Reserve ``count`` consecutive task numbers and return the first one.
+        
+        The increment is a single UPDATE ... SET last_number = last_number + n,
+        which row-locks the counter until the transaction ends, so parallel
+        writers and bulk imports never receive overlapping numbers.
+        """
+        with transaction.atomic():
+            counter = cls.objects.filter(project=project)
+            if not counter.update(last_number=F('last_number') + count):
+                try:
+                    with transaction.atomic():
+                        cls.objects.create(project=project, last_number=count)
+                    return 1
+                except IntegrityError:
+                    # Another writer created the row first
+                    counter.update(last_number=F('last_number') + count)
+            last_number = counter.values_list('last_number', flat=True).get()
+        return last_number - count + 1
+
+class TaskQuerySet(models.QuerySet):
+    def visible_to(self, user, include_assigned=True):
+        """Tasks in projects ``user`` can access, plus tasks assigned to them.
+        
+        Filters on the precomputed project ids (see projects.access), so no
+        members join and no DISTINCT. Pass ``include_assigned=False`` where
+        being the assignee alone must not grant access, e.g. editing.
+        """
+        from projects.access import accessible_project_ids
+        condition = models.Q(project_id__in=accessible_project_ids(user))
+        if include_assigned and user.is_authenticated:
+            condition |= models.Q(assignee=user)
+        return self.filter(condition)
+    
+    def status_summary(self):
+        """Return per-status task counts plus a 'total' in a single grouped query."""
+        summary = dict.fromkeys(Task.Status.values, 0)
+        # COUNT(DISTINCT id) keeps the numbers right on querysets that join
+        # multi-valued relations (e.g. labels) and rely on .distinct().
+        rows = (
+            self.order_by()
+            .values('status')
+            .annotate(count=models.Count('id', distinct=True))
+            .values_list('status', 'count')
+        )
+        for status, count in rows:
+            summary[status] = count
+        summary['total'] = sum(summary.values())
+        return summary
+
+    def count_by(self, *fields):
+        """Return {field: {value: count}} for each of ``fields`` from one grouped query.
+
+        Groups by all the fields together and folds the rows per field, so the
+        number of rows is bounded by the distinct combinations, not the tasks.
+        """
+        counts = {field: {} for field in fields}
+        rows = self.order_by().values_list(*fields).annotate(count=models.Count('id'))
+        for *values, count in rows:
+            for field, value in zip(fields, values):
+                counts[field][value] = counts[field].get(value, 0) + count
+        return counts
+
 class Task(models.Model):
     class Status(models.TextChoices):
         BACKLOG = 'backlog', 'Backlog'
@@ -67,9 +147,8 @@ class Task(models.Model):
         related_name='assigned_tasks'
     )
     
-    # Jira-like fields - make key nullable first
-# Change this line:
-    key = models.CharField(max_length=20, unique=True, default='TASK')
+    # Jira-like fields; key is assigned from the project's sequence on first save
+    key = models.CharField(max_length=20, unique=True, blank=True)
     epic = models.ForeignKey(Epic, on_delete=models.SET_NULL, null=True, blank=True, related_name='tasks')
     sprint = models.ForeignKey(Sprint, on_delete=models.SET_NULL, null=True, blank=True, related_name='tasks')
     story_points = models.PositiveSmallIntegerField(null=True, blank=True)
@@ -83,6 +162,8 @@ class Task(models.Model):
     priority = models.CharField(max_length=10, choices=Priority.choices, default=Priority.MEDIUM)
     issue_type = models.CharField(max_length=10, choices=IssueType.choices, default=IssueType.TASK)
     due_date = models.DateTimeField(null=True, blank=True)
+    # Position within the kanban column, see tasks.ranking
+    rank = models.CharField(max_length=64, blank=True, default='', editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -92,23 +173,50 @@ class Task(models.Model):
     fix_versions = models.ManyToManyField(Version, blank=True, related_name='fix_tasks')
     affects_versions = models.ManyToManyField(Version, blank=True, related_name='affects_tasks')
     
+    objects = TaskQuerySet.as_manager()
+    
     class Meta:
         ordering = ['due_date', 'priority']
+        indexes = [
+            models.Index(fields=['assignee', 'status'], name='task_assignee_status_idx'),
+            # Default ordering within a project
+            models.Index(fields=['project', 'due_date', 'priority'], name='task_project_due_idx'),
+            models.Index(fields=['sprint', 'status'], name='task_sprint_status_idx'),
+            # Kanban columns in card order; its (project, status) prefix also
+            # serves the board, list and stats filters, which are always
+            # scoped to a project
+            models.Index(fields=['project', 'status', 'rank'], name='task_column_rank_idx'),
+        ]
+    
+    # Fields whose loaded values are remembered so saves can report what changed
+    TRACKED_FIELDS = ('project_id', 'sprint_id', 'status', 'story_points', 'time_logged')
     
     def __str__(self):
         return f"{self.key}: {self.title}" if self.key else self.title
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_tracked_values()
+        return instance
+    
+    def remember_tracked_values(self):
+        # Deferred fields are simply absent; consumers must treat them as unknown
+        self._loaded_values = {
+            name: self.__dict__[name] for name in self.TRACKED_FIELDS if name in self.__dict__
+        }
+    
     def save(self, *args, **kwargs):
-        if not self.key and self.project and self.project.key:
-            # Generate task key (e.g., "MP-1")
-            last_task = Task.objects.filter(project=self.project).order_by('-id').first()
-            next_number = 1
-            if last_task and last_task.key:
-                try:
-                    next_number = int(last_task.key.split('-')[1]) + 1
-                except (IndexError, ValueError):
-                    pass
+        if not self.key and self.project_id and self.project.key:
+            # Generate task key (e.g., "MP-1") from the per-project counter
+            next_number = TaskKeySequence.allocate(self.project)
             self.key = f"{self.project.key}-{next_number}"
+        if self._state.adding and not self.rank and self.project_id:
+            # New cards go to the bottom of their column
+            last_rank = Task.objects.filter(
+                project_id=self.project_id, status=self.status
+            ).order_by('-rank').values_list('rank', flat=True).first()
+            self.rank = between(last_rank, None)
         super().save(*args, **kwargs)
     
     def get_absolute_url(self):
@@ -123,6 +231,9 @@ class Comment(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['task', 'created_at'], name='comment_task_created_idx'),
+        ]
     
     def __str__(self):
         return f'Comment by {self.author} on {self.task}'
@@ -134,4 +245,83 @@ class Attachment(models.Model):
     uploaded_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
-        return self.file.name
\ No newline at end of file
+        return self.file.name
+
+class ProjectStats(models.Model):
+    """Denormalised task totals for a project, kept current by tasks.stats."""
+    project = models.OneToOneField(
+        Project,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats'
+    )
+    task_count = models.IntegerField(default=0)
+    backlog_count = models.IntegerField(default=0)
+    todo_count = models.IntegerField(default=0)
+    in_progress_count = models.IntegerField(default=0)
+    in_review_count = models.IntegerField(default=0)
+    done_count = models.IntegerField(default=0)
+    story_points_total = models.IntegerField(default=0)
+    story_points_done = models.IntegerField(default=0)
+    time_logged_total = models.DurationField(default=timedelta())
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name_plural = 'project stats'
+    
+    def __str__(self):
+        return f"Stats for {self.project}"
+    
+    @property
+    def status_counts(self):
+        return {status: getattr(self, f'{status}_count') for status in Task.Status.values}
+
+
+class TaskStatusChange(models.Model):
+    """Append-only log of status transitions, written by tasks.history."""
+    # Kept when the task is deleted so sprint reports don't lose history
+    task = models.ForeignKey(Task, on_delete=models.SET_NULL, null=True, related_name='status_changes')
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='status_changes')
+    sprint = models.ForeignKey(Sprint, on_delete=models.SET_NULL, null=True, blank=True, related_name='status_changes')
+    from_status = models.CharField(max_length=20, choices=Task.Status.choices, blank=True)  # blank: created
+    to_status = models.CharField(max_length=20, choices=Task.Status.choices)
+    story_points = models.PositiveSmallIntegerField(null=True, blank=True)
+    changed_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        ordering = ['changed_at', 'id']
+        indexes = [
+            models.Index(fields=['task', 'changed_at'], name='statuschange_task_idx'),
+            models.Index(fields=['sprint', 'changed_at'], name='statuschange_sprint_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.task_id}: {self.from_status or '-'} -> {self.to_status}"
+
+
+class SprintDailyRollup(models.Model):
+    """A sprint's scope and remaining work as of the end of one day.
+    
+    Kept current for today by tasks.history; days without changes have no
+    row and carry the previous day's values.
+    """
+    sprint = models.ForeignKey(Sprint, on_delete=models.CASCADE, related_name='daily_rollups')
+    date = models.DateField()
+    total_points = models.IntegerField(default=0)
+    remaining_points = models.IntegerField(default=0)
+    total_tasks = models.IntegerField(default=0)
+    remaining_tasks = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['sprint', 'date']
+        constraints = [
+            models.UniqueConstraint(fields=['sprint', 'date'], name='unique_sprint_rollup_date'),
+        ]
+    
+    def __str__(self):
+        return f"{self.sprint} on {self.date}"
+    
+    @property
+    def completed_points(self):
+        return self.total_points - self.remaining_points
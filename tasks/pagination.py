@@ -0,0 +1,142 @@
+import base64
+import datetime
+import json
+
+from django.core.paginator import InvalidPage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        # DjangoJSONEncoder truncates to milliseconds; cursors need exact values
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class CursorPage:
+    def __init__(self, object_list, cursor, next_cursor):
+        self.object_list = object_list
+        self.cursor = cursor
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.cursor is not None
+
+
+class AnnotationKey:
+    """Stands in for a model field when ordering by an annotation."""
+
+    def __init__(self, name, output_field):
+        self.attname = name
+        self.null = False
+        self.output_field = output_field
+
+    def to_python(self, value):
+        return self.output_field.to_python(value)
+
+
+class KeysetPaginator:
+    """
+    Cursor pagination over a stable ordering.
+
+    Each page continues strictly after the last row of the previous one, so
+    fetching page N costs the same index range scan as page 1. The ordering
+    defaults to the model's Meta.ordering with 'id' appended as a tie-breaker;
+    NULLs always sort last so cursors behave the same on SQLite and PostgreSQL.
+    Non-null annotations on the queryset can be ordered by like fields.
+    """
+
+    def __init__(self, queryset, per_page, ordering=None):
+        self.queryset = queryset
+        self.per_page = per_page
+        model = queryset.model
+        ordering = list(ordering or model._meta.ordering)
+        if not any(name.lstrip('-') in ('id', 'pk') for name in ordering):
+            ordering.append('id')
+        self.fields = []
+        for name in ordering:
+            descending = name.startswith('-')
+            name = name.lstrip('-')
+            if name in queryset.query.annotations:
+                field = AnnotationKey(name, queryset.query.annotations[name].output_field)
+            else:
+                field = model._meta.pk if name == 'pk' else model._meta.get_field(name)
+            self.fields.append((field, descending))
+
+    def get_ordering(self):
+        expressions = []
+        for field, descending in self.fields:
+            expression = F(field.attname)
+            if field.null:
+                expressions.append(expression.desc(nulls_last=True) if descending else expression.asc(nulls_last=True))
+            else:
+                expressions.append(expression.desc() if descending else expression.asc())
+        return expressions
+
+    def encode_cursor(self, obj):
+        values = [getattr(obj, field.attname) for field, _ in self.fields]
+        raw = json.dumps(values, cls=CursorEncoder, separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if not isinstance(values, list) or len(values) != len(self.fields):
+                raise ValueError
+            return [
+                None if value is None else field.to_python(value)
+                for (field, _), value in zip(self.fields, values)
+            ]
+        except Exception:
+            raise InvalidCursor('Invalid cursor.')
+
+    def _after(self, values):
+        """Build the filter selecting rows that sort strictly after ``values``."""
+        conditions = []
+        equal = Q()
+        for (field, descending), value in zip(self.fields, values):
+            name = field.attname
+            if value is not None:
+                step = Q(**{f'{name}__lt' if descending else f'{name}__gt': value})
+                if field.null:
+                    step |= Q(**{f'{name}__isnull': True})
+                conditions.append(equal & step)
+                equal &= Q(**{name: value})
+            else:
+                # Nothing sorts after NULL in this column; only ties continue
+                equal &= Q(**{f'{name}__isnull': True})
+        if not conditions:
+            return Q(pk__in=[])
+        condition = conditions[0]
+        for step in conditions[1:]:
+            condition |= step
+        return condition
+
+    def page(self, cursor=None):
+        queryset = self.queryset.order_by(*self.get_ordering())
+        if cursor:
+            queryset = queryset.filter(self._after(self.decode_cursor(cursor)))
+        rows = list(queryset[:self.per_page + 1])
+        next_cursor = None
+        if len(rows) > self.per_page:
+            rows = rows[:self.per_page]
+            next_cursor = self.encode_cursor(rows[-1])
+        return CursorPage(rows, cursor or None, next_cursor)
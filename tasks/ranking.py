@@ -0,0 +1,176 @@
+"""Lexicographic ranks for ordering cards within kanban columns.
+
+A rank is a string of base-36 digits read as a fraction in [0, 1), so plain
+string comparison orders cards and there is always room for a rank strictly
+between two others. Reordering a card therefore rewrites only that card's
+row. A column is the tasks of one (project, status), ordered by (rank, id)
+on task_column_rank_idx.
+
+Cards added at either end of a column move a fixed STEP away from their
+neighbour and keep ranks short, but repeatedly dropping cards into the same
+gap adds a digit every few moves. The rebalance_task_ranks command respaces
+columns whose ranks have grown past TASK_RANK_REBALANCE_LENGTH.
+
+Only 0-9 and a-z are used, which sort the same under the C and the usual
+locale collations.
+"""
+from bisect import bisect_left, bisect_right, insort
+
+from django.conf import settings
+from django.db import transaction
+
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+BASE = len(DIGITS)
+WIDTH = 6                # digits in freshly spread ranks
+STEP = BASE ** 3         # gap left when adding a card at either end
+MAX_LENGTH = 64          # Task.rank max_length
+
+
+class RankError(ValueError):
+    pass
+
+
+def get_rebalance_length():
+    return getattr(settings, 'TASK_RANK_REBALANCE_LENGTH', 16)
+
+
+def _to_int(rank, width=WIDTH):
+    value = 0
+    for digit in rank[:width].ljust(width, '0'):
+        value = value * BASE + DIGITS.index(digit)
+    return value
+
+
+def _from_int(value, width=WIDTH):
+    digits = []
+    for _ in range(width):
+        value, digit = divmod(value, BASE)
+        digits.append(DIGITS[digit])
+    # Trailing zeros don't change the value; dropping them keeps ranks short
+    return ''.join(reversed(digits)).rstrip('0')
+
+
+def between(before=None, after=None):
+    """A rank sorting strictly after ``before`` and before ``after``.
+
+    Either bound may be None (or empty) for the start or end of the column.
+    """
+    before = before or ''
+    if after is not None and before >= after:
+        raise RankError(f'{before!r} does not sort before {after!r}')
+    if after is None and before:
+        value = _to_int(before) + STEP
+        if value < BASE ** WIDTH:
+            return _from_int(value)
+    elif after and not before:
+        value = _to_int(after) - STEP
+        if value > 0:
+            return _from_int(value)
+    elif after is None:
+        return _from_int(BASE ** WIDTH // 2)
+
+    # Midpoint, digit by digit. Once a digit falls below ``after``'s, any
+    # later digits keep the result below it, so the upper bound opens up.
+    digits = []
+    for i in range(MAX_LENGTH):
+        if after is not None and i >= len(after):
+            raise RankError(f'No rank between {before!r} and {after!r}')
+        low = DIGITS.index(before[i]) if i < len(before) else 0
+        high = DIGITS.index(after[i]) if after is not None else BASE
+        if high - low > 1:
+            digits.append(DIGITS[(low + high) // 2])
+            return ''.join(digits)
+        digits.append(DIGITS[low])
+        if high - low == 1:
+            after = None
+    raise RankError('Rank too long; the column needs rebalancing')
+
+
+def spread(count):
+    """``count`` ascending ranks spaced evenly over the middle third of the range.
+
+    The outer thirds leave room for thousands of cards to be added at either
+    end of the column before ranks start to grow.
+    """
+    width = WIDTH
+    while BASE ** width // 3 < (count + 1) * 2:
+        width += 1
+    third = BASE ** width // 3
+    step = third // (count + 1)
+    return [_from_int(third + (i + 1) * step, width) for i in range(count)]
+
+
+def rebalance(queryset, ordering=('rank', 'pk'), batch_size=500):
+    """Respace the ranks of one column's tasks, keeping their order."""
+    with transaction.atomic():
+        task_ids = list(queryset.select_for_update().order_by(*ordering).values_list('pk', flat=True))
+        model = queryset.model
+        model.objects.bulk_update(
+            [model(pk=task_id, rank=rank) for task_id, rank in zip(task_ids, spread(len(task_ids)))],
+            ['rank'], batch_size=batch_size,
+        )
+    return len(task_ids)
+
+
+class BoardPlacer:
+    """Hands out ranks for a batch of card moves on one project's board.
+
+    ``tasks`` maps ids to the loaded cards: the moved ones and the neighbours
+    the board reported. Ranks handed out are remembered so later moves in the
+    batch see them before anything is written. Moved cards that haven't been
+    placed yet have stale ranks, so they are neither used as neighbours nor
+    looked up in the database.
+    """
+
+    def __init__(self, queryset, tasks, moved_ids):
+        self.queryset = queryset.exclude(pk__in=moved_ids)
+        self.tasks = tasks
+        self.pending = set(moved_ids)
+        self.placed = {}    # status -> sorted ranks handed out in this batch
+        self.last = {}      # status -> last stored rank of the column
+
+    def neighbour_rank(self, task_id, status):
+        task = self.tasks.get(task_id)
+        if task is None or task_id in self.pending or task.status != status:
+            return None
+        return task.rank or None
+
+    def place(self, task, status, above_id=None, below_id=None):
+        """Rank ``task`` in ``status`` between the given neighbours' cards."""
+        above = self.neighbour_rank(above_id, status)
+        below = self.neighbour_rank(below_id, status)
+        if above is not None and below is not None and above >= below:
+            below = None  # neighbours moved meanwhile; trust the card above
+        if above is None and below is None:
+            above = self.last_rank(status)
+        elif below is None:
+            below = self.next_rank(status, above)
+        elif above is None:
+            above = self.previous_rank(status, below)
+        rank = between(above, below)
+        self.pending.discard(task.pk)
+        insort(self.placed.setdefault(status, []), rank)
+        return rank
+
+    def column(self, status):
+        return self.queryset.filter(status=status).values_list('rank', flat=True)
+
+    def last_rank(self, status):
+        if status not in self.last:
+            self.last[status] = self.column(status).order_by('-rank').first()
+        candidates = [self.last[status]] + self.placed.get(status, [])[-1:]
+        return max(filter(None, candidates), default=None)
+
+    def next_rank(self, status, above):
+        placed = self.placed.get(status, [])
+        index = bisect_right(placed, above)
+        candidates = [self.column(status).filter(rank__gt=above).order_by('rank').first()]
+        candidates += placed[index:index + 1]
+        return min(filter(None, candidates), default=None)
+
+    def previous_rank(self, status, below):
+        placed = self.placed.get(status, [])
+        index = bisect_left(placed, below)
+        candidates = [self.column(status).filter(rank__lt=below).order_by('-rank').first()]
+        candidates += placed[max(index - 1, 0):index]
+        return max(filter(None, candidates), default=None)
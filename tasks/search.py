@@ -0,0 +1,259 @@
+"""Full-text search over task keys, titles, descriptions and comments.
+
+Every task has one row in the ``tasks_search`` table holding its key, title,
+description and all comment text:
+
+* SQLite: an FTS5 virtual table keyed by the task id (rowid), ranked with
+  bm25() weighted towards keys and titles.
+* PostgreSQL: a weighted ``tsvector`` per task with a GIN index, ranked with
+  ts_rank_cd().
+
+The table is created by migration 0006 and kept current by tasks.signals on
+task and comment saves and deletes. Paths that bypass model signals
+(queryset.update() of searched fields, bulk_create) must call
+``index_tasks`` for the tasks they touched, or ``rebuild_index``.
+
+Other databases fall back to unranked ``icontains`` matching.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+
+from .models import Task
+
+TABLE = 'tasks_search'
+
+# Task fields copied into the index; saves touching none of them skip reindexing
+INDEXED_FIELDS = ('key', 'title', 'description')
+
+_WORD = re.compile(r'\w+', re.UNICODE)
+
+
+def get_terms(query):
+    """Split user input into terms, each a tuple of word tokens.
+
+    Whitespace separates terms; punctuation inside a term (``PM-12``,
+    ``e-mail``) keeps its words together as a phrase. Anything that isn't a
+    word character is dropped, so the result is safe to splice into the
+    backend's query syntax.
+    """
+    terms = []
+    for chunk in query.split():
+        words = tuple(word.lower() for word in _WORD.findall(chunk))
+        if words:
+            terms.append(words)
+    return terms
+
+
+def _in_clause(column, values):
+    values = list(values)
+    return f'{column} IN ({", ".join(["%s"] * len(values))})', values
+
+
+def _visibility(user):
+    """SQL condition on ``t`` (tasks_task) matching Task.objects.visible_to(user)."""
+    from projects.access import accessible_project_ids
+
+    conditions, params = [], []
+    project_ids = accessible_project_ids(user)
+    if project_ids:
+        sql, values = _in_clause('t.project_id', project_ids)
+        conditions.append(sql)
+        params.extend(values)
+    if user.is_authenticated:
+        conditions.append('t.assignee_id = %s')
+        params.append(user.pk)
+    if not conditions:
+        return None, []
+    return f'({" OR ".join(conditions)})', params
+
+
+class SQLiteBackend:
+    # bm25 column weights: key, title, description, comments
+    WEIGHTS = (10.0, 5.0, 1.0, 0.5)
+
+    def create(self, cursor):
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} '
+            f"USING fts5(key, title, description, comments, tokenize='unicode61')"
+        )
+
+    def drop(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+    def index(self, cursor, task_ids=None):
+        if task_ids is None:
+            where, params = '1 = 1', []
+            cursor.execute(f'DELETE FROM {TABLE}')
+        else:
+            where, params = _in_clause('t.id', task_ids)
+            self.remove(cursor, task_ids)
+        # FTS5 has no upsert: replace the rows outright
+        cursor.execute(
+            f'INSERT INTO {TABLE} (rowid, key, title, description, comments) '
+            f'SELECT t.id, t.key, t.title, t.description, '
+            f"(SELECT group_concat(c.content, ' ') FROM tasks_comment c WHERE c.task_id = t.id) "
+            f'FROM tasks_task t WHERE {where}',
+            params,
+        )
+
+    def remove(self, cursor, task_ids):
+        where, params = _in_clause('rowid', task_ids)
+        cursor.execute(f'DELETE FROM {TABLE} WHERE {where}', params)
+
+    def match_expression(self, terms):
+        # Every term must match; the last word of each is a prefix so results
+        # show up while the user is still typing
+        return ' '.join('"{}"*'.format(' '.join(words)) for words in terms)
+
+    def search(self, cursor, terms, visibility, visibility_params, limit, offset):
+        weights = ', '.join(str(weight) for weight in self.WEIGHTS)
+        cursor.execute(
+            f'SELECT s.rowid, bm25({TABLE}, {weights}) AS score '
+            f'FROM {TABLE} s JOIN tasks_task t ON t.id = s.rowid '
+            f'WHERE {TABLE} MATCH %s AND {visibility} '
+            f'ORDER BY score LIMIT %s OFFSET %s',
+            [self.match_expression(terms), *visibility_params, limit, offset],
+        )
+        # bm25 is "lower is better"; report a positive, higher-is-better rank
+        return [(task_id, -score) for task_id, score in cursor.fetchall()]
+
+
+class PostgreSQLBackend:
+    def get_config(self):
+        return getattr(settings, 'SEARCH_CONFIG', 'english')
+
+    def create(self, cursor):
+        cursor.execute(
+            f'CREATE TABLE IF NOT EXISTS {TABLE} ('
+            # No foreign key: flush must be able to TRUNCATE tasks_task, and
+            # searches join tasks_task anyway, so stray rows are never returned
+            f'task_id bigint PRIMARY KEY, '
+            f'document tsvector NOT NULL)'
+        )
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {TABLE}_document_gin ON {TABLE} USING gin (document)')
+
+    def drop(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+    def index(self, cursor, task_ids=None):
+        where, params = _in_clause('t.id', task_ids) if task_ids is not None else ('TRUE', [])
+        config = self.get_config()
+        cursor.execute(
+            f'INSERT INTO {TABLE} (task_id, document) '
+            f'SELECT t.id, '
+            f"setweight(to_tsvector(%s::regconfig, coalesce(t.key, '')), 'A') || "
+            f"setweight(to_tsvector(%s::regconfig, coalesce(t.title, '')), 'B') || "
+            f"setweight(to_tsvector(%s::regconfig, coalesce(t.description, '')), 'C') || "
+            f"setweight(to_tsvector(%s::regconfig, coalesce(("
+            f"SELECT string_agg(c.content, ' ') FROM tasks_comment c WHERE c.task_id = t.id"
+            f"), '')), 'D') "
+            f'FROM tasks_task t WHERE {where} '
+            f'ON CONFLICT (task_id) DO UPDATE SET document = EXCLUDED.document',
+            [config, config, config, config, *params],
+        )
+
+    def remove(self, cursor, task_ids):
+        where, params = _in_clause('task_id', task_ids)
+        cursor.execute(f'DELETE FROM {TABLE} WHERE {where}', params)
+
+    def tsquery(self, terms):
+        # Phrases for punctuated terms, prefix match on each term's last word
+        return ' & '.join(
+            ' <-> '.join(words[:-1] + (f'{words[-1]}:*',)) for words in terms
+        )
+
+    def search(self, cursor, terms, visibility, visibility_params, limit, offset):
+        cursor.execute(
+            f'SELECT s.task_id, ts_rank_cd(s.document, query) AS score '
+            f'FROM {TABLE} s JOIN tasks_task t ON t.id = s.task_id, '
+            f'to_tsquery(%s::regconfig, %s) query '
+            f'WHERE s.document @@ query AND {visibility} '
+            f'ORDER BY score DESC, s.task_id LIMIT %s OFFSET %s',
+            [self.get_config(), self.tsquery(terms), *visibility_params, limit, offset],
+        )
+        return cursor.fetchall()
+
+
+class FallbackBackend:
+    """Unranked icontains matching for databases without a search index."""
+
+    def create(self, cursor):
+        pass
+
+    drop = create
+
+    def index(self, cursor, task_ids=None):
+        pass
+
+    def remove(self, cursor, task_ids):
+        pass
+
+
+BACKENDS = {
+    'sqlite': SQLiteBackend,
+    'postgresql': PostgreSQLBackend,
+}
+
+
+def get_backend(vendor=None):
+    return BACKENDS.get(vendor or connection.vendor, FallbackBackend)()
+
+
+def index_tasks(task_ids):
+    """(Re)build the search rows of the given tasks from the database."""
+    task_ids = list(task_ids)
+    if not task_ids:
+        return
+    with connection.cursor() as cursor:
+        get_backend().index(cursor, task_ids)
+
+
+def remove_tasks(task_ids):
+    task_ids = list(task_ids)
+    if not task_ids:
+        return
+    with connection.cursor() as cursor:
+        get_backend().remove(cursor, task_ids)
+
+
+def rebuild_index(batch_size=5000):
+    """Recreate every search row, a batch of task ids at a time."""
+    backend = get_backend()
+    with connection.cursor() as cursor:
+        backend.drop(cursor)
+        backend.create(cursor)
+    task_ids = Task.objects.order_by('pk').values_list('pk', flat=True)
+    last_id = 0
+    while True:
+        batch = list(task_ids.filter(pk__gt=last_id)[:batch_size])
+        if not batch:
+            break
+        index_tasks(batch)
+        last_id = batch[-1]
+
+
+def search_tasks(query, user, limit=20, offset=0):
+    """``[(task_id, rank)]`` of the tasks ``user`` can see, best match first."""
+    terms = get_terms(query)
+    if not terms:
+        return []
+    visibility, params = _visibility(user)
+    if visibility is None:
+        return []
+    backend = get_backend()
+    if isinstance(backend, FallbackBackend):
+        queryset = Task.objects.visible_to(user)
+        for words in terms:
+            phrase = ' '.join(words)
+            queryset = queryset.filter(
+                Q(key__icontains=phrase) | Q(title__icontains=phrase)
+                | Q(description__icontains=phrase) | Q(comments__content__icontains=phrase)
+            )
+        task_ids = queryset.distinct().values_list('pk', flat=True)[offset:offset + limit]
+        return [(task_id, 0.0) for task_id in task_ids]
+    with connection.cursor() as cursor:
+        return backend.search(cursor, terms, visibility, params, limit, offset)
+
@@ -0,0 +1,23 @@
+def serialize_task(task):
+    """Plain-dict representation of a task for the JSON endpoints.
+
+    Expects project, assignee, epic and sprint to be loaded with
+    select_related so serialising a page does not issue per-row queries.
+    """
+    return {
+        'id': task.id,
+        'key': task.key,
+        'title': task.title,
+        'status': task.status,
+        'status_display': task.get_status_display(),
+        'priority': task.priority,
+        'priority_display': task.get_priority_display(),
+        'issue_type': task.issue_type,
+        'story_points': task.story_points,
+        'due_date': task.due_date.isoformat() if task.due_date else None,
+        'project': {'id': task.project_id, 'key': task.project.key, 'name': task.project.name},
+        'assignee': task.assignee.username if task.assignee else None,
+        'epic': task.epic.name if task.epic else None,
+        'sprint': task.sprint.name if task.sprint else None,
+        'url': task.get_absolute_url(),
+    }
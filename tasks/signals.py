@@ -0,0 +1,59 @@
+from django.db.models import QuerySet
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from projects.models import Project
+from . import history, search, stats
+from .models import Task, Comment
+
+
+# Registered before the stats receivers, which re-snapshot the loaded values
+@receiver(post_save, sender=Task)
+def record_status_history_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    history.record_task_saved(instance, created)
+
+
+@receiver(post_delete, sender=Task)
+def record_status_history_on_delete(sender, instance, **kwargs):
+    history.record_task_deleted(instance)
+
+
+@receiver(post_save, sender=Task)
+def update_project_stats_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    stats.record_task_saved(instance, created)
+
+
+@receiver(post_delete, sender=Task)
+def update_project_stats_on_delete(sender, instance, **kwargs):
+    stats.record_task_deleted(instance)
+
+
+@receiver(post_save, sender=Task)
+def update_search_index_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields and not set(update_fields) & set(search.INDEXED_FIELDS)):
+        return
+    search.index_tasks([instance.pk])
+
+
+@receiver(post_delete, sender=Task)
+def remove_from_search_index(sender, instance, **kwargs):
+    search.remove_tasks([instance.pk])
+
+
+def _deletes_tasks(origin):
+    """Whether the delete that started at ``origin`` removes whole tasks."""
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model in (Task, Project)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def update_search_index_for_comment(sender, instance, raw=False, origin=None, **kwargs):
+    # A deleted task's comments go first; its search row is removed right after
+    if raw or (origin is not None and _deletes_tasks(origin)):
+        return
+    search.index_tasks([instance.task_id])
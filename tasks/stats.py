@@ -0,0 +1,171 @@
+"""Incremental maintenance of ProjectStats.
+
+Task saves and deletes are turned into per-project deltas and applied with a
+single ``UPDATE ... SET col = col + delta``. Paths that bypass model signals
+(queryset.update(), bulk_create) must call ``rebuild_project_stats`` for the
+projects they touched.
+
+Deletes only ever update existing rows. When a project (or its owner) is
+deleted, the cascade may remove the ProjectStats row before the tasks, and
+recreating it for a project that is going away fails the foreign key at
+commit. A row missing for any other reason is rebuilt on the next read by
+``get_project_stats``.
+"""
+from datetime import timedelta
+
+from django.db.models import F, Q, Sum, Count
+from django.utils import timezone
+
+from .models import Task, ProjectStats
+
+
+def task_contribution(status, story_points, time_logged):
+    """What a single task adds to its project's ProjectStats row."""
+    story_points = story_points or 0
+    return {
+        'task_count': 1,
+        f'{status}_count': 1,
+        'story_points_total': story_points,
+        'story_points_done': story_points if status == Task.Status.DONE else 0,
+        'time_logged_total': time_logged or timedelta(),
+    }
+
+
+def apply_delta(project_id, delta, create=True):
+    delta = {field: value for field, value in delta.items() if value}
+    if not delta:
+        return
+    updated = ProjectStats.objects.filter(project_id=project_id).update(
+        updated_at=timezone.now(),
+        **{field: F(field) + value for field, value in delta.items()}
+    )
+    if not updated and create:
+        # No row yet: build it from the tasks table, which already reflects this change
+        rebuild_project_stats([project_id])
+
+
+def _negate(values):
+    return {field: -value for field, value in values.items()}
+
+
+def _merge(*deltas):
+    merged = {}
+    for delta in deltas:
+        for field, value in delta.items():
+            merged[field] = merged[field] + value if field in merged else value
+    return merged
+
+
+def record_task_saved(task, created):
+    current = {name: getattr(task, name) for name in Task.TRACKED_FIELDS}
+    previous = getattr(task, '_loaded_values', None)
+    if created:
+        apply_delta(task.project_id, task_contribution(task.status, task.story_points, task.time_logged))
+    elif previous is None or set(previous) != set(Task.TRACKED_FIELDS):
+        # Unknown prior state (e.g. deferred fields): recount the affected projects
+        project_ids = {task.project_id}
+        if previous and previous.get('project_id'):
+            project_ids.add(previous['project_id'])
+        rebuild_project_stats(project_ids)
+    elif previous != current:
+        removed = _negate(task_contribution(
+            previous['status'], previous['story_points'], previous['time_logged']
+        ))
+        added = task_contribution(task.status, task.story_points, task.time_logged)
+        if previous['project_id'] == task.project_id:
+            apply_delta(task.project_id, _merge(removed, added))
+        else:
+            apply_delta(previous['project_id'], removed)
+            apply_delta(task.project_id, added)
+    task.remember_tracked_values()
+
+
+def record_status_changes(project_id, changes):
+    """One delta for many status changes in a project, made without save().
+    
+    ``changes`` holds (task, old_status) pairs, each task already carrying its
+    new status and unchanged story points and time logged.
+    """
+    deltas = []
+    for task, old_status in changes:
+        if old_status == task.status:
+            continue
+        deltas.append(_negate(task_contribution(old_status, task.story_points, task.time_logged)))
+        deltas.append(task_contribution(task.status, task.story_points, task.time_logged))
+    apply_delta(project_id, _merge(*deltas))
+
+
+def record_tasks_created(tasks):
+    """Add tasks created without save() (bulk_create) to their projects' stats."""
+    deltas = {}
+    for task in tasks:
+        contribution = task_contribution(task.status, task.story_points, task.time_logged)
+        deltas[task.project_id] = _merge(deltas.get(task.project_id, {}), contribution)
+    for project_id, delta in deltas.items():
+        apply_delta(project_id, delta)
+
+
+def record_task_deleted(task):
+    previous = getattr(task, '_loaded_values', None)
+    if previous is None or set(previous) != set(Task.TRACKED_FIELDS):
+        rebuild_project_stats([task.project_id], create=False)
+        return
+    apply_delta(previous['project_id'], _negate(task_contribution(
+        previous['status'], previous['story_points'], previous['time_logged']
+    )), create=False)
+
+
+def rebuild_project_stats(project_ids=None, batch_size=500, create=True):
+    """Recompute ProjectStats from scratch for the given projects (all if None).
+    
+    With ``create=False`` only projects that already have a row are recounted.
+    """
+    from projects.models import Project
+
+    if project_ids is None:
+        project_ids = Project.objects.order_by('pk').values_list('pk', flat=True).iterator()
+    project_ids = list(project_ids)
+
+    aggregates = {
+        'task_count': Count('pk'),
+        'story_points_total': Sum('story_points'),
+        'story_points_done': Sum('story_points', filter=Q(status=Task.Status.DONE)),
+        'time_logged_total': Sum('time_logged'),
+    }
+    for status in Task.Status.values:
+        aggregates[f'{status}_count'] = Count('pk', filter=Q(status=status))
+
+    for start in range(0, len(project_ids), batch_size):
+        batch = project_ids[start:start + batch_size]
+        if not create:
+            batch = list(ProjectStats.objects.filter(project_id__in=batch).values_list('project_id', flat=True))
+            if not batch:
+                continue
+        rows = {
+            row.pop('project_id'): row
+            for row in Task.objects.filter(project_id__in=batch).order_by()
+            .values('project_id').annotate(**aggregates)
+        }
+        stats = []
+        for project_id in batch:
+            row = rows.get(project_id, {})
+            stats.append(ProjectStats(
+                project_id=project_id,
+                **{field: row.get(field) or 0 for field in aggregates if field != 'time_logged_total'},
+                time_logged_total=row.get('time_logged_total') or timedelta(),
+            ))
+        ProjectStats.objects.bulk_create(
+            stats,
+            update_conflicts=True,
+            unique_fields=['project'],
+            update_fields=[field for field in aggregates] + ['updated_at'],
+        )
+
+
+def get_project_stats(project):
+    """The project's ProjectStats row, creating it on first use."""
+    try:
+        return project.stats
+    except ProjectStats.DoesNotExist:
+        rebuild_project_stats([project.pk])
+        return ProjectStats.objects.get(project=project)
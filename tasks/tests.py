@@ -1,7 +1,32 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+from unittest import mock
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, models
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.contrib.auth import get_user_model
-from projects.models import Project
-from .models import Task
+from projects.models import Project, Sprint
+from projects.access import accessible_project_ids, clear_access_cache
+from core.testing import QueryCountMixin, seed_workspace
+from .models import Task, Comment, Attachment, Label, TaskKeySequence, ProjectStats, TaskStatusChange, SprintDailyRollup
+from .stats import rebuild_project_stats
+from .history import rebuild_sprint_rollups
+from . import export, history, importer
+from .pagination import KeysetPaginator, InvalidCursor
+from .search import search_tasks
+from . import ranking
+from . import jql
 
 class TaskModelTest(TestCase):
     def setUp(self):
@@ -20,4 +45,1131 @@ class TaskModelTest(TestCase):
             assignee=self.user
         )
         self.assertEqual(task.title, 'Test Task')
-        self.assertEqual(task.project, self.project)
\ No newline at end of file
+        self.assertEqual(task.project, self.project)
+    
+    def test_task_keys_follow_project_sequence(self):
+        first = Task.objects.create(title='First', project=self.project)
+        second = Task.objects.create(title='Second', project=self.project)
+        self.assertEqual(first.key, f'{self.project.key}-1')
+        self.assertEqual(second.key, f'{self.project.key}-2')
+        
+        # Bulk allocations reserve a contiguous block
+        self.assertEqual(TaskKeySequence.allocate(self.project, count=10), 3)
+        third = Task.objects.create(title='Third', project=self.project)
+        self.assertEqual(third.key, f'{self.project.key}-13')
+
+    def test_status_summary(self):
+        Task.objects.create(title='A', project=self.project, key='TP-1', status=Task.Status.TODO)
+        Task.objects.create(title='B', project=self.project, key='TP-2', status=Task.Status.TODO)
+        Task.objects.create(title='C', project=self.project, key='TP-3', status=Task.Status.DONE)
+        member = get_user_model().objects.create_user(username='member', password='testpass123')
+        self.project.members.add(self.user, member)
+        
+        # The OR join over members duplicates rows; counts must not
+        queryset = Task.objects.filter(
+            models.Q(project__owner=self.user) | models.Q(project__members=self.user)
+        ).distinct()
+        with self.assertNumQueries(1):
+            summary = queryset.status_summary()
+        self.assertEqual(summary['todo'], 2)
+        self.assertEqual(summary['done'], 1)
+        self.assertEqual(summary['backlog'], 0)
+        self.assertEqual(summary['total'], 3)
+
+
+class VisibilityTest(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.owner = User.objects.create_user(username='owner', password='testpass123')
+        self.member = User.objects.create_user(username='member', password='testpass123')
+        self.outsider = User.objects.create_user(username='outsider', password='testpass123')
+        self.project = Project.objects.create(name='Visible', owner=self.owner)
+        self.project.members.add(self.owner, self.member)
+        self.hidden = Project.objects.create(name='Hidden', owner=self.outsider)
+        self.task = Task.objects.create(title='Shared', project=self.project)
+        self.assigned = Task.objects.create(title='Assigned', project=self.hidden, assignee=self.member)
+        Task.objects.create(title='Private', project=self.hidden)
+    
+    def test_visible_to(self):
+        self.assertQuerySetEqual(
+            Task.objects.visible_to(self.member).order_by('title'), ['Assigned', 'Shared'],
+            transform=lambda task: task.title,
+        )
+        self.assertQuerySetEqual(
+            Task.objects.visible_to(self.member, include_assigned=False), [self.task]
+        )
+        self.assertQuerySetEqual(Project.objects.visible_to(self.member), [self.project])
+        self.assertEqual(Task.objects.visible_to(self.outsider).count(), 2)
+    
+    def test_project_ids_are_resolved_once_per_user(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(accessible_project_ids(self.member), {self.project.pk})
+            accessible_project_ids(self.member)
+        sql = str(Task.objects.visible_to(self.member).query)
+        self.assertNotIn('DISTINCT', sql)
+        self.assertNotIn('projects_project_members', sql)
+        
+        self.hidden.members.add(self.member)
+        clear_access_cache(self.member)
+        self.assertEqual(accessible_project_ids(self.member), {self.project.pk, self.hidden.pk})
+    
+    def test_assignee_can_view_but_not_edit(self):
+        self.client.force_login(self.member)
+        response = self.client.get(reverse('tasks:task_detail', args=[self.assigned.pk]))
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(reverse('tasks:task_update', args=[self.assigned.pk]))
+        self.assertEqual(response.status_code, 404)
+        
+        self.client.force_login(self.outsider)
+        response = self.client.post(reverse('tasks:update_task_status', args=[self.task.pk]), {'status': 'done'})
+        self.assertEqual(response.status_code, 404)
+
+
+class KeysetPaginationTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='testuser', password='testpass123'
+        )
+        self.project = Project.objects.create(name='Test Project', owner=self.user)
+        now = timezone.now()
+        due_dates = [None, now, now, now + timedelta(days=1), None, now - timedelta(days=1), now]
+        priorities = ['high', 'low', 'high', 'medium', 'low', 'high', 'low']
+        for i, (due_date, priority) in enumerate(zip(due_dates, priorities), start=1):
+            Task.objects.create(
+                title=f'Task {i}', project=self.project, key=f'TP-{i}',
+                due_date=due_date, priority=priority
+            )
+    
+    def test_pages_cover_ordering_without_gaps(self):
+        paginator = KeysetPaginator(Task.objects.all(), 2)
+        expected = list(Task.objects.order_by(*paginator.get_ordering()).values_list('id', flat=True))
+        seen, cursor = [], None
+        while True:
+            page = paginator.page(cursor)
+            seen.extend(task.id for task in page)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(seen), 7)
+    
+    def test_invalid_cursor(self):
+        with self.assertRaises(InvalidCursor):
+            KeysetPaginator(Task.objects.all(), 2).page('not-a-cursor')
+    
+    def test_json_listing(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('tasks:task_list_json'), {'page_size': 5})
+        data = response.json()
+        self.assertEqual(len(data['results']), 5)
+        self.assertTrue(data['has_next'])
+        response = self.client.get(reverse('tasks:task_list_json'), {'page_size': 5, 'cursor': data['next_cursor']})
+        self.assertEqual(len(response.json()['results']), 2)
+        self.assertFalse(response.json()['has_next'])
+    
+    def test_list_view_paginates(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('tasks:task_list'), {'page_size': 3})
+        self.assertEqual(len(response.context['tasks']), 3)
+        self.assertEqual(response.context['total_count'], 7)
+        self.assertIn('next_page_url', response.context)
+
+
+@override_settings(KANBAN_COLUMN_SIZE=2)
+class KanbanViewTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='testuser', password='testpass123'
+        )
+        self.project = Project.objects.create(name='Test Project', owner=self.user)
+        for i in range(1, 6):
+            Task.objects.create(title=f'Done {i}', project=self.project, key=f'TP-{i}', status=Task.Status.DONE)
+        Task.objects.create(title='Todo', project=self.project, key='TP-6', status=Task.Status.TODO)
+        self.client.force_login(self.user)
+    
+    def test_columns_are_capped(self):
+        response = self.client.get(reverse('tasks:task_kanban', args=[self.project.id]))
+        columns = response.context['columns']
+        self.assertEqual(len(columns['done']['tasks']), 2)
+        self.assertEqual(columns['done']['count'], 5)
+        self.assertIsNotNone(columns['done']['next_cursor'])
+        self.assertEqual(len(columns['todo']['tasks']), 1)
+        self.assertIsNone(columns['todo']['next_cursor'])
+    
+    def test_load_more(self):
+        response = self.client.get(reverse('tasks:task_kanban', args=[self.project.id]))
+        cursor = response.context['columns']['done']['next_cursor']
+        url = reverse('tasks:kanban_column', args=[self.project.id, 'done'])
+        data = self.client.get(url, {'cursor': cursor}).json()
+        self.assertEqual(len(data['results']), 2)
+        data = self.client.get(url, {'cursor': data['next_cursor']}).json()
+        self.assertEqual(len(data['results']), 1)
+        self.assertFalse(data['has_next'])
+
+
+class KanbanMovesTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='testuser', password='testpass123'
+        )
+        self.project = Project.objects.create(name='Test Project', owner=self.user)
+        self.tasks = [
+            Task.objects.create(title=f'Task {i}', project=self.project, key=f'TP-{i}', story_points=2)
+            for i in range(1, 6)
+        ]
+        self.other = Task.objects.create(
+            title='Elsewhere', key='OP-1',
+            project=Project.objects.create(name='Other Project', owner=self.user),
+        )
+        self.url = reverse('tasks:kanban_moves', args=[self.project.id])
+        self.client.force_login(self.user)
+    
+    def post_moves(self, moves):
+        return self.client.post(self.url, json.dumps({'moves': moves}), content_type='application/json')
+    
+    def test_batch_is_applied_with_constant_queries(self):
+        def moves(status):
+            return [{'task_id': task.pk, 'status': status} for task in self.tasks]
+        self.post_moves(moves('todo'))  # warm the access cache
+        with CaptureQueriesContext(connection) as small:
+            self.post_moves(moves('in_progress')[:1])
+        with CaptureQueriesContext(connection) as large:
+            data = self.post_moves(moves('done')).json()
+        self.assertEqual(len(large), len(small))
+        self.assertEqual([item['id'] for item in data['updated']], [task.pk for task in self.tasks])
+        self.assertEqual(set(Task.objects.filter(project=self.project).values_list('status', flat=True)), {'done'})
+        stats = ProjectStats.objects.get(project=self.project)
+        self.assertEqual((stats.done_count, stats.todo_count, stats.story_points_done), (5, 0, 10))
+    
+    def test_tasks_are_read_inside_the_transaction(self):
+        # Otherwise a concurrent move could change the old statuses the deltas use
+        with CaptureQueriesContext(connection) as queries:
+            self.post_moves([{'task_id': self.tasks[0].pk, 'status': 'done'}])
+        statements = [query['sql'] for query in queries]
+        transaction_start = next(i for i, sql in enumerate(statements) if sql.startswith('SAVEPOINT'))
+        task_read = next(i for i, sql in enumerate(statements) if sql.startswith('SELECT "tasks_task"."id"'))
+        self.assertLess(transaction_start, task_read)
+    
+    def test_last_move_of_a_task_wins(self):
+        task = self.tasks[0]
+        data = self.post_moves([
+            {'task_id': task.pk, 'status': 'in_progress'},
+            {'task_id': task.pk, 'status': 'in_review'},
+        ]).json()
+        task.refresh_from_db()
+        self.assertEqual(data['updated'], [
+            {'id': task.pk, 'status': 'in_review', 'status_display': 'In Review', 'rank': task.rank}
+        ])
+        self.assertEqual(task.status, 'in_review')
+        stats = ProjectStats.objects.get(project=self.project)
+        self.assertEqual((stats.in_review_count, stats.in_progress_count, stats.backlog_count), (1, 0, 4))
+    
+    def test_invalid_moves_are_reported(self):
+        data = self.post_moves([
+            {'task_id': self.tasks[0].pk, 'status': 'nope'},
+            {'task_id': self.tasks[1].pk, 'status': 'done', 'above_id': 'x'},
+            {'task_id': self.other.pk, 'status': 'done'},
+            {'task_id': self.tasks[2].pk, 'status': 'done'},
+        ]).json()
+        self.assertEqual([item['id'] for item in data['updated']], [self.tasks[2].pk])
+        self.assertEqual(
+            {item['id']: item['error'] for item in data['failed']},
+            {self.tasks[0].pk: 'Invalid status', self.tasks[1].pk: 'Invalid neighbour',
+             self.other.pk: 'Task not found'},
+        )
+        self.other.refresh_from_db()
+        self.assertEqual(self.other.status, Task.Status.BACKLOG)
+        self.assertEqual(self.post_moves([]).status_code, 400)
+    
+    def column(self, status=Task.Status.BACKLOG):
+        return list(Task.objects.filter(project=self.project, status=status)
+                    .order_by('rank', 'pk').values_list('key', flat=True))
+    
+    def test_cards_are_ranked_between_their_neighbours(self):
+        first, second, third, fourth, fifth = self.tasks
+        self.assertEqual(self.column(), ['TP-1', 'TP-2', 'TP-3', 'TP-4', 'TP-5'])
+        # Reordering rewrites only the moved card
+        with CaptureQueriesContext(connection) as captured:
+            self.post_moves([{'task_id': fifth.pk, 'status': 'backlog', 'above_id': first.pk, 'below_id': second.pk}])
+        self.assertEqual(len([q for q in captured if q['sql'].startswith('UPDATE "tasks_task"')]), 1)
+        self.assertEqual(self.column(), ['TP-1', 'TP-5', 'TP-2', 'TP-3', 'TP-4'])
+        
+        # Cards moved together, top to bottom, may neighbour each other
+        self.post_moves([
+            {'task_id': third.pk, 'status': 'todo', 'above_id': None, 'below_id': fourth.pk},
+            {'task_id': fourth.pk, 'status': 'todo', 'above_id': third.pk, 'below_id': None},
+            {'task_id': first.pk, 'status': 'backlog', 'above_id': second.pk, 'below_id': None},
+        ])
+        self.assertEqual(self.column(), ['TP-5', 'TP-2', 'TP-1'])
+        self.assertEqual(self.column('todo'), ['TP-3', 'TP-4'])
+        
+        # The kanban board shows the columns in rank order
+        response = self.client.get(reverse('tasks:task_kanban', args=[self.project.id]))
+        self.assertEqual([task.key for task in response.context['columns']['backlog']['tasks']],
+                         ['TP-5', 'TP-2', 'TP-1'])
+    
+    def test_card_above_hidden_cards_keeps_them_below(self):
+        # The board only knows the card above; the next one is looked up
+        first, second = self.tasks[:2]
+        self.post_moves([{'task_id': self.tasks[4].pk, 'status': 'backlog', 'above_id': first.pk}])
+        self.assertEqual(self.column(), ['TP-1', 'TP-5', 'TP-2', 'TP-3', 'TP-4'])
+    
+    def test_project_must_be_visible(self):
+        self.client.force_login(get_user_model().objects.create_user(username='outsider', password='x'))
+        response = self.post_moves([{'task_id': self.tasks[0].pk, 'status': 'done'}])
+        self.assertEqual(response.status_code, 404)
+    
+    def test_single_status_update_only_writes_status(self):
+        task = self.tasks[0]
+        Task.objects.filter(pk=task.pk).update(title='Changed elsewhere')
+        with CaptureQueriesContext(connection) as captured:
+            self.client.post(reverse('tasks:update_task_status', args=[task.pk]), {'status': 'done'})
+        update = next(query['sql'] for query in captured if query['sql'].startswith('UPDATE "tasks_task"'))
+        self.assertNotIn('"title"', update)
+        task.refresh_from_db()
+        self.assertEqual((task.title, task.status), ('Changed elsewhere', 'done'))
+
+
+class RankingTest(TestCase):
+    def test_between(self):
+        cases = [(None, None), ('i', None), (None, 'i'), ('a', 'b'), ('a', 'a1'), ('zzzzzz', None), (None, '0001'), ('', 'i')]
+        for before, after in cases:
+            rank = ranking.between(before, after)
+            self.assertTrue((before or '') < rank and (after is None or rank < after), (before, after, rank))
+            self.assertFalse(rank.endswith('0'))
+        with self.assertRaises(ranking.RankError):
+            ranking.between('b', 'a')
+        with self.assertRaises(ranking.RankError):
+            ranking.between('a', 'a0')
+    
+    def test_ranks_stay_short(self):
+        ranks = ranking.spread(1000)
+        self.assertEqual(ranks, sorted(ranks))
+        self.assertEqual(len(set(ranks)), 1000)
+        # Appending and prepending step away from the neighbour
+        rank = ranks[-1]
+        for _ in range(1000):
+            rank = ranking.between(rank, None)
+        self.assertLessEqual(len(rank), ranking.WIDTH)
+        # Halving the same gap grows by a digit every few moves
+        low, high = ranks[0], ranks[1]
+        for _ in range(50):
+            high = ranking.between(low, high)
+        self.assertLess(len(high), 20)
+    
+    def test_new_tasks_go_to_the_bottom_and_rebalance(self):
+        user = get_user_model().objects.create_user(username='testuser', password='testpass123')
+        project = Project.objects.create(name='Test Project', owner=user)
+        tasks = [Task.objects.create(title=f'Task {i}', project=project) for i in range(3)]
+        ranks = [task.rank for task in tasks]
+        self.assertEqual(ranks, sorted(ranks))
+        Task.objects.filter(pk=tasks[1].pk).update(rank='')
+        Task.objects.filter(pk=tasks[0].pk).update(rank='z' * 20)
+        call_command('rebalance_task_ranks', stdout=StringIO())
+        column = Task.objects.filter(project=project).order_by('rank', 'pk')
+        self.assertEqual([task.pk for task in column], [tasks[1].pk, tasks[2].pk, tasks[0].pk])
+        self.assertTrue(all(0 < len(task.rank) <= ranking.WIDTH for task in column))
+
+
+class ProjectStatsTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='testuser', password='testpass123'
+        )
+        self.project = Project.objects.create(name='Test Project', owner=self.user)
+        self.other = Project.objects.create(name='Other Project', owner=self.user)
+    
+    def snapshot(self, project):
+        stats = ProjectStats.objects.get(project=project)
+        return {field.name: getattr(stats, field.name) for field in ProjectStats._meta.fields
+                if field.name not in ('project', 'updated_at')}
+    
+    def assertStatsConsistent(self):
+        incremental = [self.snapshot(self.project), self.snapshot(self.other)]
+        rebuild_project_stats()
+        self.assertEqual(incremental, [self.snapshot(self.project), self.snapshot(self.other)])
+    
+    def test_incremental_updates_match_rebuild(self):
+        task = Task.objects.create(title='A', project=self.project, story_points=5)
+        Task.objects.create(title='B', project=self.project, story_points=3, status=Task.Status.TODO)
+        Task.objects.create(title='C', project=self.other, story_points=2)
+        self.assertEqual(self.snapshot(self.project)['task_count'], 2)
+        
+        task = Task.objects.get(pk=task.pk)
+        task.status = Task.Status.DONE
+        task.time_logged = timedelta(hours=2)
+        task.save()
+        stats = self.snapshot(self.project)
+        self.assertEqual(stats['done_count'], 1)
+        self.assertEqual(stats['backlog_count'], 0)
+        self.assertEqual(stats['story_points_done'], 5)
+        self.assertEqual(stats['time_logged_total'], timedelta(hours=2))
+        self.assertStatsConsistent()
+        
+        # Saving the same instance twice must not double count
+        task.story_points = 8
+        task.save()
+        task.save()
+        self.assertEqual(self.snapshot(self.project)['story_points_total'], 11)
+        
+        task.project = self.other
+        task.save()
+        self.assertStatsConsistent()
+        
+        Task.objects.get(pk=task.pk).delete()
+        self.assertEqual(self.snapshot(self.other)['task_count'], 1)
+        self.assertStatsConsistent()
+    
+    def test_rebuild_command(self):
+        Task.objects.create(title='A', project=self.project)
+        ProjectStats.objects.all().delete()
+        call_command('rebuild_project_stats', stdout=StringIO())
+        self.assertEqual(self.snapshot(self.project)['task_count'], 1)
+        self.assertEqual(self.snapshot(self.other)['task_count'], 0)
+
+
+class ProjectDeleteTest(TransactionTestCase):
+    """Deletes must commit: a plain TestCase never checks deferred foreign keys."""
+    
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='testuser', password='testpass123'
+        )
+        self.project = Project.objects.create(name='Test Project', owner=self.user)
+        for i in range(3):
+            Task.objects.create(title=f'Task {i}', project=self.project, story_points=2)
+        self.assertEqual(ProjectStats.objects.get(project=self.project).task_count, 3)
+    
+    def test_delete_project(self):
+        self.project.delete()
+        self.assertFalse(ProjectStats.objects.exists())
+        self.assertFalse(Task.objects.exists())
+    
+    def test_delete_owner(self):
+        self.user.delete()
+        self.assertFalse(Project.objects.exists())
+        self.assertFalse(ProjectStats.objects.exists())
+    
+    def test_delete_task_keeps_stats(self):
+        Task.objects.filter(project=self.project).first().delete()
+        self.assertEqual(ProjectStats.objects.get(project=self.project).task_count, 2)
+
+
+class ExportTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.workspace = seed_workspace(projects=2, tasks_per_project=15, comments_per_task=0)
+        cls.owner = cls.workspace['owner']
+        cls.project = cls.workspace['projects'][0]
+        cls.outsider = get_user_model().objects.create_user(username='outsider', password='testpass123')
+        Task.objects.create(title='Hidden', project=Project.objects.create(name='Hidden', owner=cls.outsider))
+    
+    def setUp(self):
+        self.client.force_login(self.owner)
+    
+    def test_csv_download(self):
+        response = self.client.get(reverse('tasks:task_export'), {'status': 'done'})
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment; filename="tasks-', response['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        expected = Task.objects.visible_to(self.owner).filter(status='done')
+        self.assertEqual(sorted(int(row['id']) for row in rows), sorted(expected.values_list('pk', flat=True)))
+        task = expected.filter(labels__isnull=False).order_by('pk').first()
+        row = next(row for row in rows if int(row['id']) == task.pk)
+        self.assertEqual(row['labels'], '; '.join(sorted(task.labels.values_list('name', flat=True))))
+        self.assertEqual(row['project'], task.project.key)
+    
+    def test_invalid_format(self):
+        response = self.client.get(reverse('tasks:task_export'), {'format': 'xlsx'})
+        self.assertEqual(response.status_code, 400)
+    
+    def test_queries_per_chunk_are_constant(self):
+        tasks = Task.objects.filter(project__in=self.workspace['projects'])
+        with CaptureQueriesContext(connection) as captured:
+            lines = list(export.export_tasks(tasks, 'jsonl', chunk_size=10))
+        self.assertEqual(len(lines), 30)
+        # The task query, then labels, components and both version relations per chunk
+        self.assertEqual(len(captured), 1 + 4 * 3)
+        self.assertEqual(json.loads(lines[0])['key'], tasks.order_by('pk').first().key)
+    
+    def test_command(self):
+        out = StringIO()
+        call_command('export_tasks', self.project.key, '--format', 'jsonl', '--chunk-size', '4', stdout=out)
+        keys = [json.loads(line)['key'] for line in out.getvalue().splitlines()]
+        self.assertEqual(keys, list(self.project.tasks.order_by('pk').values_list('key', flat=True)))
+        with self.assertRaises(CommandError):
+            call_command('export_tasks', 'NOPE', stdout=StringIO())
+
+
+class ImportTest(QueryCountMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.workspace = seed_workspace(projects=1, tasks_per_project=3, comments_per_task=0)
+        cls.owner = cls.workspace['owner']
+        cls.project = cls.workspace['projects'][0]
+        cls.outsider = get_user_model().objects.create_user(username='outsider', password='testpass123')
+        cls.hidden = Project.objects.create(name='Hidden', owner=cls.outsider)
+    
+    def csv_file(self, rows):
+        output = io.StringIO()
+        writer = csv.DictWriter(output, fieldnames=export.COLUMNS + ('description',), extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
+        return io.StringIO(output.getvalue())
+    
+    def rows(self, count, **fields):
+        return [{
+            'title': f'Imported {i}', 'project': self.project.key, 'status': 'todo',
+            'assignee': 'member1', 'epic': 'Epic 0', 'sprint': 'Sprint 1', 'story_points': 3,
+            'labels': 'backend; migrated', 'components': 'Component 1', 'fix_versions': '1.0',
+            'time_logged_hours': '1.5', 'due_date': '2026-01-31', **fields,
+        } for i in range(count)]
+    
+    def run_import(self, rows, **kwargs):
+        return importer.TaskImporter(**kwargs).run(importer.read_rows(self.csv_file(rows), 'csv'))
+    
+    def test_import(self):
+        result = self.run_import(self.rows(5))
+        self.assertEqual((result['created'], result['failed']), (5, 0))
+        tasks = list(Task.objects.filter(title__startswith='Imported').order_by('pk'))
+        self.assertEqual([task.key for task in tasks], [f'{self.project.key}-{n}' for n in range(4, 9)])
+        task = tasks[0]
+        self.assertEqual((task.assignee.username, task.epic.name, task.sprint.name), ('member1', 'Epic 0', 'Sprint 1'))
+        self.assertEqual(sorted(task.labels.values_list('name', flat=True)), ['backend', 'migrated'])
+        self.assertEqual(task.time_logged, timedelta(hours=1.5))
+        self.assertEqual([task.rank for task in tasks], sorted(task.rank for task in tasks))
+        self.assertEqual(ProjectStats.objects.get(project=self.project).task_count, 8)
+        incremental = ProjectStats.objects.get(project=self.project).todo_count
+        rebuild_project_stats([self.project.pk])
+        self.assertEqual(ProjectStats.objects.get(project=self.project).todo_count, incremental)
+        self.assertEqual(len(search_tasks('Imported', self.owner)), 5)
+        self.assertEqual(TaskStatusChange.objects.filter(task__in=tasks, from_status='').count(), 5)
+    
+    def test_query_count_does_not_grow_with_rows(self):
+        with CaptureQueriesContext(connection) as small:
+            self.run_import(self.rows(2))
+        with CaptureQueriesContext(connection) as large:
+            self.run_import(self.rows(40))
+        # The second run has no labels to create, so it can only be cheaper
+        self.assertLessEqual(len(large), len(small))
+    
+    def test_invalid_rows_are_reported(self):
+        rows = self.rows(1) + self.rows(1, status='nope') + self.rows(1, assignee='outsider') \
+            + self.rows(1, project=self.hidden.key) + self.rows(1, title='')
+        result = self.run_import(rows, user=self.owner)
+        self.assertEqual(result['created'], 1)
+        self.assertEqual([error['line'] for error in result['errors']], [3, 4, 5, 6])
+        self.assertEqual(result['errors'][0]['error'], 'Invalid status: nope')
+        self.assertEqual(result['errors'][2]['error'], f'Unknown project: {self.hidden.key}')
+    
+    def test_malformed_numbers_and_dates_are_line_errors(self):
+        rows = [self.rows(1, time_logged_hours=hours)[0] for hours in ('NaN', 'sNaN', 'Infinity', '1e400', '1e12', '-1')]
+        rows += [self.rows(1, due_date=day)[0] for day in ('2024-02-30', '2024-13-01T10:00:00', 'soon')]
+        rows += self.rows(1)
+        result = self.run_import(rows)
+        self.assertEqual((result['created'], result['failed']), (1, 9))
+        self.assertEqual(result['errors'][0]['error'], 'Invalid number of hours: NaN')
+        self.assertEqual(result['errors'][6]['error'], 'Invalid due date: 2024-02-30')
+        
+        # JSON numbers can be infinite too
+        lines = [json.dumps({'title': 'Big', 'project': self.project.key, 'story_points': float('inf')})]
+        result = importer.TaskImporter().run(importer.read_rows(lines, 'jsonl'))
+        self.assertEqual(result['errors'], [{'line': 1, 'error': 'Invalid story points: inf'}])
+    
+    def test_dry_run_writes_nothing(self):
+        result = self.run_import(self.rows(3), dry_run=True)
+        self.assertEqual(result['created'], 3)
+        self.assertFalse(Task.objects.filter(title__startswith='Imported').exists())
+        self.assertFalse(Label.objects.filter(name='migrated').exists())
+    
+    def test_command_resumes_from_checkpoint(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'tasks.jsonl')
+        with open(path, 'w') as output:
+            for row in self.rows(5):
+                output.write(json.dumps(row) + '\n')
+        checkpoint = os.path.join(directory, 'checkpoint.json')
+        with open(checkpoint, 'w') as output:
+            json.dump({'last_line': 2}, output)
+        call_command('import_tasks', path, '--checkpoint', checkpoint, '--batch-size', '2',
+                     stdout=StringIO(), stderr=StringIO())
+        titles = Task.objects.filter(title__startswith='Imported').values_list('title', flat=True)
+        self.assertEqual(sorted(titles), ['Imported 2', 'Imported 3', 'Imported 4'])
+        with open(checkpoint) as source:
+            self.assertEqual(json.load(source)['last_line'], 5)
+    
+    def test_upload(self):
+        self.client.force_login(self.owner)
+        content = ''.join(json.dumps(row) + '\n' for row in self.rows(2))
+        upload = SimpleUploadedFile('tasks.jsonl', content.encode())
+        response = self.client.post(reverse('tasks:task_import'), {'file': upload})
+        self.assertEqual(response.json()['created'], 2)
+        self.assertEqual(self.project.tasks.count(), 5)
+        response = self.client.post(reverse('tasks:task_import'), {'file': SimpleUploadedFile('tasks.xls', b'')})
+        self.assertEqual(response.status_code, 400)
+
+
+class SprintHistoryTest(QueryCountMixin, TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='testuser', password='testpass123'
+        )
+        self.project = Project.objects.create(name='Test Project', owner=self.user)
+        self.today = timezone.localdate()
+        self.sprint = Sprint.objects.create(
+            name='Sprint 1', project=self.project,
+            start_date=self.today - timedelta(days=2), end_date=self.today + timedelta(days=7),
+        )
+        self.tasks = [
+            Task.objects.create(title=f'Task {i}', project=self.project, sprint=self.sprint, story_points=3)
+            for i in range(4)
+        ]
+        self.client.force_login(self.user)
+    
+    def rollup(self):
+        return SprintDailyRollup.objects.get(sprint=self.sprint, date=self.today)
+    
+    def assertRollupConsistent(self):
+        incremental = self.rollup()
+        rebuild_sprint_rollups([self.sprint.pk])
+        rebuilt = self.rollup()
+        for field in history.REPORTED_FIELDS:
+            self.assertEqual(getattr(incremental, field), getattr(rebuilt, field), field)
+    
+    def test_transitions_are_logged_and_rolled_up(self):
+        task = Task.objects.get(pk=self.tasks[0].pk)
+        task.status = Task.Status.DONE
+        task.save()
+        task.story_points = 5  # no transition, but a change of scope
+        task.save()
+        Task.objects.get(pk=self.tasks[1].pk).delete()
+        moved = Task.objects.get(pk=self.tasks[2].pk)
+        moved.sprint = None
+        moved.save()
+        
+        rollup = self.rollup()
+        self.assertEqual((rollup.total_points, rollup.remaining_points, rollup.completed_points), (8, 3, 5))
+        self.assertEqual((rollup.total_tasks, rollup.remaining_tasks), (2, 1))
+        self.assertRollupConsistent()
+        
+        changes = TaskStatusChange.objects.filter(task=task)
+        self.assertEqual(
+            list(changes.values_list('from_status', 'to_status')),
+            [('', 'backlog'), ('backlog', 'done')],
+        )
+        # The log outlives deleted tasks
+        self.assertEqual(TaskStatusChange.objects.filter(task=None).count(), 1)
+    
+    def test_bulk_paths_are_recorded(self):
+        response = self.client.post(
+            reverse('tasks:task_bulk_update'),
+            json.dumps({'task_ids': [task.pk for task in self.tasks[:2]], 'status': 'done'}),
+            content_type='application/json',
+        )
+        self.assertEqual(len(response.json()['updated']), 2)
+        self.client.post(
+            reverse('tasks:kanban_moves', args=[self.project.pk]),
+            json.dumps({'moves': [{'task_id': self.tasks[2].pk, 'status': 'in_progress'}]}),
+            content_type='application/json',
+        )
+        self.assertEqual(
+            TaskStatusChange.objects.exclude(from_status='').filter(sprint=self.sprint).count(), 3
+        )
+        self.assertEqual(self.rollup().remaining_points, 6)
+        self.assertRollupConsistent()
+    
+    def test_burndown_reads_only_rollups(self):
+        SprintDailyRollup.objects.filter(sprint=self.sprint).delete()
+        SprintDailyRollup.objects.bulk_create([
+            SprintDailyRollup(sprint=self.sprint, date=self.sprint.start_date - timedelta(days=1),
+                              total_points=12, remaining_points=12, total_tasks=4, remaining_tasks=4),
+            SprintDailyRollup(sprint=self.sprint, date=self.today,
+                              total_points=12, remaining_points=6, total_tasks=4, remaining_tasks=2),
+        ])
+        # session, user, project ids, sprint, rollups
+        with self.assertMaxQueries(5):
+            data = self.client.get(reverse('tasks:sprint_burndown', args=[self.sprint.pk])).json()
+        days = data['days']
+        self.assertEqual(len(days), 3)
+        self.assertEqual([day['remaining_points'] for day in days], [12, 12, 6])
+        self.assertEqual(days[0]['ideal_points'], 12)
+        self.assertEqual(days[-1]['completed_points'], 6)
+        
+        outsider = get_user_model().objects.create_user(username='outsider', password='x')
+        self.client.force_login(outsider)
+        response = self.client.get(reverse('tasks:sprint_burndown', args=[self.sprint.pk]))
+        self.assertEqual(response.status_code, 404)
+    
+    def test_velocity(self):
+        previous = Sprint.objects.create(
+            name='Sprint 0', project=self.project,
+            start_date=self.today - timedelta(days=20), end_date=self.today - timedelta(days=7),
+        )
+        SprintDailyRollup.objects.bulk_create([
+            SprintDailyRollup(sprint=previous, date=previous.start_date, total_points=10, remaining_points=10),
+            SprintDailyRollup(sprint=previous, date=previous.end_date, total_points=13, remaining_points=4),
+            # Work finished after the sprint ended doesn't count
+            SprintDailyRollup(sprint=previous, date=self.today - timedelta(days=1), total_points=13, remaining_points=0),
+        ])
+        data = self.client.get(reverse('tasks:project_velocity', args=[self.project.pk])).json()
+        self.assertEqual([row['name'] for row in data['sprints']], ['Sprint 0', 'Sprint 1'])
+        self.assertEqual(data['sprints'][0]['committed_points'], 10)
+        self.assertEqual(data['sprints'][0]['completed_points'], 9)
+        self.assertEqual(data['sprints'][1]['committed_points'], 12)
+        self.assertEqual(data['average_velocity'], 9)
+    
+    def test_snapshot_command(self):
+        SprintDailyRollup.objects.all().delete()
+        call_command('snapshot_sprint_rollups', stdout=StringIO())
+        self.assertEqual(self.rollup().total_points, 12)
+
+
+class SprintDeleteTest(TransactionTestCase):
+    """Deletes must commit: a plain TestCase never checks deferred foreign keys."""
+    
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='testuser', password='testpass123'
+        )
+        self.project = Project.objects.create(name='Test Project', owner=self.user)
+        today = timezone.localdate()
+        self.sprint = Sprint.objects.create(
+            name='Sprint 1', project=self.project,
+            start_date=today - timedelta(days=2), end_date=today + timedelta(days=7),
+        )
+        for i in range(3):
+            Task.objects.create(title=f'Task {i}', project=self.project, sprint=self.sprint, story_points=3)
+    
+    def test_delete_project(self):
+        # Fails on the rollups alone, whatever happens to ProjectStats
+        with mock.patch('tasks.stats.rebuild_project_stats'):
+            self.project.delete()
+        self.assertFalse(Sprint.objects.exists())
+        self.assertFalse(SprintDailyRollup.objects.exists())
+    
+    def test_delete_sprint(self):
+        self.sprint.delete()
+        self.assertFalse(SprintDailyRollup.objects.exists())
+        self.assertEqual(Task.objects.filter(sprint=None).count(), 3)
+    
+    def test_first_delete_of_the_day_rebuilds_after_commit(self):
+        SprintDailyRollup.objects.all().delete()
+        Task.objects.filter(project=self.project).first().delete()
+        rollup = SprintDailyRollup.objects.get(sprint=self.sprint)
+        self.assertEqual((rollup.total_tasks, rollup.total_points), (2, 6))
+
+
+class TaskViewQueryCountTest(QueryCountMixin, TestCase):
+    """Upper bounds on SQL queries per page; N+1 regressions fail here.
+    
+    Every page pays for session, user and the accessible project ids first.
+    """
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.workspace = seed_workspace()
+        cls.project = cls.workspace['projects'][0]
+        cls.task = cls.project.tasks.order_by('id').first()
+    
+    def setUp(self):
+        self.client.force_login(self.workspace['owner'])
+    
+    def test_task_list(self):
+        with self.assertMaxQueries(7):
+            response = self.client.get(reverse('tasks:task_list'))
+        self.assertEqual(len(response.context['tasks']), 50)
+        
+        label = self.workspace['labels'][0]
+        with self.assertMaxQueries(8):
+            self.client.get(reverse('tasks:task_list'), {'status': 'todo', 'labels': [label.pk]})
+    
+    def test_task_list_json(self):
+        with self.assertMaxQueries(4):
+            self.client.get(reverse('tasks:task_list_json'), {'page_size': 100})
+    
+    def test_kanban(self):
+        with self.assertMaxQueries(6):
+            self.client.get(reverse('tasks:task_kanban', args=[self.project.pk]))
+    
+    def test_task_detail(self):
+        # + the task, then comments with authors, labels, components, both
+        # version relations and attachments with uploaders
+        with self.assertMaxQueries(10):
+            response = self.client.get(reverse('tasks:task_detail', args=[self.task.pk]))
+        self.assertContains(response, 'Comment 2')
+        self.assertContains(response, self.task.labels.first().name)
+        
+        owner = self.workspace['owner']
+        Comment.objects.bulk_create([
+            Comment(task=self.task, author=owner, content=f'Thread {i}') for i in range(30)
+        ])
+        Attachment.objects.bulk_create([
+            Attachment(task=self.task, file=f'task_attachments/file{i}.txt', uploaded_by=owner) for i in range(3)
+        ])
+        with self.assertMaxQueries(10):
+            response = self.client.get(reverse('tasks:task_detail', args=[self.task.pk]))
+        self.assertEqual(len(response.context['comments']), 20)
+        self.assertContains(response, 'file2.txt')
+        
+        # Older comments page through the JSON endpoint, newest first
+        url = reverse('tasks:task_comments', args=[self.task.pk])
+        seen = [comment.pk for comment in response.context['comments']]
+        cursor = response.context['comments_next_cursor']
+        while cursor:
+            data = self.client.get(url, {'cursor': cursor}).json()
+            seen += [comment['id'] for comment in data['results']]
+            cursor = data['next_cursor']
+        expected = self.task.comments.order_by('-created_at', '-id').values_list('pk', flat=True)
+        self.assertEqual(seen, list(expected))
+    
+    def test_admin_changelists(self):
+        for model in ('task', 'label', 'component', 'version', 'comment', 'attachment'):
+            with self.subTest(model=model), self.assertMaxQueries(6):
+                response = self.client.get(reverse(f'admin:tasks_{model}_changelist'))
+                self.assertEqual(response.status_code, 200)
+
+
+class GenerateDataTest(TestCase):
+    def test_generated_data_is_consistent(self):
+        call_command('generate_data', users=5, projects=3, tasks=120, batch_size=50, stdout=StringIO())
+        self.assertEqual(Task.objects.count(), 120)
+        for project in Project.objects.all():
+            keys = set(project.tasks.values_list('key', flat=True))
+            count = len(keys)
+            self.assertEqual(keys, {f'{project.key}-{n}' for n in range(1, count + 1)})
+            self.assertEqual(project.task_key_sequence.last_number, count)
+            self.assertEqual(project.stats.task_count, count)
+        
+        # Every task has the creation entry a normal save would have logged
+        self.assertEqual(
+            set(TaskStatusChange.objects.filter(from_status='').values_list('task_id', 'to_status', 'sprint_id')),
+            set(Task.objects.values_list('pk', 'status', 'sprint_id')),
+        )
+        for sprint in Sprint.objects.filter(tasks__isnull=False).distinct():
+            rollup = sprint.daily_rollups.get()
+            self.assertEqual(rollup.total_tasks, sprint.tasks.count())
+        
+        # New tasks continue the generated sequence
+        project = Project.objects.get(key='GEN0')
+        count = project.tasks.count()
+        task = Task.objects.create(title='After', project=project)
+        self.assertEqual(task.key, f'GEN0-{count + 1}')
+    
+    def test_prefix_must_be_unused(self):
+        call_command('generate_data', users=2, projects=1, tasks=5, stdout=StringIO())
+        with self.assertRaises(CommandError):
+            call_command('generate_data', users=2, projects=1, tasks=5, stdout=StringIO())
+    
+    def test_only_exact_keys_conflict(self):
+        owner = get_user_model().objects.create_user(username='owner', password='x')
+        # Shares the prefix but none of the generated keys
+        Project.objects.create(name='General', key='GEN', owner=owner)
+        call_command('generate_data', users=2, projects=1, tasks=5, prefix='gen', stdout=StringIO())
+        self.assertTrue(Project.objects.filter(key='GEN0').exists())
+        
+        Project.objects.create(name='Other', key='OTH1', owner=owner)
+        with self.assertRaisesMessage(CommandError, 'OTH1'):
+            call_command('generate_data', users=2, projects=2, tasks=5, prefix='oth', stdout=StringIO())
+
+
+class IndexUsageTest(TestCase):
+    """The composite indexes must actually be picked for the hot queries."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.workspace = seed_workspace(projects=3, tasks_per_project=40, comments_per_task=2)
+        cls.project = cls.workspace['projects'][0]
+        cls.user = cls.workspace['users'][1]
+
+    def setUp(self):
+        if connection.vendor == 'postgresql':
+            # Tables this small are cheaper to scan; make the planner show its index choice
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, f'{index_name} not used:\n{plan}')
+
+    def test_project_status_filter(self):
+        self.assertUsesIndex(
+            Task.objects.filter(project=self.project, status=Task.Status.TODO).order_by(),
+            'task_column_rank_idx',
+        )
+
+    def test_assignee_status_filter(self):
+        self.assertUsesIndex(
+            Task.objects.filter(assignee=self.user, status=Task.Status.IN_PROGRESS).order_by(),
+            'task_assignee_status_idx',
+        )
+
+    def test_project_default_ordering(self):
+        self.assertUsesIndex(Task.objects.filter(project=self.project), 'task_project_due_idx')
+
+    def test_sprint_status_filter(self):
+        sprint = self.project.sprints.first()
+        self.assertUsesIndex(
+            Task.objects.filter(sprint=sprint, status=Task.Status.DONE).order_by(),
+            'task_sprint_status_idx',
+        )
+
+    def test_task_comments(self):
+        task = self.project.tasks.first()
+        self.assertUsesIndex(Comment.objects.filter(task=task), 'comment_task_created_idx')
+
+
+class SearchTest(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.owner = User.objects.create_user(username='owner', password='testpass123')
+        self.outsider = User.objects.create_user(username='outsider', password='testpass123')
+        self.project = Project.objects.create(name='Search', owner=self.owner)
+        self.login = Task.objects.create(title='Login page crashes', project=self.project,
+                                         description='Stack trace attached')
+        self.export = Task.objects.create(title='Export reports', project=self.project,
+                                          description='The login audit needs a CSV export')
+        hidden = Project.objects.create(name='Hidden', owner=self.outsider)
+        Task.objects.create(title='Login for outsiders', project=hidden)
+    
+    def ids(self, query, user=None):
+        return [task_id for task_id, rank in search_tasks(query, user or self.owner)]
+    
+    def test_ranking_and_visibility(self):
+        # Title matches outrank description matches; other projects stay hidden
+        self.assertEqual(self.ids('login'), [self.login.pk, self.export.pk])
+        self.assertEqual(self.ids('log'), [self.login.pk, self.export.pk])
+        self.assertEqual(self.ids('login csv'), [self.export.pk])
+        self.assertEqual(self.ids(self.login.key), [self.login.pk])
+        self.assertEqual(len(self.ids('login', self.outsider)), 1)
+        self.assertEqual(self.ids('"*) OR ('), [])
+    
+    def test_index_follows_changes(self):
+        self.assertEqual(self.ids('stacktrace'), [])
+        Comment.objects.create(task=self.export, author=self.owner, content='Seen with stacktrace v2')
+        self.assertEqual(self.ids('stacktrace'), [self.export.pk])
+        
+        self.login.title = 'Sign-in page crashes'
+        self.login.save()
+        self.assertEqual(self.ids('sign-in'), [self.login.pk])
+        self.assertEqual(self.ids('login'), [self.export.pk])
+        
+        self.export.delete()
+        self.assertEqual(self.ids('stacktrace'), [])
+        
+        # Bulk writes bypass signals until the index is rebuilt
+        Task.objects.filter(pk=self.login.pk).update(title='Renamed quietly')
+        self.assertEqual(self.ids('quietly'), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.ids('quietly'), [self.login.pk])
+    
+    def test_deleting_a_task_skips_comment_reindexing(self):
+        for i in range(5):
+            Comment.objects.create(task=self.login, author=self.owner, content=f'Note {i}')
+        comment = self.login.comments.first()
+        with mock.patch('tasks.signals.search.index_tasks') as index_tasks:
+            comment.delete()
+            self.assertEqual(index_tasks.call_count, 1)
+            index_tasks.reset_mock()
+            Task.objects.get(pk=self.login.pk).delete()
+            Project.objects.get(pk=self.project.pk).delete()
+            index_tasks.assert_not_called()
+        self.assertEqual(self.ids('note'), [])
+        
+        # An author's comments go, but their tasks stay and are reindexed
+        task = Task.objects.create(title='Kept', project=Project.objects.create(name='Kept', owner=self.outsider))
+        Comment.objects.create(task=task, author=self.owner, content='Ephemeral remark')
+        self.assertEqual(self.ids('ephemeral', self.outsider), [task.pk])
+        self.owner.delete()
+        self.assertEqual(self.ids('ephemeral', self.outsider), [])
+    
+    def test_search_views(self):
+        self.client.force_login(self.owner)
+        for i in range(25):
+            Task.objects.create(title=f'Flaky test {i}', project=self.project)
+        
+        response = self.client.get(reverse('tasks:task_search'), {'q': 'flaky'})
+        self.assertEqual(len(response.context['tasks']), 20)
+        self.assertEqual(response.context['next_page_url'], '?q=flaky&page=2')
+        
+        response = self.client.get(reverse('tasks:task_search_json'), {'q': 'flaky', 'page': 2})
+        data = response.json()
+        self.assertEqual(len(data['results']), 5)
+        self.assertFalse(data['has_next'])
+        self.assertIn('rank', data['results'][0])
+        
+        response = self.client.get(reverse('tasks:task_search_json'), {'q': 'flaky', 'page': 'x'})
+        self.assertEqual(response.status_code, 404)
+
+
+class JQLTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.workspace = seed_workspace(projects=2, tasks_per_project=20, comments_per_task=0)
+        cls.owner = cls.workspace['owner']
+        cls.project = cls.workspace['projects'][0]
+    
+    def run_query(self, query):
+        queryset, ordering = jql.apply(Task.objects.visible_to(self.owner), jql.parse(query), self.owner)
+        return list(queryset.order_by(*ordering) if ordering else queryset)
+    
+    def test_example_query(self):
+        query = (f'project = {self.project.key} AND status IN (todo, "In Progress") '
+                 f'AND labels = backend ORDER BY priority DESC, key')
+        expected = Task.objects.filter(
+            project=self.project, status__in=['todo', 'in_progress'], labels__name='backend'
+        )
+        tasks = self.run_query(query)
+        self.assertEqual({task.pk for task in tasks}, set(expected.values_list('pk', flat=True)))
+        ranks = [Task.Priority.values.index(task.priority) for task in tasks]
+        self.assertEqual(ranks, sorted(ranks, reverse=True))
+        
+        with self.assertNumQueries(1):
+            self.run_query(query)
+    
+    def test_operators(self):
+        member = self.workspace['users'][1]
+        cases = {
+            f'assignee = {member.username} AND labels != ux':
+                Task.objects.filter(assignee=member).exclude(labels__name='ux'),
+            'priority >= high AND (assignee IS EMPTY OR storypoints > 5)':
+                Task.objects.filter(priority__in=['high', 'highest']).filter(
+                    models.Q(assignee__isnull=True) | models.Q(story_points__gt=5)),
+            f'project IN ({self.project.key}) AND NOT status = done AND summary ~ "task 1"':
+                Task.objects.filter(project=self.project, title__icontains='task 1').exclude(status='done'),
+            'due < 10d AND labels IS NOT EMPTY':
+                Task.objects.filter(due_date__lt=timezone.now() + timedelta(days=10)),
+        }
+        for query, expected in cases.items():
+            with self.subTest(query=query):
+                self.assertEqual(
+                    {task.pk for task in self.run_query(query)},
+                    set(expected.values_list('pk', flat=True)),
+                )
+    
+    def test_rejected_queries(self):
+        for query in [
+            '', 'ORDER BY priority', 'status != done', 'summary ~ login',
+            'status = todo OR NOT priority = high', 'status = nonsense', 'colour = red',
+            'status = todo AND', 'status IN ()', 'project = MP ORDER BY labels',
+            ' AND '.join(['status = todo'] * (jql.MAX_CLAUSES + 1)),
+        ]:
+            with self.subTest(query=query), self.assertRaises(jql.JQLError):
+                jql.parse(query)
+    
+    def test_plans_are_cached(self):
+        jql.parse.cache_clear()
+        jql.parse('status = todo')
+        jql.parse('status = todo')
+        self.assertEqual(jql.parse.cache_info().hits, 1)
+    
+    def test_task_list_view(self):
+        self.client.force_login(self.owner)
+        query = f'project = {self.project.key} AND status = todo ORDER BY priority DESC'
+        response = self.client.get(reverse('tasks:task_list'), {'jql': query, 'page_size': 2})
+        tasks = response.context['tasks']
+        self.assertEqual(response.context['total_count'], self.project.tasks.filter(status='todo').count())
+        
+        # Cursors continue in JQL order
+        response = self.client.get(reverse('tasks:task_list') + response.context['next_page_url'])
+        self.assertTrue(set(response.context['tasks']).isdisjoint(tasks))
+        
+        response = self.client.get(reverse('tasks:task_list_json'), {'jql': 'status != done'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('jql', response.json()['errors'])
+
+
+class BulkUpdateTest(QueryCountMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.workspace = seed_workspace(projects=2, tasks_per_project=30, comments_per_task=0)
+        cls.owner = cls.workspace['owner']
+        cls.project, cls.other_project = cls.workspace['projects']
+        cls.outsider = get_user_model().objects.create_user(username='outsider', password='testpass123')
+        cls.hidden = Task.objects.create(
+            title='Hidden', project=Project.objects.create(name='Hidden', owner=cls.outsider)
+        )
+    
+    def setUp(self):
+        self.client.force_login(self.owner)
+    
+    def post(self, payload):
+        return self.client.post(
+            reverse('tasks:task_bulk_update'), json.dumps(payload), content_type='application/json'
+        )
+    
+    def test_query_count_is_constant(self):
+        sprint = self.project.sprints.last()
+        label = self.workspace['labels'][0]
+        tasks = list(self.project.tasks.values_list('pk', flat=True))
+        before = timezone.now()
+        payload = {'status': 'done', 'sprint': sprint.pk, 'add_labels': [label.pk]}
+        # session, user, project ids, sprint, labels, then inside a savepoint:
+        # the locked tasks, UPDATE, label INSERT, the two-query stats rebuild,
+        # the status log INSERT and a rollup UPDATE for each sprint (two here)
+        with self.assertMaxQueries(15):
+            response = self.post({'task_ids': tasks[:5], **payload})
+        self.assertEqual(len(response.json()['updated']), 5)
+        with self.assertMaxQueries(15):
+            response = self.post({'task_ids': tasks, **payload})
+        self.assertEqual(sorted(response.json()['updated']), sorted(tasks))
+        
+        updated = self.project.tasks.all()
+        self.assertFalse(updated.exclude(status='done').exists())
+        self.assertFalse(updated.exclude(sprint=sprint).exists())
+        self.assertFalse(updated.exclude(labels=label).exists())
+        self.assertFalse(updated.filter(updated_at__lt=before).exists())
+        self.assertEqual(ProjectStats.objects.get(project=self.project).done_count, len(tasks))
+    
+    def test_tasks_are_read_inside_the_transaction(self):
+        # Otherwise a concurrent edit could change the before-state the deltas use
+        task = self.project.tasks.first()
+        with CaptureQueriesContext(connection) as queries:
+            self.post({'task_ids': [task.pk], 'status': 'done'})
+        statements = [query['sql'] for query in queries]
+        transaction_start = next(i for i, sql in enumerate(statements) if sql.startswith('SAVEPOINT'))
+        task_read = next(i for i, sql in enumerate(statements) if sql.startswith('SELECT "tasks_task"."id"'))
+        self.assertLess(transaction_start, task_read)
+    
+    def test_per_item_failures(self):
+        sprint = self.project.sprints.first()
+        mine = self.project.tasks.first()
+        elsewhere = self.other_project.tasks.first()
+        response = self.post({
+            'task_ids': [mine.pk, elsewhere.pk, self.hidden.pk, 999999], 'sprint': sprint.pk,
+        })
+        result = response.json()
+        self.assertEqual(result['updated'], [mine.pk])
+        errors = {failure['id']: failure['error'] for failure in result['failed']}
+        self.assertIn('another project', errors[elsewhere.pk])
+        self.assertEqual(errors[self.hidden.pk], 'Task not found')
+        self.assertEqual(errors[999999], 'Task not found')
+        self.hidden.refresh_from_db()
+        self.assertIsNone(self.hidden.sprint)
+    
+    def test_jql_targets_and_validation(self):
+        label = self.workspace['labels'][1]
+        query = f'project = {self.project.key} AND labels = {label.name}'
+        expected = set(self.project.tasks.filter(labels=label).values_list('pk', flat=True))
+        response = self.post({'jql': query, 'remove_labels': [label.pk], 'unassign': True})
+        self.assertEqual(set(response.json()['updated']), expected)
+        self.assertFalse(self.project.tasks.filter(labels=label).exists())
+        self.assertFalse(Task.objects.filter(pk__in=expected, assignee__isnull=False).exists())
+        
+        self.assertEqual(self.post({'task_ids': [1]}).status_code, 400)  # nothing to change
+        self.assertEqual(self.post({'jql': 'status != done', 'status': 'done'}).status_code, 400)
+        self.assertEqual(self.post({'status': 'done'}).status_code, 400)
+        with override_settings(BULK_UPDATE_MAX_TASKS=10):
+            response = self.post({'jql': f'project = {self.project.key}', 'status': 'done'})
+        self.assertEqual(response.status_code, 400)
+    
+    def test_admin_action(self):
+        tasks = list(self.other_project.tasks.values_list('pk', flat=True)[:3])
+        url = reverse('admin:tasks_task_changelist')
+        response = self.client.post(url, {'action': 'bulk_update', '_selected_action': tasks})
+        self.assertContains(response, 'Apply changes')
+        response = self.client.post(url, {
+            'action': 'bulk_update', '_selected_action': tasks, 'apply': '1', 'priority': 'highest',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Task.objects.filter(pk__in=tasks, priority='highest').count(), 3)
@@ -5,11 +5,22 @@ app_name = 'tasks'
 
 urlpatterns = [
     path('', views.TaskListView.as_view(), name='task_list'),
+    path('api/', views.TaskListJsonView.as_view(), name='task_list_json'),
+    path('export/', views.TaskExportView.as_view(), name='task_export'),
+    path('import/', views.TaskImportView.as_view(), name='task_import'),
+    path('bulk/', views.TaskBulkUpdateView.as_view(), name='task_bulk_update'),
+    path('search/', views.TaskSearchView.as_view(), name='task_search'),
+    path('search/api/', views.TaskSearchJsonView.as_view(), name='task_search_json'),
     path('create/<int:project_id>/', views.TaskCreateView.as_view(), name='task_create'),
     path('<int:pk>/', views.TaskDetailView.as_view(), name='task_detail'),
     path('<int:pk>/update/', views.TaskUpdateView.as_view(), name='task_update'),
+    path('<int:pk>/comments/', views.TaskCommentsView.as_view(), name='task_comments'),
     path('<int:task_id>/comment/', views.CommentCreateView.as_view(), name='comment_create'),
     path('kanban/<int:project_id>/', views.TaskKanbanView.as_view(), name='task_kanban'),
+    path('kanban/<int:project_id>/moves/', views.KanbanMovesView.as_view(), name='kanban_moves'),
+    path('kanban/<int:project_id>/<str:status>/', views.KanbanColumnView.as_view(), name='kanban_column'),
+    path('sprints/<int:sprint_id>/burndown/', views.SprintBurndownView.as_view(), name='sprint_burndown'),
+    path('velocity/<int:project_id>/', views.ProjectVelocityView.as_view(), name='project_velocity'),
     path('<int:pk>/update-status/', views.UpdateTaskStatusView.as_view(), name='update_task_status'),
     path('<int:pk>/log-time/', views.log_time, name='log_time'),
 ]
\ No newline at end of file
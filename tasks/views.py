@@ -1,30 +1,71 @@
+import io
+import json
+
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.views.generic import ListView, DetailView, CreateView, UpdateView, TemplateView
+from django.views.generic import ListView, DetailView, CreateView, UpdateView, TemplateView, View
 from django.urls import reverse_lazy
 from django.contrib import messages
-from django.db import models
-from django.http import JsonResponse
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Prefetch, Window
+from django.db.models.functions import RowNumber
+from django.http import JsonResponse, Http404, StreamingHttpResponse
+from django.core.paginator import InvalidPage
 from django.views.decorators.http import require_POST
+from django.utils import timezone
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
-from .models import Task, Comment, Label, Component, Version
-from .forms import TaskForm, CommentForm, TaskFilterForm
+from .models import Task, Comment, Label, Component, Version, Attachment
+from . import export, importer, jql
+from .bulk import bulk_update_tasks, BulkUpdateError
+from .forms import TaskForm, CommentForm, TaskFilterForm, BulkUpdateForm
+from .history import Transition, burndown, record_transitions, task_state, velocity
+from .pagination import KeysetPaginator
+from .ranking import BoardPlacer, RankError
+from .search import search_tasks
+from .serializers import serialize_task
+from .stats import record_status_changes
 from projects.models import Project, Sprint, Epic  # Import from projects app
+from projects.access import project_role
 class TaskListView(LoginRequiredMixin, ListView):
     model = Task
     context_object_name = 'tasks'
     template_name = 'tasks/task_list.html'
+    paginate_by = 50
+    max_paginate_by = 200
+    ordering = None  # Meta.ordering unless a JQL query says otherwise
+    
+    def get_paginate_by(self, queryset):
+        try:
+            page_size = int(self.request.GET.get('page_size', self.paginate_by))
+        except ValueError:
+            page_size = self.paginate_by
+        return max(1, min(page_size, self.max_paginate_by))
+    
+    def paginate_queryset(self, queryset, page_size):
+        # Keyset pagination on Meta.ordering (+ id): page N costs the same as page 1
+        paginator = KeysetPaginator(queryset, page_size, ordering=self.ordering)
+        try:
+            page = paginator.page(self.request.GET.get('cursor'))
+        except InvalidPage as e:
+            raise Http404(str(e))
+        return (paginator, page, page.object_list, page.has_next or page.has_previous)
+    
+    def get_page_url(self, cursor):
+        params = self.request.GET.copy()
+        params.pop('cursor', None)
+        if cursor:
+            params['cursor'] = cursor
+        return f'?{params.urlencode()}' if params else '?'
     
     def get_queryset(self):
-        queryset = Task.objects.filter(
-            models.Q(project__owner=self.request.user) | 
-            models.Q(project__members=self.request.user) |
-            models.Q(assignee=self.request.user)
-        ).distinct().select_related('project', 'assignee', 'epic', 'sprint')
+        queryset = Task.objects.visible_to(self.request.user).select_related(
+            'project', 'assignee', 'epic', 'sprint'
+        )
         
         #Apply filters
-        self.filter_form = TaskFilterForm(self.request.GET, project=None)
+        self.filter_form = TaskFilterForm(self.request.GET, project=None, user=self.request.user)
         if self.filter_form.is_valid():
             status = self.filter_form.cleaned_data.get('status')
             priority = self.filter_form.cleaned_data.get('priority')
@@ -42,6 +83,11 @@ class TaskListView(LoginRequiredMixin, ListView):
                 queryset = queryset.filter(assignee=assignee)
             if labels:
                 queryset = queryset.filter(labels__in=labels).distinct()
+            
+            plan = self.filter_form.cleaned_data.get('jql')
+            if plan:
+                queryset, ordering = jql.apply(queryset, plan, self.request.user)
+                self.ordering = ordering or None
         
         return queryset
     
@@ -49,88 +95,421 @@ class TaskListView(LoginRequiredMixin, ListView):
         context = super().get_context_data(**kwargs)
         context['filter_form'] = self.filter_form
         
-        # Add counts for dashboard
-        context['todo_count'] = self.get_queryset().filter(status='todo').count()
-        context['in_progress_count'] = self.get_queryset().filter(status='in_progress').count()
-        context['in_review_count'] = self.get_queryset().filter(status='in_review').count()
-        context['done_count'] = self.get_queryset().filter(status='done').count()
-        context['backlog_count'] = self.get_queryset().filter(status='backlog').count()
-        context['total_count'] = self.get_queryset().count()
+        # All status counters come from one grouped query over the filtered tasks
+        summary = self.object_list.status_summary()
+        context['status_summary'] = summary
+        for status in Task.Status.values:
+            context[f'{status}_count'] = summary[status]
+        context['total_count'] = summary['total']
+        
+        page = context['page_obj']
+        if page.has_next:
+            context['next_page_url'] = self.get_page_url(page.next_cursor)
+        if page.has_previous:
+            context['first_page_url'] = self.get_page_url(None)
         
         return context
 
+class TaskListJsonView(TaskListView):
+    """Same listing as TaskListView, one keyset page at a time as JSON."""
+    
+    def get(self, request, *args, **kwargs):
+        self.object_list = self.get_queryset()
+        if not self.filter_form.is_valid():
+            return JsonResponse({'errors': self.filter_form.errors}, status=400)
+        page_size = self.get_paginate_by(self.object_list)
+        paginator, page, tasks, is_paginated = self.paginate_queryset(self.object_list, page_size)
+        return JsonResponse({
+            'results': [serialize_task(task) for task in tasks],
+            'next_cursor': page.next_cursor,
+            'has_next': page.has_next,
+        })
+
+class TaskExportView(TaskListView):
+    """The filtered task list streamed as a CSV or JSON Lines download."""
+    
+    def get(self, request, *args, **kwargs):
+        queryset = self.get_queryset()
+        if not self.filter_form.is_valid():
+            return JsonResponse({'errors': self.filter_form.errors}, status=400)
+        format = request.GET.get('format', 'csv')
+        if format not in export.FORMATS:
+            return JsonResponse({'errors': {'format': [f'Choose one of {", ".join(export.FORMATS)}.']}}, status=400)
+        ordering = [*self.ordering, 'pk'] if self.ordering else None
+        content_type, extension = export.FORMATS[format]
+        response = StreamingHttpResponse(
+            export.export_tasks(queryset, format, ordering=ordering), content_type=content_type
+        )
+        filename = f'tasks-{timezone.localdate():%Y%m%d}.{extension}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+class TaskImportView(LoginRequiredMixin, View):
+    """Import an uploaded CSV or JSON Lines file of tasks (see tasks.importer).
+    
+    POST multipart with ``file`` and optionally ``format``, ``project`` (key
+    for rows without one), ``dry_run`` and ``start_after`` (the
+    ``last_line`` of an earlier, interrupted import to resume after).
+    """
+    
+    def post(self, request, *args, **kwargs):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return JsonResponse({'errors': {'file': ['No file uploaded.']}}, status=400)
+        format = request.POST.get('format') or upload.name.rsplit('.', 1)[-1].lower()
+        if format not in importer.FORMATS:
+            return JsonResponse({'errors': {'format': [f'Choose one of {", ".join(importer.FORMATS)}.']}}, status=400)
+        try:
+            start_after = int(request.POST.get('start_after') or 0)
+        except ValueError:
+            return JsonResponse({'errors': {'start_after': ['Enter a line number.']}}, status=400)
+        task_importer = importer.TaskImporter(
+            user=request.user,
+            dry_run=request.POST.get('dry_run') in ('1', 'true', 'on'),
+            start_after=start_after,
+            default_project=request.POST.get('project') or None,
+        )
+        # Large uploads are on disk already; read them line by line
+        lines = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        try:
+            result = task_importer.run(importer.read_rows(lines, format))
+        except UnicodeDecodeError:
+            return JsonResponse({'errors': {'file': ['The file is not UTF-8 text.']}, **task_importer.result()},
+                                status=400)
+        return JsonResponse(result)
+
+class TaskSearchView(LoginRequiredMixin, TemplateView):
+    """Ranked full-text search over keys, titles, descriptions and comments."""
+    template_name = 'tasks/task_search.html'
+    paginate_by = 20
+    # Ranked results can't be keyset-paginated; deep offsets are capped instead
+    max_pages = 50
+    
+    def get_page_number(self):
+        try:
+            page = int(self.request.GET.get('page', 1))
+        except ValueError:
+            raise Http404('Invalid page')
+        if not 1 <= page <= self.max_pages:
+            raise Http404('Invalid page')
+        return page
+    
+    def get_results(self):
+        """Best-first tasks for this page, each with a search_rank, and has_next."""
+        query = self.request.GET.get('q', '').strip()
+        page = self.get_page_number()
+        hits = search_tasks(
+            query, self.request.user,
+            limit=self.paginate_by + 1, offset=(page - 1) * self.paginate_by,
+        )
+        has_next = len(hits) > self.paginate_by and page < self.max_pages
+        hits = hits[:self.paginate_by]
+        tasks = Task.objects.select_related('project', 'assignee', 'epic', 'sprint').in_bulk(
+            [task_id for task_id, rank in hits]
+        )
+        results = []
+        for task_id, rank in hits:
+            if task_id in tasks:
+                task = tasks[task_id]
+                task.search_rank = rank
+                results.append(task)
+        return query, page, results, has_next
+    
+    def get_page_url(self, page):
+        params = self.request.GET.copy()
+        params['page'] = page
+        return f'?{params.urlencode()}'
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query, page, tasks, has_next = self.get_results()
+        context.update({'query': query, 'page': page, 'tasks': tasks})
+        if has_next:
+            context['next_page_url'] = self.get_page_url(page + 1)
+        if page > 1:
+            context['previous_page_url'] = self.get_page_url(page - 1)
+        return context
+
+class TaskSearchJsonView(TaskSearchView):
+    def get(self, request, *args, **kwargs):
+        query, page, tasks, has_next = self.get_results()
+        return JsonResponse({
+            'query': query,
+            'page': page,
+            'results': [dict(serialize_task(task), rank=task.search_rank) for task in tasks],
+            'has_next': has_next,
+        })
+
+def get_user_project(user, project_id):
+    return get_object_or_404(Project.objects.visible_to(user), id=project_id)
+
 class TaskKanbanView(LoginRequiredMixin, TemplateView):
     template_name = 'tasks/task_kanban.html'
     
+    def get_column_size(self):
+        return getattr(settings, 'KANBAN_COLUMN_SIZE', 25)
+    
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         project_id = self.kwargs.get('project_id')
         
         if project_id:
-            project = get_object_or_404(Project, id=project_id)
+            project = get_user_project(self.request.user, project_id)
             context['project'] = project
             
-            # Get tasks for each status column
+            column_size = self.get_column_size()
+            project_tasks = Task.objects.filter(project=project)
+            paginator = KeysetPaginator(project_tasks, column_size, ordering=['rank'])
+            ordering = paginator.get_ordering()
+            
+            # One query for the whole board: number the cards within each status
+            # and keep only the first column_size of every column.
+            tasks = (
+                project_tasks
+                .select_related('project', 'assignee', 'epic', 'sprint')
+                .annotate(column_position=Window(
+                    RowNumber(), partition_by=[F('status')], order_by=ordering
+                ))
+                .filter(column_position__lte=column_size)
+                .order_by('status', *ordering)
+            )
+            by_status = {status: [] for status in Task.Status.values}
+            for task in tasks:
+                by_status[task.status].append(task)
+            
+            summary = project_tasks.status_summary()
             columns = {}
             for status_value, status_label in Task.Status.choices:
-                tasks = Task.objects.filter(
-                    project=project,
-                    status=status_value
-                ).select_related('assignee', 'epic', 'sprint')
+                column_tasks = by_status[status_value]
+                has_more = summary[status_value] > len(column_tasks)
                 columns[status_value] = {
                     'label': status_label,
-                    'tasks': tasks
+                    'tasks': column_tasks,
+                    'count': summary[status_value],
+                    'next_cursor': paginator.encode_cursor(column_tasks[-1]) if has_more else None,
                 }
             
             context['columns'] = columns
         
         return context
 
+class KanbanColumnView(TaskKanbanView):
+    """Next slice of a single kanban column as JSON, for "load more"."""
+    
+    def get(self, request, *args, **kwargs):
+        project = get_user_project(request.user, self.kwargs['project_id'])
+        status = self.kwargs['status']
+        if status not in Task.Status.values:
+            raise Http404('Unknown status')
+        tasks = Task.objects.filter(project=project, status=status).select_related(
+            'project', 'assignee', 'epic', 'sprint'
+        )
+        paginator = KeysetPaginator(tasks, self.get_column_size(), ordering=['rank'])
+        try:
+            page = paginator.page(request.GET.get('cursor'))
+        except InvalidPage as e:
+            raise Http404(str(e))
+        return JsonResponse({
+            'results': [serialize_task(task) for task in page],
+            'next_cursor': page.next_cursor,
+            'has_next': page.has_next,
+        })
+
+class KanbanMovesView(LoginRequiredMixin, View):
+    """Apply a batch of card moves from the kanban board in one transaction.
+    
+    POST JSON ``{"moves": [{"task_id": 1, "status": "done", "above_id": 7,
+    "below_id": 9}, ...]}`` where the neighbours are the cards now above and
+    below the moved one (null at either end of the column). Later moves of
+    the same card win. Each card gets a rank between its neighbours (see
+    tasks.ranking); all rows are written with one UPDATE and ProjectStats get
+    a single combined delta.
+    """
+    max_moves = 200
+    
+    def post(self, request, *args, **kwargs):
+        project = get_user_project(request.user, self.kwargs['project_id'])
+        try:
+            moves = json.loads(request.body or b'{}').get('moves')
+        except (ValueError, AttributeError):
+            moves = None
+        if not isinstance(moves, list) or not 0 < len(moves) <= self.max_moves:
+            return JsonResponse({'error': f'Expected 1 to {self.max_moves} moves.'}, status=400)
+        
+        latest, failed = {}, []
+        for move in moves:
+            if not isinstance(move, dict):
+                move = {}
+            task_id, status = move.get('task_id'), move.get('status')
+            neighbours = (move.get('above_id'), move.get('below_id'))
+            if not isinstance(task_id, int):
+                failed.append({'id': task_id, 'error': 'Invalid task id'})
+            elif status not in Task.Status.values:
+                failed.append({'id': task_id, 'error': 'Invalid status'})
+            elif any(pk is not None and not isinstance(pk, int) for pk in neighbours):
+                failed.append({'id': task_id, 'error': 'Invalid neighbour'})
+            else:
+                latest.pop(task_id, None)  # keep the final move, in move order
+                latest[task_id] = (status, *neighbours)
+        
+        with transaction.atomic():
+            project_tasks = Task.objects.filter(project=project)
+            referenced = set(latest).union(*(neighbours for _, *neighbours in latest.values()))
+            # Locked so the old statuses behind the stats and rollup deltas can't
+            # change before the write; in pk order so concurrent batches can't deadlock
+            tasks = project_tasks.filter(pk__in=referenced - {None}).select_for_update().order_by('pk').only(
+                'pk', 'project_id', 'sprint_id', 'status', 'rank', 'story_points', 'time_logged'
+            ).in_bulk()
+            placer = BoardPlacer(project_tasks, tasks, [pk for pk in latest if pk in tasks])
+            now = timezone.now()
+            changes, transitions, moved, updated = [], [], [], []
+            for task_id, (status, above_id, below_id) in latest.items():
+                task = tasks.get(task_id)
+                if task is None:
+                    failed.append({'id': task_id, 'error': 'Task not found'})
+                    continue
+                try:
+                    rank = placer.place(task, status, above_id, below_id)
+                except RankError:
+                    failed.append({'id': task_id, 'error': 'Column needs rebalancing'})
+                    continue
+                if task.status != status:
+                    changes.append((task, task.status))
+                    transitions.append(Transition(
+                        task.pk, task.project_id, task_state(task), task_state(task)._replace(status=status)
+                    ))
+                task.status, task.rank, task.updated_at = status, rank, now
+                moved.append(task)
+                updated.append({
+                    'id': task_id, 'status': status,
+                    'status_display': task.get_status_display(), 'rank': rank,
+                })
+            
+            Task.objects.bulk_update(moved, ['status', 'rank', 'updated_at'])
+            if changes:
+                record_status_changes(project.pk, changes)
+                record_transitions(transitions)
+        return JsonResponse({'updated': updated, 'failed': failed})
+
+class SprintBurndownView(LoginRequiredMixin, View):
+    """A sprint's daily remaining work as JSON, read from its daily rollups."""
+    
+    def get(self, request, *args, **kwargs):
+        sprint = get_object_or_404(
+            Sprint.objects.filter(project__in=Project.objects.visible_to(request.user)),
+            pk=self.kwargs['sprint_id'],
+        )
+        return JsonResponse(burndown(sprint))
+
+
+class ProjectVelocityView(LoginRequiredMixin, View):
+    """Committed and completed points of a project's latest sprints as JSON."""
+    default_sprints = 6
+    max_sprints = 20
+    
+    def get(self, request, *args, **kwargs):
+        project = get_user_project(request.user, self.kwargs['project_id'])
+        try:
+            limit = min(int(request.GET.get('sprints', self.default_sprints)), self.max_sprints)
+        except ValueError:
+            limit = self.default_sprints
+        today = timezone.localdate()
+        sprints = Sprint.objects.filter(project=project, start_date__lte=today).order_by('-start_date')[:max(limit, 1)]
+        return JsonResponse({'project': project.pk, **velocity(reversed(list(sprints)), today)})
+
 class TaskDetailView(LoginRequiredMixin, DetailView):
+    """A task with its relations and newest comments in a fixed number of queries.
+    
+    Every relation the page shows is a Prefetch, one query each. Only the
+    newest COMMENTS_PAGE_SIZE comments are loaded; older ones come from
+    TaskCommentsView a page at a time.
+    """
     model = Task
     context_object_name = 'task'
     template_name = 'tasks/task_detail.html'
+    comment_ordering = ['-created_at', '-id']
+    
+    def get_comments_page_size(self):
+        return getattr(settings, 'COMMENTS_PAGE_SIZE', 20)
     
     def get_queryset(self):
-        return Task.objects.filter(
-            models.Q(project__owner=self.request.user) | 
-            models.Q(project__members=self.request.user) |
-            models.Q(assignee=self.request.user)
-        ).distinct().select_related('project', 'assignee', 'epic', 'sprint')
+        comments = Comment.objects.select_related('author').order_by(*self.comment_ordering)
+        return Task.objects.visible_to(self.request.user).select_related(
+            'project', 'assignee', 'epic', 'sprint'
+        ).prefetch_related(
+            # One extra row tells whether there are older comments
+            Prefetch('comments', queryset=comments[:self.get_comments_page_size() + 1], to_attr='recent_comments'),
+            Prefetch('labels', queryset=Label.objects.order_by('name')),
+            Prefetch('components', queryset=Component.objects.order_by('name')),
+            Prefetch('fix_versions', queryset=Version.objects.order_by('name')),
+            Prefetch('affects_versions', queryset=Version.objects.order_by('name')),
+            Prefetch('attachments', queryset=Attachment.objects.select_related('uploaded_by').order_by('-uploaded_at')),
+        )
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['comment_form'] = CommentForm()
+        page_size = self.get_comments_page_size()
+        comments = self.object.recent_comments
+        context['comments'] = comments[:page_size]
+        if len(comments) > page_size:
+            paginator = KeysetPaginator(self.object.comments.all(), page_size, ordering=self.comment_ordering)
+            context['comments_next_cursor'] = paginator.encode_cursor(comments[page_size - 1])
         return context
 
+class TaskCommentsView(TaskDetailView):
+    """A task's comments, newest first, one keyset page at a time as JSON."""
+    
+    def get(self, request, *args, **kwargs):
+        task = get_object_or_404(Task.objects.visible_to(request.user), pk=self.kwargs['pk'])
+        paginator = KeysetPaginator(
+            task.comments.select_related('author'), self.get_comments_page_size(), ordering=self.comment_ordering
+        )
+        try:
+            page = paginator.page(request.GET.get('cursor'))
+        except InvalidPage as e:
+            raise Http404(str(e))
+        return JsonResponse({
+            'results': [
+                {
+                    'id': comment.pk,
+                    'author': comment.author.username,
+                    'content': comment.content,
+                    'created_at': comment.created_at.isoformat(),
+                }
+                for comment in page
+            ],
+            'next_cursor': page.next_cursor,
+            'has_next': page.has_next,
+        })
+
 class TaskCreateView(LoginRequiredMixin, CreateView):
     model = Task
     form_class = TaskForm
     template_name = 'tasks/task_form.html'
     
+    def get_project(self):
+        if not hasattr(self, '_project'):
+            project_id = self.kwargs.get('project_id')
+            # The cached membership map answers "no access" without a query
+            self._project = (
+                Project.objects.filter(id=project_id).first()
+                if project_role(self.request.user, project_id) else None
+            )
+        return self._project
+    
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
-        project_id = self.kwargs.get('project_id')
-        if project_id:
-            # Fix: Use proper Q object filtering
-            project = Project.objects.filter(
-                models.Q(owner=self.request.user) | models.Q(members=self.request.user),
-                id=project_id
-            ).first()
-            if project:
-                kwargs['project'] = project
+        kwargs['user'] = self.request.user
+        project = self.get_project()
+        if project:
+            kwargs['project'] = project
         return kwargs
     
     def form_valid(self, form):
-        project_id = self.kwargs.get('project_id')
-        if project_id:
-            # Fix: Use proper Q object filtering
-            project = Project.objects.filter(
-                models.Q(owner=self.request.user) | models.Q(members=self.request.user),
-                id=project_id
-            ).first()
-            if project:
-                form.instance.project = project
+        project = self.get_project()
+        if project:
+            form.instance.project = project
         messages.success(self.request, 'Task created successfully!')
         return super().form_valid(form)
 
@@ -140,14 +519,13 @@ class TaskUpdateView(LoginRequiredMixin, UpdateView):
     template_name = 'tasks/task_form.html'
     
     def get_queryset(self):
-        return Task.objects.filter(
-            models.Q(project__owner=self.request.user) | 
-            models.Q(project__members=self.request.user)
-        ).distinct()
+        # Being the assignee alone is not enough to edit a task
+        return Task.objects.visible_to(self.request.user, include_assigned=False)
     
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
         kwargs['project'] = self.object.project
+        kwargs['user'] = self.request.user
         return kwargs
     
     def form_valid(self, form):
@@ -160,13 +538,7 @@ class CommentCreateView(LoginRequiredMixin, CreateView):
     
     def form_valid(self, form):
         form.instance.author = self.request.user
-        # Fix: Use proper Q object filtering
-        task = Task.objects.filter(
-            models.Q(project__owner=self.request.user) | 
-            models.Q(project__members=self.request.user) |
-            models.Q(assignee=self.request.user),
-            id=self.kwargs['task_id']
-        ).first()
+        task = Task.objects.visible_to(self.request.user).filter(id=self.kwargs['task_id']).first()
         if task:
             form.instance.task = task
             messages.success(self.request, 'Comment added successfully!')
@@ -179,25 +551,75 @@ class CommentCreateView(LoginRequiredMixin, CreateView):
         return reverse_lazy('tasks:task_detail', kwargs={'pk': self.object.task.id})
 
 
+class TaskBulkUpdateView(LoginRequiredMixin, View):
+    """Apply one set of changes to many tasks.
+    
+    POST a JSON object naming the tasks by ``task_ids`` or a ``jql`` query,
+    plus any BulkUpdateForm fields. The response lists the updated ids and
+    a reason for every task that was skipped.
+    """
+    
+    def post(self, request, *args, **kwargs):
+        try:
+            payload = json.loads(request.body or b'{}')
+        except ValueError:
+            payload = None
+        if not isinstance(payload, dict):
+            return self.error('Expected a JSON object.')
+        
+        task_ids, query = payload.get('task_ids'), payload.get('jql')
+        if bool(task_ids) == bool(query):
+            return self.error('Give either task_ids or jql.')
+        queryset = None
+        if task_ids:
+            if not isinstance(task_ids, list) or not all(isinstance(pk, int) for pk in task_ids):
+                return self.error('task_ids must be a list of integers.')
+        else:
+            try:
+                plan = jql.parse(str(query).strip())
+            except jql.JQLError as e:
+                return self.error(str(e), field='jql')
+            queryset, ordering = jql.apply(
+                Task.objects.visible_to(request.user, include_assigned=False), plan, request.user
+            )
+        
+        form = BulkUpdateForm(payload, user=request.user)
+        if not form.is_valid():
+            return JsonResponse({'errors': form.errors}, status=400)
+        try:
+            result = bulk_update_tasks(
+                form.get_changes(), task_ids=task_ids or None, queryset=queryset, user=request.user
+            )
+        except BulkUpdateError as e:
+            return self.error(str(e))
+        return JsonResponse(result)
+    
+    def error(self, message, field='__all__'):
+        return JsonResponse({'errors': {field: [message]}}, status=400)
+
+
 @method_decorator(csrf_exempt, name='dispatch')
 class UpdateTaskStatusView(LoginRequiredMixin, UpdateView):
     model = Task
     fields = ['status']
     
+    def get_queryset(self):
+        return Task.objects.visible_to(self.request.user)
+    
     def post(self, request, *args, **kwargs):
         task = self.get_object()
         new_status = request.POST.get('status')
         
         if new_status in dict(Task.Status.choices):
             task.status = new_status
-            task.save()
+            task.save(update_fields=['status', 'updated_at'])
             return JsonResponse({'success': True, 'new_status': task.get_status_display()})
         
         return JsonResponse({'success': False, 'error': 'Invalid status'})
 
 @require_POST
 def log_time(request, pk):
-    task = get_object_or_404(Task, pk=pk)
+    task = get_object_or_404(Task.objects.visible_to(request.user), pk=pk)
     hours = request.POST.get('hours', 0)
     
     try:
@@ -1,5 +1,8 @@
 from django.test import TestCase
 from django.urls import reverse
+from projects.models import Project
+from tasks.models import Task
+from core.testing import QueryCountMixin, seed_workspace
 from .models import CustomUser
 
 class UserModelTest(TestCase):
@@ -9,4 +12,65 @@ class UserModelTest(TestCase):
         )
         self.assertEqual(user.username, 'testuser')
         self.assertEqual(user.email, 'test@example.com')
-        self.assertTrue(user.check_password('testpass123'))
\ No newline at end of file
+        self.assertTrue(user.check_password('testpass123'))
+    
+    def test_dashboard_renders(self):
+        user = CustomUser.objects.create_user(username='owner', password='testpass123')
+        Project.objects.create(name='Alpha', owner=user)
+        self.client.force_login(user)
+        response = self.client.get(reverse('users:dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '(0 tasks)')
+
+
+class DashboardTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='owner', password='testpass123')
+        self.other = CustomUser.objects.create_user(username='other', password='testpass123')
+        self.client.force_login(self.user)
+    
+    def seed(self, projects, tasks_per_project):
+        for i in range(projects):
+            owned = Project.objects.create(name=f'Owned {i}', owner=self.user)
+            owned.members.add(self.user, self.other)
+            shared = Project.objects.create(name=f'Shared {i}', owner=self.other)
+            shared.members.add(self.user)
+            for j in range(tasks_per_project):
+                Task.objects.create(title=f'Task {j}', project=owned, assignee=self.user,
+                                    status=Task.Status.TODO if j % 2 else Task.Status.IN_PROGRESS)
+    
+    def test_query_count_is_constant(self):
+        # session, user, project totals, owned projects, task summary, recent tasks
+        self.seed(projects=2, tasks_per_project=2)
+        with self.assertNumQueries(6):
+            self.client.get(reverse('users:dashboard'))
+        
+        self.seed(projects=6, tasks_per_project=5)
+        with self.assertNumQueries(6):
+            response = self.client.get(reverse('users:dashboard'))
+        
+        context = response.context
+        self.assertEqual(context['owned_projects_count'], 8)
+        self.assertEqual(context['member_projects_count'], 8)
+        self.assertEqual(context['total_projects'], 16)
+        self.assertEqual(context['total_tasks'], 34)
+        self.assertEqual(context['todo_count'], 14)
+        self.assertEqual(context['in_progress_count'], 20)
+        self.assertEqual(len(context['owned_projects']), 5)
+
+
+class UserViewQueryCountTest(QueryCountMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.workspace = seed_workspace()
+    
+    def test_dashboard(self):
+        self.client.force_login(self.workspace['users'][1])
+        with self.assertMaxQueries(6):
+            self.client.get(reverse('users:dashboard'))
+    
+    def test_admin_changelist(self):
+        self.client.force_login(self.workspace['owner'])
+        with self.assertMaxQueries(5):
+            response = self.client.get(reverse('admin:users_customuser_changelist'))
+        self.assertEqual(response.status_code, 200)
@@ -6,6 +6,7 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import DetailView, UpdateView  # Make sure UpdateView is imported
 from django.urls import reverse_lazy
 from django.http import Http404
+from projects.access import project_roles, OWNER
 from .models import CustomUser
 from .forms import UserRegistrationForm, UserLoginForm, UserUpdateForm, ProfileUpdateForm
 
@@ -100,44 +101,31 @@ def profile(request):
 @login_required
 def dashboard(request):
     user = request.user
-    owned_projects = user.owned_projects.all()
-    member_projects = user.projects.all()
-    assigned_tasks = user.assigned_tasks.select_related('project')
     
-    context = {
-        'owned_projects': owned_projects,
-        'member_projects': member_projects.exclude(id__in=owned_projects),
-        'assigned_tasks': assigned_tasks,
-        'total_projects': owned_projects.count() + member_projects.count(),
-        'total_tasks': assigned_tasks.count(),
-    }
-    return render(request, 'users/dashboard.html', context)
-
-@login_required
-def dashboard(request):
-    user = request.user
+    # Project totals straight from the cached membership map
+    roles = project_roles(user)
+    owned_count = sum(1 for role in roles.values() if role == OWNER)
     
-    # Get user's projects and tasks
-    owned_projects = user.owned_projects.all()
-    member_projects = user.projects.all()
-    assigned_tasks = user.assigned_tasks.select_related('project')
+    # Recent owned projects with precomputed task counts
+    owned_projects = user.owned_projects.with_counts()[:5]
     
-    # Calculate counts manually instead of using template filter
-    todo_count = assigned_tasks.filter(status='todo').count()
-    in_progress_count = assigned_tasks.filter(status='in_progress').count()
+    # Per-status counts from a single grouped query
+    assigned_tasks = user.assigned_tasks.all()
+    task_summary = assigned_tasks.status_summary()
     
     # Get recent tasks (limit to 5)
-    recent_tasks = assigned_tasks[:5]
+    recent_tasks = assigned_tasks.select_related('project')[:5]
     
     context = {
         'owned_projects': owned_projects,
-        'member_projects': member_projects.exclude(id__in=owned_projects),
-        'assigned_tasks': assigned_tasks,
+        'owned_projects_count': owned_count,
+        'member_projects_count': len(roles) - owned_count,
+        'total_projects': len(roles),
         'recent_tasks': recent_tasks,
-        'todo_count': todo_count,
-        'in_progress_count': in_progress_count,
-        'total_projects': owned_projects.count() + member_projects.count(),
-        'total_tasks': assigned_tasks.count(),
+        'task_summary': task_summary,
+        'todo_count': task_summary['todo'],
+        'in_progress_count': task_summary['in_progress'],
+        'total_tasks': task_summary['total'],
     }
     
     return render(request, 'users/dashboard.html', context)